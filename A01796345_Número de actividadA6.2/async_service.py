@@ -0,0 +1,172 @@
+"""Fachada asincrona (asyncio) de los managers de reservaciones."""
+import asyncio
+
+from customer import Customer
+from hotel import Hotel
+from reservation import Reservation
+from store import savepoint
+
+MAX_BATCH = 256
+
+
+class StoreWriter:  # pylint: disable=too-few-public-methods
+    """Serializa las escrituras de un manager por una cola asyncio.
+
+    Un solo worker toma de la cola las operaciones acumuladas y las
+    ejecuta en un hilo dentro de una misma transaccion, de modo que
+    las escrituras que llegan juntas se confirman con una sola
+    escritura en disco sin bloquear el event loop. Cada operacion corre
+    en un savepoint de los almacenes de la transaccion: si falla con
+    ValueError solo se descarta lo que ella alcanzo a escribir y el
+    error se entrega solo a quien la pidio. Cualquier otro error revierte
+    el lote y se entrega a todas.
+    """
+
+    def __init__(self, scope, max_batch=MAX_BATCH):
+        self._scope = scope
+        self.max_batch = max_batch
+        self._queue = asyncio.Queue()
+        self._worker = None
+
+    async def submit(self, func, *args, **kwargs):
+        """Encola ``func(*args, **kwargs)`` y espera su resultado."""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((func, args, kwargs, future))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._drain())
+        return await future
+
+    async def _drain(self):
+        """Ejecuta lotes mientras haya operaciones en la cola."""
+        while not self._queue.empty():
+            size = min(self.max_batch, self._queue.qsize())
+            items = [self._queue.get_nowait() for _ in range(size)]
+            results = await asyncio.to_thread(self._apply, items)
+            for (*_, future), (failed, value) in zip(items, results):
+                if future.cancelled():
+                    continue
+                if failed:
+                    future.set_exception(value)
+                else:
+                    future.set_result(value)
+
+    def _apply(self, items):
+        """Ejecuta un lote en una transaccion; retorna (fallo, valor)."""
+        results = []
+        try:
+            with self._scope() as stores:
+                for func, args, kwargs, _ in items:
+                    try:
+                        with savepoint(*stores):
+                            results.append((False, func(*args, **kwargs)))
+                    except ValueError as exc:
+                        results.append((True, exc))
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            return [(True, exc)] * len(items)
+        return results
+
+
+class AsyncEntityManager:
+    """Fachada asincrona de un manager de entidades.
+
+    Las lecturas no pasan por la cola pero se ejecutan en un hilo, para
+    que esperar el candado del almacen o recargar el archivo no bloquee
+    el event loop; las escrituras se encolan en el ``StoreWriter``.
+    """
+
+    def __init__(self, manager, max_batch=MAX_BATCH):
+        self.manager = manager
+        self._writer = StoreWriter(self._scope, max_batch)
+
+    def _scope(self):
+        """Transaccion sobre los almacenes que tocan las escrituras."""
+        # pylint: disable-next=protected-access
+        return self.manager._delete_scope()
+
+    async def create(self, **kwargs):
+        """Crea una entidad."""
+        return await self._writer.submit(self.manager.create, **kwargs)
+
+    async def delete(self, entity_id, cascade=False):
+        """Elimina una entidad por su id."""
+        return await self._writer.submit(self.manager.delete, entity_id,
+                                         cascade)
+
+    async def modify(self, entity_id, **kwargs):
+        """Modifica una entidad existente."""
+        return await self._writer.submit(self.manager.modify, entity_id,
+                                         **kwargs)
+
+    async def display(self, entity_id=None):
+        """Retorna una entidad o todas."""
+        return await asyncio.to_thread(self.manager.display, entity_id)
+
+    async def page(self, limit=50, cursor=None, where=None, order_by=None):
+        """Retorna una pagina de entidades."""
+        return await asyncio.to_thread(self.manager.page, limit, cursor,
+                                       where, order_by)
+
+
+class AsyncHotel(AsyncEntityManager):
+    """Fachada asincrona de Hotel."""
+
+    def __init__(self, manager=None, max_batch=MAX_BATCH):
+        super().__init__(manager or Hotel(), max_batch)
+
+    async def reserve_room(self, hotel_id):
+        """Reserva una habitacion del hotel."""
+        return await self._writer.submit(self.manager.reserve_room,
+                                         hotel_id)
+
+    async def cancel_reservation(self, hotel_id):
+        """Libera una habitacion del hotel."""
+        return await self._writer.submit(self.manager.cancel_reservation,
+                                         hotel_id)
+
+
+class AsyncCustomer(AsyncEntityManager):
+    """Fachada asincrona de Customer."""
+
+    def __init__(self, manager=None, max_batch=MAX_BATCH):
+        super().__init__(manager or Customer(), max_batch)
+
+
+class AsyncReservation:
+    """Fachada asincrona de Reservation."""
+
+    def __init__(self, manager=None, max_batch=MAX_BATCH):
+        self.manager = manager or Reservation()
+        self._writer = StoreWriter(self._scope, max_batch)
+
+    def _scope(self):
+        """Transaccion sobre reservaciones y hoteles."""
+        return self.manager._bulk()  # pylint: disable=protected-access
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    async def create_reservation(self, reservation_id, customer_id,
+                                 hotel_id, check_in, check_out,
+                                 idempotency_key=None):
+        """Crea una reservacion."""
+        return await self._writer.submit(
+            self.manager.create_reservation, reservation_id, customer_id,
+            hotel_id, check_in, check_out, idempotency_key
+        )
+
+    async def cancel_reservation(self, reservation_id):
+        """Cancela una reservacion."""
+        return await self._writer.submit(self.manager.cancel_reservation,
+                                         reservation_id)
+
+    async def by_customer(self, customer_id):
+        """Retorna las reservaciones de un cliente."""
+        return await asyncio.to_thread(self.manager.by_customer,
+                                       customer_id)
+
+    async def by_hotel(self, hotel_id):
+        """Retorna las reservaciones de un hotel."""
+        return await asyncio.to_thread(self.manager.by_hotel, hotel_id)
+
+    async def availability(self, hotel_id, check_in, check_out):
+        """Retorna las habitaciones libres por noche."""
+        return await asyncio.to_thread(self.manager.availability, hotel_id,
+                                       check_in, check_out)
@@ -1,31 +1,602 @@
 """Clases abstractas base para el sistema de reservaciones."""
+import heapq
 import json
 import os
+import threading
 from abc import ABC, abstractmethod
+from contextlib import ExitStack, contextmanager, nullcontext
+from functools import partial
+from itertools import chain, islice
+from operator import itemgetter
+
+from changefeed import open_feed
+from indexes import FieldIndex, SortedIndex
+from locking import VERSION_FIELD, ConflictError
+from metrics import METRICS, instrumented
+from sharding import (ShardLayoutError, save_shard_count, shard_count,
+                      shard_of, shard_path)
+from store import open_store, open_stores, transaction
+
+SCAN_CHUNK = 256
+
+_LAYOUTS = {}
+_LAYOUTS_LOCK = threading.Lock()
+
+
+class NotFoundError(LookupError, ValueError):
+    """No existe un registro con el id pedido.
+
+    Tambien es ValueError para que el codigo que ya capturaba ValueError
+    siga funcionando.
+    """
+
+
+def _encode_cursor(entry):
+    """Convierte la entrada de un indice ordenado en un cursor opaco."""
+    return json.dumps(entry, ensure_ascii=False, separators=(',', ':'))
+
+
+def _decode_cursor(cursor):
+    """Recupera la entrada de un cursor; ValueError si no es valido."""
+    if cursor is None:
+        return None
+    try:
+        entry = json.loads(cursor)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("cursor invalido") from exc
+    if not isinstance(entry, list) or not entry:
+        raise ValueError("cursor invalido")
+    return tuple(tuple(part) if isinstance(part, list) else part
+                 for part in entry)
+
+
+def _walk(fetch, after):
+    """Recorre un indice ordenado por tramos de ``SCAN_CHUNK`` entradas.
+
+    Cada tramo se pide a partir de la ultima entrada vista, asi que el
+    recorrido sigue siendo valido si el indice cambia entre tramos.
+    """
+    while True:
+        chunk = fetch(after, SCAN_CHUNK)
+        yield from chunk
+        if len(chunk) < SCAN_CHUNK:
+            return
+        after = chunk[-1]
 
 
 class PersistenceManager(ABC):
-    """Abstraccion para persistencia en archivos JSON."""
+    """Abstraccion para persistencia en archivos JSON.
+
+    ``STORAGE`` selecciona el almacen: ``'json'`` reescribe el archivo
+    en cada mutacion, ``'journal'`` anexa a una bitacora, ``'sqlite'``
+    usa la tabla ``TABLE`` de la base ``DB_FILE`` y ``'lazy'`` guarda
+    un JSONL del que solo se decodifica el registro consultado. Por
+    defecto se toma de la variable de entorno ``RESERVATION_STORAGE``.
+
+    ``GROUP_COMMIT`` indica cuantas mutaciones se agrupan por escritura
+    en los almacenes de archivo; con 1 cada mutacion es durable.
+
+    Con ``WRITE_BEHIND`` (variable ``RESERVATION_WRITE_BEHIND=1``) los
+    almacenes ``'json'`` y ``'journal'`` se abren como ``'writebehind'``
+    (ver ``store.WriteBehindStore``): cada mutacion solo se anexa a una
+    bitacora y el JSON se reescribe en segundo plano. Conviene para los
+    contadores de ``Hotel``, que cambian en cada reservacion.
+
+    ``RECORD`` es el tipo compacto (``records.Record``) con el que los
+    almacenes de archivo guardan los registros en memoria; ``FIELDS``
+    son sus campos. Con ``SNAPSHOT`` el arranque en frio lee un
+    snapshot binario junto al JSON en lugar de analizar el JSON.
+
+    Las actualizaciones de lectura-modificacion-escritura se reintentan
+    hasta ``MAX_RETRIES`` veces si otro escritor cambio el registro.
+
+    Con ``SHARDS`` mayor a 1 (variable ``RESERVATION_SHARDS``) los
+    managers con ``SHARD_FIELD`` reparten sus registros en un archivo
+    por shard segun ese campo (ver ``sharding``). Las operaciones sobre
+    un registro bloquean solo su shard; las que no conocen el shard
+    recorren o bloquean todos. Si los datos en disco se repartieron con
+    otro ``SHARDS`` el primer acceso lanza ShardLayoutError, porque sus
+    registros quedarian en shards que ya no se consultan; ``reshard``
+    los mueve al reparto actual.
+
+    Con ``FEED_FILE`` (variable ``RESERVATION_FEED``) cada alta, cambio
+    y baja publica un evento en ese change feed (ver ``changefeed``).
+    Los eventos se anexan despues de escribir los cambios y antes de
+    soltar el candado de sus almacenes, asi que siguen el orden de las
+    confirmaciones; dentro de ``batch()`` o de una transaccion se
+    publican al confirmarse. Por omision (None) no se publica nada.
+
+    Las operaciones publicas registran su latencia y sus errores en
+    ``METRICS`` (ver ``metrics``); ``metrics_text()`` las exporta en
+    formato de Prometheus junto con los bytes leidos y escritos por
+    cada almacen. Con ``METRICS`` en None no se mide nada.
+    """
+
+    ID_FIELD = 'id'
+    RECORD = None
+    FIELDS = ()
+    TABLE = None
+    STORAGE = os.environ.get('RESERVATION_STORAGE', 'json')
+    DB_FILE = 'data/reservation_system.db'
+    GROUP_COMMIT = 1
+    WRITE_BEHIND = os.environ.get('RESERVATION_WRITE_BEHIND') == '1'
+    SNAPSHOT = False
+    MAX_RETRIES = 10
+    SHARDS = int(os.environ.get('RESERVATION_SHARDS', '1'))
+    SHARD_FIELD = None
+    FEED_FILE = os.environ.get('RESERVATION_FEED')
+    METRICS = METRICS
 
     @abstractmethod
     def _get_filepath(self):
         """Retorna la ruta del archivo de persistencia."""
 
+    def _store(self, shard=0, shards=None):
+        """Retorna el almacen residente del archivo de persistencia.
+
+        ``shards`` es el numero de shards del reparto; por omision
+        ``SHARDS``, que antes se compara con el reparto en disco.
+        """
+        if shards is None:
+            self._check_layout()
+            shards = self.SHARDS
+        if self.SHARD_FIELD is None or shards == 1:
+            shard = None
+        if self.STORAGE == 'sqlite':
+            return open_store(self._shard_path(self.DB_FILE, shard),
+                              self.ID_FIELD, 'sqlite',
+                              table=self.TABLE, fields=self.FIELDS)
+        storage = self.STORAGE
+        if self.WRITE_BEHIND and storage in ('json', 'journal'):
+            storage = 'writebehind'
+        return open_store(self._shard_path(self._get_filepath(), shard),
+                          self.ID_FIELD, storage,
+                          group_commit=self.GROUP_COMMIT,
+                          record_type=self.RECORD, snapshot=self.SNAPSHOT)
+
+    def _sharded(self):
+        return self.SHARD_FIELD is not None and self.SHARDS > 1
+
+    @staticmethod
+    def _shard_path(filepath, shard):
+        return shard_path(filepath, shard) if shard is not None else filepath
+
+    def _layout(self):
+        """Llave de los datos de este manager en ``_LAYOUTS``."""
+        return (self._get_filepath(), self.STORAGE)
+
+    def _check_layout(self):
+        """Lanza ShardLayoutError si hay datos con otro numero de shards."""
+        if (self.SHARD_FIELD is None
+                or _LAYOUTS.get(self._layout()) == self.SHARDS):
+            return
+        with _LAYOUTS_LOCK:
+            filepath = self._get_filepath()
+            previous = shard_count(filepath)
+            if previous != self.SHARDS and any(
+                    len(self._store(shard, previous))
+                    for shard in range(previous)):
+                raise ShardLayoutError(
+                    f"Los datos de {filepath} estan en {previous} shard(s) "
+                    f"y SHARDS es {self.SHARDS}; use reshard({previous})"
+                )
+            save_shard_count(filepath, self.SHARDS)
+            _LAYOUTS[self._layout()] = self.SHARDS
+
+    def reshard(self, previous):
+        """Mueve los registros del reparto en ``previous`` shards a SHARDS.
+
+        Debe ejecutarse sin otros procesos escribiendo. Retorna cuantos
+        registros se movieron.
+        """
+        if self.SHARD_FIELD is None:
+            return 0
+        with _LAYOUTS_LOCK:
+            old = [self._store(shard, previous) for shard in range(previous)]
+            new = [self._store(shard, self.SHARDS)
+                   for shard in range(self.SHARDS)]
+            records = [r for store in old for r in store.all()]
+            grouped = {id(store): [] for store in new}
+            for record in records:
+                shard = (shard_of(record[self.SHARD_FIELD], self.SHARDS)
+                         if self.SHARDS > 1 else 0)
+                grouped[id(new[shard])].append(record)
+            for store in new:
+                store.replace(grouped[id(store)])
+            for store in old:
+                if id(store) not in grouped:
+                    store.replace([])
+            save_shard_count(self._get_filepath(), self.SHARDS)
+            _LAYOUTS[self._layout()] = self.SHARDS
+        return len(records)
+
+    def _shards(self, route=None):
+        """Shards que pueden tener registros de ``route`` (todos con None).
+
+        ``route`` es un valor de ``SHARD_FIELD``.
+        """
+        if not self._sharded():
+            return [0]
+        if route is None:
+            return list(range(self.SHARDS))
+        return [shard_of(route, self.SHARDS)]
+
+    def _stores(self, route=None):
+        """Almacenes de los shards que cubre ``route``."""
+        return [self._store(shard) for shard in self._shards(route)]
+
+    def _store_of(self, record):
+        """Almacen del shard al que pertenece el registro."""
+        if not self._sharded():
+            return self._store()
+        return self._store(shard_of(record[self.SHARD_FIELD], self.SHARDS))
+
+    @classmethod
+    def _feed(cls):
+        """Retorna el change feed o None si esta deshabilitado."""
+        return open_feed(cls.FEED_FILE) if cls.FEED_FILE else None
+
+    @classmethod
+    def changes(cls, after=0, limit=None):
+        """Retorna los eventos del change feed con ``seq`` mayor a after."""
+        feed = cls._feed()
+        return feed.read(after, limit) if feed else []
+
+    @classmethod
+    def metrics_text(cls):
+        """Retorna las metricas en formato de texto de Prometheus."""
+        return cls.METRICS.render(open_stores()) if cls.METRICS else ''
+
+    @classmethod
+    def write_metrics(cls, filepath):
+        """Escribe ``metrics_text()`` en filepath de forma atomica."""
+        if cls.METRICS is not None:
+            cls.METRICS.write(filepath, open_stores())
+
+    def _unit(self, stores=()):
+        """Difiere los eventos del bloque hasta que termine sin errores.
+
+        Antes de publicarlos escribe los cambios pendientes de stores,
+        que el llamador mantiene bloqueados.
+        """
+        feed = self._feed()
+        if feed is None:
+            return nullcontext()
+
+        def commit():
+            for store in stores:
+                store.flush()
+        return feed.unit(commit)
+
+    @contextmanager
+    def _publishing(self, store):
+        """Bloquea store y publica los eventos del bloque antes de soltarlo."""
+        with store.locked(), self._unit((store,)):
+            yield store
+
+    def _emit(self, op, entity_id, record=None):
+        """Publica un evento de este manager en el change feed."""
+        feed = self._feed()
+        if feed is not None:
+            feed.emit(self.TABLE, op, entity_id, record)
+
+    @contextmanager
+    def batch(self):
+        """Agrupa las mutaciones del bloque en una sola escritura."""
+        stores = self._stores()
+        with ExitStack() as stack:
+            for store in stores:
+                stack.enter_context(store.batch())
+            stack.enter_context(self._unit(stores))
+            yield self
+
+    @contextmanager
+    def transaction(self, *others, route=None, also=()):
+        """Unidad de trabajo sobre este almacen y los de otros managers.
+
+        Las operaciones de los managers dentro del bloque se validan
+        contra un solo estado cargado y se confirman todas juntas o se
+        revierten todas si alguna falla. Con shards, ``route`` limita el
+        bloqueo a los shards de ese valor de ``SHARD_FIELD``; los de los
+        valores en ``also`` se bloquean tambien en este manager.
+        """
+        stores = self._stores(route)
+        if route is not None:
+            for value in also:
+                stores.extend(self._stores(value))
+        for other in others:
+            stores.extend(
+                other._stores(route)  # pylint: disable=protected-access
+            )
+        with ExitStack() as stack:
+            ordered = stack.enter_context(transaction(*stores))
+            stack.enter_context(self._unit(ordered))
+            yield ordered
+
+    def _field_indexes(self, field, value):
+        """Pares (almacen, indice de ``field``) de los shards de value."""
+        route = value if field == self.SHARD_FIELD else None
+        factory = partial(FieldIndex, field, self.ID_FIELD)
+        return [(store, store.index(field, factory))
+                for store in self._stores(route)]
+
+    def _field_ids(self, field, value, after=None, limit=None):
+        """Retorna los ids ordenados de los registros con ese valor.
+
+        Mezcla los indices secundarios de los shards; ``after`` es el
+        ultimo id de la pagina anterior.
+        """
+        ids = heapq.merge(*(index.ids(value, after, limit)
+                            for _, index in self._field_indexes(field, value)))
+        return list(islice(ids, limit))
+
+    def _check_fields(self, fields):
+        unknown = [f for f in fields if self.FIELDS and f not in self.FIELDS]
+        if unknown:
+            raise ValueError(f"Campos desconocidos: {', '.join(unknown)}")
+
+    def _shard_entries(self, store, where, order_by, after):
+        """Genera (entrada, almacen) de un shard en orden de entrada.
+
+        Sin ``order_by`` y con un filtro, el recorrido sale del indice
+        de ese campo y solo visita los registros que lo cumplen.
+        """
+        if order_by is None and where:
+            field, value = list(where.items())[0]
+            index = store.index(field, partial(FieldIndex, field,
+                                               self.ID_FIELD))
+
+            def fetch(entry, limit):
+                start = entry[0] if entry else None
+                return [(i,) for i in index.ids(value, start, limit)]
+        else:
+            fetch = store.index(
+                f'sorted:{order_by or self.ID_FIELD}',
+                partial(SortedIndex, order_by, self.ID_FIELD)
+            ).after
+        for entry in _walk(fetch, after):
+            yield entry, store
+
+    def _entries(self, where=None, order_by=None, cursor=None):
+        """Genera (entrada, registro) ordenados y filtrados."""
+        where = dict(where or {})
+        self._check_fields(list(where) + ([order_by] if order_by else []))
+        after = _decode_cursor(cursor)
+        route = where.get(self.SHARD_FIELD) if self.SHARD_FIELD else None
+        merged = heapq.merge(
+            *(self._shard_entries(store, where, order_by, after)
+              for store in self._stores(route)),
+            key=itemgetter(0)
+        )
+        for entry, store in merged:
+            record = store.get(entry[-1])
+            if record is None:
+                continue
+            if all(record.get(f) == v for f, v in where.items()):
+                yield entry, record
+
+    def scan(self, where=None, order_by=None, cursor=None):
+        """Genera los registros uno a uno, con memoria acotada.
+
+        ``where`` es un dict de campo a valor (igualdad); ``order_by``
+        es el campo de orden (el id si es None) y el id desempata.
+        ``cursor`` es el ``next_cursor`` de ``page``. Los registros se
+        leen por tramos de un indice ordenado, asi que el primero sale
+        sin cargar ni ordenar el resto.
+        """
+        for _, record in self._entries(where, order_by, cursor):
+            yield record
+
+    @instrumented('page')
+    def page(self, limit=50, cursor=None, where=None, order_by=None):
+        """Retorna una pagina de registros.
+
+        El resultado es un dict con ``results`` y ``next_cursor``, que
+        se pasa como ``cursor`` para pedir la pagina siguiente; es None
+        en la ultima pagina. ``where`` y ``order_by`` son los de
+        ``scan`` y deben ser los mismos en todas las paginas.
+        """
+        if not isinstance(limit, int) or limit <= 0:
+            raise ValueError("limit debe ser un entero positivo")
+        results, last = [], None
+        for entry, record in self._entries(where, order_by, cursor):
+            if len(results) == limit:
+                return {'results': results,
+                        'next_cursor': _encode_cursor(last)}
+            results.append(record)
+            last = entry
+        return {'results': results, 'next_cursor': None}
+
+    def _lookup(self, entity_id):
+        """Retorna el registro o None, buscando en los shards posibles."""
+        route = entity_id if self.SHARD_FIELD == self.ID_FIELD else None
+        for store in self._stores(route):
+            record = store.get(entity_id)
+            if record is not None:
+                return record
+        return None
+
+    def _get(self, entity_id):
+        """Retorna una copia del registro o lanza NotFoundError."""
+        record = self._lookup(entity_id)
+        if record is None:
+            raise NotFoundError(f"Registro con id {entity_id} no encontrado")
+        return record
+
+    def _update(self, entity_id, change, op='modify'):
+        """Aplica change al registro con control optimista de version.
+
+        change recibe una copia del registro y la modifica o lanza
+        ValueError. Si otro escritor guardo el registro entre la lectura
+        y la escritura, se vuelve a leer y se reintenta. El evento del
+        change feed lleva la operacion ``op``.
+        """
+        for _ in range(self.MAX_RETRIES):
+            record = self._get(entity_id)
+            change(record)
+            try:
+                with self._publishing(self._store_of(record)) as store:
+                    saved = store.put(
+                        record, expected_version=record.get(VERSION_FIELD, 0)
+                    )
+                    self._emit(op, entity_id, saved)
+            except ConflictError:
+                continue
+            return saved
+        raise ConflictError(
+            f"No se pudo actualizar {entity_id} por escrituras concurrentes"
+        )
+
+    @abstractmethod
+    def _insert(self, kwargs):
+        """Valida los campos y guarda un registro nuevo.
+
+        Recibe los campos de una fila, lanza ValueError si no son
+        validos o si el id ya existe y, si lo son, guarda el registro
+        con ``_create`` y lo retorna. ``create_many`` e ``import_jsonl``
+        lo llaman dentro de ``_bulk()`` por cada fila.
+        """
+
+    def _create(self, record):
+        """Guarda un registro nuevo; ConflictError si el id ya existe."""
+        with self._publishing(self._store_of(record)) as store:
+            saved = store.put(record, expected_version=0)
+            self._emit('create', saved[self.ID_FIELD], saved)
+        return saved
+
+    def _bulk(self):
+        """Contexto en el que se ejecuta una carga masiva."""
+        return self.batch()
+
+    @instrumented('create_many')
+    def create_many(self, records):
+        """Crea varios registros con una sola escritura.
+
+        Cada fila se valida por separado contra el indice de ids, que
+        incluye las filas previas del mismo lote. Retorna un dict con
+        los registros creados y los errores por numero de fila.
+        """
+        return self._create_rows(enumerate(records, start=1))
+
+    @instrumented('import_jsonl')
+    def import_jsonl(self, filepath):
+        """Crea los registros de un archivo JSONL (un objeto por linea)."""
+        rows, errors = [], []
+        with open(filepath, 'r', encoding='utf-8') as file:
+            for line_number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    rows.append((line_number, json.loads(line)))
+                except json.JSONDecodeError as exc:
+                    errors.append({'row': line_number, 'error': str(exc)})
+        result = self._create_rows(rows)
+        result['errors'] = sorted(errors + result['errors'],
+                                  key=lambda e: e['row'])
+        return result
+
+    def _create_rows(self, rows):
+        """Inserta filas (numero, campos) y reporta errores por fila."""
+        created, errors = [], []
+        with self._bulk():
+            for row, fields in rows:
+                try:
+                    if not isinstance(fields, dict):
+                        raise ValueError("Cada fila debe ser un objeto")
+                    created.append(self._insert(fields))
+                except ValueError as exc:
+                    errors.append({'row': row, 'error': str(exc)})
+        return {'created': created, 'errors': errors}
+
+    def _related(self):
+        """Managers cuyos almacenes se modifican junto con este."""
+        return ()
+
+    def _dependents(self):
+        """Pares (manager, campo) de los registros que referencian a este."""
+        return ()
+
+    def _delete_scope(self, route=None):
+        """Transaccion sobre este almacen y los de sus dependientes."""
+        managers = []
+        for manager, _ in self._dependents():
+            managers.append(manager)
+            managers.extend(
+                manager._related()  # pylint: disable=protected-access
+            )
+        return self.transaction(*managers, route=route)
+
+    def _delete(self, entity_id, cascade, parent=None):
+        """Elimina el registro y, con cascade, los que lo referencian.
+
+        Los dependientes se buscan en el indice secundario de cada
+        manager, sin recorrer sus almacenes. Sin cascade la eliminacion
+        se rechaza si existe alguno. ``parent`` es el manager cuya
+        eliminacion en cascada alcanzo a este registro. Debe ejecutarse
+        dentro de ``_delete_scope()``.
+        """
+        record = self._get(entity_id)
+        cascaded = False
+        for manager, field in self._dependents():
+            # pylint: disable-next=protected-access
+            dependent_ids = manager._field_ids(field, entity_id)
+            if dependent_ids and not cascade:
+                raise ValueError(
+                    f"{entity_id} tiene {len(dependent_ids)} registros "
+                    f"dependientes en {manager.TABLE}"
+                )
+            for dependent_id in dependent_ids:
+                manager._delete(  # pylint: disable=protected-access
+                    dependent_id, cascade, self
+                )
+                cascaded = True
+        if cascaded:
+            record = self._get(entity_id)
+        self._remove(record, parent)
+
+    def _remove(self, record, parent=None):  # pylint: disable=unused-argument
+        """Quita el registro del almacen.
+
+        ``parent`` es el manager que lo elimina en cascada, si lo hay.
+        """
+        with self._publishing(self._store_of(record)) as store:
+            store.remove(record[self.ID_FIELD])
+            self._emit('delete', record[self.ID_FIELD], record)
+
+    @instrumented('delete_many')
+    def delete_many(self, entity_ids, cascade=False):
+        """Elimina varios registros en una sola transaccion.
+
+        Retorna un dict con los ids eliminados y los errores por numero
+        de fila, como ``create_many``.
+        """
+        deleted, errors = [], []
+        with self._delete_scope():
+            for row, entity_id in enumerate(entity_ids, start=1):
+                try:
+                    self._delete(entity_id, cascade)
+                except ValueError as exc:
+                    errors.append({'row': row, 'error': str(exc)})
+                else:
+                    deleted.append(entity_id)
+        return {'deleted': deleted, 'errors': errors}
+
+    @instrumented('load_data')
     def load_data(self):
         """Carga datos desde el archivo JSON."""
-        filepath = self._get_filepath()
-        if not os.path.exists(filepath):
-            return []
-        with open(filepath, 'r', encoding='utf-8') as file:
-            data = json.load(file)
-            return data
+        return list(chain.from_iterable(
+            store.all() for store in self._stores()
+        ))
 
+    @instrumented('save_data')
     def save_data(self, data):
         """Guarda datos en el archivo JSON."""
-        filepath = self._get_filepath()
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        with open(filepath, 'w', encoding='utf-8') as file:
-            json.dump(data, file, indent=2, ensure_ascii=False)
+        parts = {shard: [] for shard in self._shards()}
+        for record in data:
+            route = record[self.SHARD_FIELD] if self._sharded() else None
+            parts[self._shards(route)[0]].append(record)
+        for shard, records in parts.items():
+            self._store(shard).replace(records)
 
 
 class EntityManager(ABC):
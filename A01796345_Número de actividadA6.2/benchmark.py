@@ -0,0 +1,258 @@
+"""Benchmark reproducible del sistema de reservaciones.
+
+Uso::
+
+    python benchmark.py --sizes 1000 --output base.json
+    python benchmark.py --sizes 1000 100000 1000000 --storage journal
+    python benchmark.py --sizes 1000 --compare base.json
+
+Por cada tamano se generan hoteles, clientes y reservaciones sinteticos
+en un directorio temporal, dentro de un proceso hijo para que la
+memoria pico (RSS) sea solo la de ese tamano. Se mide la latencia (p50,
+p90, p99 y maximo) y el throughput de cada operacion y el resultado se
+escribe en JSON, por omision en ``data/bench.json``. Con ``--compare``
+se reportan las operaciones cuyo p50 empeoro mas que la tolerancia
+respecto a un resultado anterior.
+
+Con el almacen ``'json'`` cada escritura reescribe el archivo, asi que
+con 100k entidades o mas conviene reducir ``--operations``.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from functools import partial
+
+from base_classes import PersistenceManager
+from customer import Customer
+from datadir import data_dir
+from hotel import Hotel
+from reservation import Reservation
+
+try:
+    import resource
+except ImportError:
+    resource = None  # pylint: disable=invalid-name
+
+OPERATIONS = ('create', 'display', 'reserve_room', 'create_reservation',
+              'cancel_reservation')
+LOCATIONS = ('CDMX', 'GDL', 'MTY', 'CUN', 'QRO', 'PUE', 'OAX', 'MID')
+FIRST_NIGHT = date(2026, 1, 1)
+OUTPUT = os.path.join('data', 'bench.json')
+
+
+def percentile(values, fraction):
+    """Percentil por rango mas cercano de una lista ordenada."""
+    if not values:
+        return None
+    rank = max(0, min(len(values) - 1, round(fraction * len(values)) - 1))
+    return values[rank]
+
+
+def summarize(latencies):
+    """Resume latencias en segundos como milisegundos y ops/s."""
+    ordered = sorted(latencies)
+    total = sum(ordered)
+    return {
+        'count': len(ordered),
+        'p50_ms': _ms(percentile(ordered, 0.50)),
+        'p90_ms': _ms(percentile(ordered, 0.90)),
+        'p99_ms': _ms(percentile(ordered, 0.99)),
+        'max_ms': _ms(ordered[-1] if ordered else None),
+        'ops_per_s': round(len(ordered) / total, 1) if total else None,
+    }
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 4) if seconds is not None else None
+
+
+def _stay(rng):
+    """Retorna (entrada, salida) ISO de una estancia de 1 a 7 noches."""
+    check_in = FIRST_NIGHT + timedelta(days=rng.randrange(365))
+    check_out = check_in + timedelta(days=rng.randint(1, 7))
+    return check_in.isoformat(), check_out.isoformat()
+
+
+def generate(size, rng):
+    """Retorna hoteles, clientes y reservaciones sinteticos."""
+    hotels = [{'hotel_id': f'H{n:07d}', 'name': f'Hotel {n}',
+               'location': rng.choice(LOCATIONS), 'rooms': 1000}
+              for n in range(size)]
+    customers = [{'customer_id': f'C{n:07d}', 'name': f'Cliente {n}',
+                  'email': f'cliente{n}@example.com'} for n in range(size)]
+    reservations = []
+    for n in range(size):
+        check_in, check_out = _stay(rng)
+        reservations.append({
+            'reservation_id': f'R{n:07d}',
+            'customer_id': rng.choice(customers)['customer_id'],
+            'hotel_id': rng.choice(hotels)['hotel_id'],
+            'check_in': check_in, 'check_out': check_out,
+        })
+    return hotels, customers, reservations
+
+
+def _timed(func, calls):
+    """Ejecuta func con cada tupla de argumentos; retorna latencias."""
+    latencies = []
+    for args in calls:
+        start = time.perf_counter()
+        func(*args)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def _create_hotel(hotel, hotel_id):
+    return hotel.create(hotel_id=hotel_id, name='Nuevo', location='CDMX',
+                        rooms=10)
+
+
+def _seed(size, rng):
+    """Carga los datos sinteticos; retorna los segundos de cada tabla."""
+    hotels, customers, reservations = generate(size, rng)
+    seconds = {}
+    for name, manager, records in (('hotels', Hotel(), hotels),
+                                   ('customers', Customer(), customers),
+                                   ('reservations', Reservation(),
+                                    reservations)):
+        start = time.perf_counter()
+        result = manager.create_many(records)
+        seconds[name] = round(time.perf_counter() - start, 4)
+        if result['errors']:
+            raise RuntimeError(f"Errores al cargar {name}: "
+                               f"{result['errors'][:3]}")
+    return seconds
+
+
+def _measure(size, operations, rng):
+    """Mide cada operacion sobre los datos ya cargados."""
+    hotel, reservation = Hotel(), Reservation()
+    hotel_ids = [f'H{rng.randrange(size):07d}' for _ in range(operations)]
+    customer_ids = [f'C{rng.randrange(size):07d}'
+                    for _ in range(operations)]
+    new_ids = [f'B{n:07d}' for n in range(operations)]
+    results = {
+        'create': _timed(partial(_create_hotel, hotel),
+                         [(hotel_id,) for hotel_id in new_ids]),
+        'display': _timed(hotel.display, [(h,) for h in hotel_ids]),
+        'reserve_room': _timed(hotel.reserve_room,
+                               [(h,) for h in hotel_ids]),
+        'create_reservation': _timed(reservation.create_reservation, [
+            (f'BR{n:07d}', customer_ids[n], hotel_ids[n], *_stay(rng))
+            for n in range(operations)
+        ]),
+        'cancel_reservation': _timed(
+            reservation.cancel_reservation,
+            [(f'BR{n:07d}',) for n in range(operations)]
+        ),
+    }
+    return {name: summarize(results[name]) for name in OPERATIONS}
+
+
+def run_size(size, operations=200, seed=0, storage=None):
+    """Carga ``size`` entidades de cada tipo y mide las operaciones."""
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as directory, \
+            data_dir(directory, storage):
+        start = time.perf_counter()
+        seed_seconds = _seed(size, rng)
+        seed_seconds['total'] = round(time.perf_counter() - start, 4)
+        measured = _measure(size, operations, rng)
+    peak = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            if resource is not None else None)
+    return {'size': size, 'seed_seconds': seed_seconds,
+            'operations': measured, 'peak_rss_kib': peak}
+
+
+# pylint: disable-next=too-many-arguments,too-many-positional-arguments
+def run(sizes, operations=200, seed=0, storage=None, isolate=True,
+        log=None):
+    """Ejecuta el benchmark de cada tamano y retorna el reporte.
+
+    Con ``isolate`` cada tamano corre en un proceso nuevo para que su
+    memoria pico no incluya la de los tamanos anteriores.
+    """
+    results = []
+    for size in sizes:
+        if isolate:
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(1, mp_context=context) as executor:
+                result = executor.submit(run_size, size, operations, seed,
+                                         storage).result()
+        else:
+            result = run_size(size, operations, seed, storage)
+        results.append(result)
+        if log is not None:
+            log(f"{size}: carga {result['seed_seconds']['total']} s, "
+                f"RSS pico {result['peak_rss_kib']} KiB")
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'storage': storage or PersistenceManager.STORAGE,
+            'operations': operations,
+            'seed': seed,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        },
+        'results': results,
+    }
+
+
+def compare(baseline, current, tolerance=0.25):
+    """Retorna las regresiones de p50 de current respecto a baseline.
+
+    Solo se comparan los tamanos y operaciones presentes en ambos.
+    """
+    before = {r['size']: r['operations'] for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        for name, stats in result['operations'].items():
+            old = before.get(result['size'], {}).get(name)
+            if not old or not old['p50_ms'] or stats['p50_ms'] is None:
+                continue
+            ratio = stats['p50_ms'] / old['p50_ms']
+            if ratio > 1 + tolerance:
+                regressions.append(
+                    f"{result['size']} {name}: p50 {old['p50_ms']} ms -> "
+                    f"{stats['p50_ms']} ms (x{ratio:.2f})"
+                )
+    return regressions
+
+
+def main(argv=None):
+    """Punto de entrada de la linea de comandos."""
+    parser = argparse.ArgumentParser(prog='python benchmark.py')
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1000])
+    parser.add_argument('--operations', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--storage', default=None)
+    parser.add_argument('--output', default=OUTPUT)
+    parser.add_argument('--compare', default=None)
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args(argv)
+    report = run(args.sizes, args.operations, args.seed, args.storage,
+                 log=print)
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    print(f"Resultados en {args.output}")
+    if args.compare is None:
+        return 0
+    with open(args.compare, 'r', encoding='utf-8') as file:
+        regressions = compare(json.load(file), report, args.tolerance)
+    for line in regressions:
+        print(f"Regresion: {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""Bitacora ordenada de cambios (change feed) para consumidores."""
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+from fsutil import atomic_file
+from locking import FileLock
+
+
+class ChangeFeed:
+    """Eventos de mutacion con numero de secuencia en un archivo JSONL.
+
+    Cada evento es ``{'seq', 'entity', 'op', 'id', 'record'}``; ``seq``
+    crece de uno en uno entre todos los procesos porque se asigna bajo
+    el candado del archivo. ``record`` es el registro guardado, o el
+    ultimo estado en una eliminacion, y lleva su ``version``, que ordena
+    los eventos de un mismo registro.
+
+    Dentro de ``unit()`` los eventos se acumulan por hilo y se publican
+    juntos al terminar el bloque sin errores; si falla se descartan, asi
+    que una transaccion revertida no deja eventos. Un ``unit()`` anidado
+    que falla descarta solo sus eventos. Los consumidores leen
+    con ``read(after)`` a partir del ultimo ``seq`` que procesaron, y
+    ``prune(before)`` descarta los eventos que ya todos procesaron.
+    """
+
+    SEARCH_BLOCK = 4096
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(filepath, self._lock)
+        self._local = threading.local()
+        self._size = None
+        self._last_seq = 0
+
+    @contextmanager
+    def unit(self, before_publish=None):
+        """Publica los eventos del bloque solo si termina sin errores.
+
+        ``before_publish`` se llama al final del bloque externo, antes de
+        publicar; si falla los eventos se descartan.
+        """
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0:
+            self._local.pending = []
+        mark = len(self._local.pending)
+        self._local.depth = depth + 1
+        try:
+            yield self
+            if depth == 0 and before_publish is not None:
+                before_publish()
+        except BaseException:
+            del self._local.pending[mark:]
+            raise
+        finally:
+            self._local.depth = depth
+        if depth == 0:
+            pending, self._local.pending = self._local.pending, []
+            self.append(pending)
+
+    def emit(self, entity, op, entity_id, record=None):
+        """Registra un evento; se difiere si hay un ``unit()`` abierto."""
+        event = {'entity': entity, 'op': op, 'id': entity_id,
+                 'record': record}
+        if getattr(self._local, 'depth', 0):
+            self._local.pending.append(event)
+        else:
+            self.append([event])
+
+    def append(self, events):
+        """Asigna secuencia a los eventos y los anexa de forma durable."""
+        if not events:
+            return []
+        with self._file_lock:
+            self._sync_tail()
+            lines = []
+            for event in events:
+                self._last_seq += 1
+                event = {'seq': self._last_seq, **event}
+                lines.append(json.dumps(event, ensure_ascii=False) + '\n')
+            data = ''.join(lines).encode('utf-8')
+            os.makedirs(os.path.dirname(self.filepath) or '.',
+                        exist_ok=True)
+            with open(self.filepath, 'ab') as file:
+                file.truncate(self._size)
+                file.write(data)
+                file.flush()
+                os.fsync(file.fileno())
+            self._size += len(data)
+            return [json.loads(line) for line in lines]
+
+    def prune(self, before):
+        """Descarta los eventos con ``seq`` hasta before.
+
+        El ultimo evento se conserva siempre para que la secuencia siga
+        creciendo. El archivo se reescribe de forma atomica.
+        """
+        with self._file_lock:
+            self._sync_tail()
+            before = min(before, self._last_seq - 1)
+            if before <= 0:
+                return
+            with open(self.filepath, 'rb') as file:
+                self._seek(file, before)
+                kept = [line for line in file.read(self._size - file.tell())
+                        .splitlines(keepends=True)
+                        if json.loads(line)['seq'] > before]
+            with atomic_file(self.filepath) as file:
+                file.writelines(kept)
+            self._size = sum(len(line) for line in kept)
+
+    def _sync_tail(self):
+        """Lee la ultima secuencia si otro proceso anexo eventos.
+
+        Una linea final incompleta (escritura interrumpida) se ignora y
+        la siguiente escritura la sobreescribe.
+        """
+        try:
+            size = os.path.getsize(self.filepath)
+        except FileNotFoundError:
+            size = 0
+        if size == self._size:
+            return
+        self._size, self._last_seq = 0, 0
+        if size == 0:
+            return
+        with open(self.filepath, 'rb') as file:
+            start = size
+            while start > 0:
+                start = max(0, start - self.SEARCH_BLOCK)
+                file.seek(start)
+                lines = file.read(size - start).split(b'\n')
+                if len(lines) > 2 or (start == 0 and len(lines) > 1):
+                    break
+        self._size = size - len(lines[-1])
+        if len(lines) > 1:
+            self._last_seq = json.loads(lines[-2])['seq']
+
+    def last_seq(self):
+        """Retorna la secuencia del ultimo evento publicado."""
+        with self._file_lock:
+            self._sync_tail()
+            return self._last_seq
+
+    def read(self, after=0, limit=None):
+        """Retorna hasta ``limit`` eventos con ``seq`` mayor a after.
+
+        La posicion inicial se busca por biseccion sobre el archivo, asi
+        que leer la cola no recorre los eventos ya consumidos.
+        """
+        events = []
+        try:
+            with open(self.filepath, 'rb') as file:
+                self._seek(file, after)
+                for line in file:
+                    if not line.endswith(b'\n'):
+                        break
+                    event = json.loads(line)
+                    if event['seq'] <= after:
+                        continue
+                    events.append(event)
+                    if limit is not None and len(events) >= limit:
+                        break
+        except FileNotFoundError:
+            pass
+        return events
+
+    def _seek(self, file, after):
+        """Se posiciona antes del primer evento con ``seq`` mayor a after."""
+        low, high = 0, os.fstat(file.fileno()).st_size
+        while high - low > self.SEARCH_BLOCK:
+            middle = (low + high) // 2
+            file.seek(middle)
+            file.readline()
+            line = file.readline()
+            if line.endswith(b'\n') and json.loads(line)['seq'] <= after:
+                low = middle
+            else:
+                high = middle
+        file.seek(low)
+        if low:
+            file.readline()
+
+
+_FEEDS = {}
+_FEEDS_LOCK = threading.Lock()
+
+
+def open_feed(filepath):
+    """Retorna el change feed compartido de un archivo."""
+    path = os.path.abspath(filepath)
+    with _FEEDS_LOCK:
+        feed = _FEEDS.get(path)
+        if feed is None:
+            feed = _FEEDS[path] = ChangeFeed(path)
+        return feed
@@ -0,0 +1,152 @@
+"""Representacion columnar de las reservaciones para analitica."""
+from array import array
+from datetime import date
+
+from inventory import reservation_stay
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # pylint: disable=invalid-name
+
+
+def _buffer(column):
+    """Vista NumPy sin copia de una columna ``array('i')``."""
+    return numpy.frombuffer(column, dtype=numpy.intc)
+
+
+class SymbolTable:  # pylint: disable=too-few-public-methods
+    """Interna ids de texto como enteros consecutivos."""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def code(self, value):
+        """Retorna el codigo del valor, asignando uno nuevo si falta."""
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+
+class ReservationColumns:  # pylint: disable=too-many-instance-attributes
+    """Indice columnar de las reservaciones.
+
+    Cada reservacion es una fila de cuatro columnas ``array('i')``:
+    hotel y cliente (codigos internados) y entrada y salida (ordinales
+    de fecha). Se mantiene como indice secundario del almacen; una
+    eliminacion mueve la ultima fila al hueco, asi que el orden de las
+    filas no es el de insercion. Las agregaciones recorren buffers
+    contiguos y usan NumPy si esta instalado (extra opcional ``fast``).
+    """
+
+    COLUMNS = ('hotel', 'customer', 'check_in', 'check_out')
+
+    def __init__(self):
+        self.hotels = SymbolTable()
+        self.customers = SymbolTable()
+        self.ids = []
+        self._rows = {}
+        self.hotel = array('i')
+        self.customer = array('i')
+        self.check_in = array('i')
+        self.check_out = array('i')
+
+    def __len__(self):
+        return len(self.ids)
+
+    def rebuild(self, reservations):
+        """Reconstruye las columnas desde todas las reservaciones."""
+        self.hotels = SymbolTable()
+        self.customers = SymbolTable()
+        self.ids = []
+        self._rows = {}
+        for name in self.COLUMNS:
+            del getattr(self, name)[:]
+        for reservation in reservations:
+            self._append(reservation)
+
+    def update(self, old, new):
+        """Aplica la insercion, cambio o eliminacion de una reservacion."""
+        if old is not None:
+            self._delete(old['reservation_id'])
+        if new is not None:
+            self._append(new)
+
+    def _append(self, reservation):
+        stay = reservation_stay(reservation)
+        if stay is None:
+            return
+        self._rows[reservation['reservation_id']] = len(self.ids)
+        self.ids.append(reservation['reservation_id'])
+        self.hotel.append(self.hotels.code(reservation['hotel_id']))
+        self.customer.append(self.customers.code(reservation['customer_id']))
+        self.check_in.append(stay[0])
+        self.check_out.append(stay[1])
+
+    def _delete(self, reservation_id):
+        row = self._rows.pop(reservation_id, None)
+        if row is None:
+            return
+        last = len(self.ids) - 1
+        if row != last:
+            self.ids[row] = self.ids[last]
+            self._rows[self.ids[row]] = row
+            for name in self.COLUMNS:
+                column = getattr(self, name)
+                column[row] = column[last]
+        self.ids.pop()
+        for name in self.COLUMNS:
+            getattr(self, name).pop()
+
+    def room_nights(self, start=None, end=None):
+        """Retorna las noches reservadas por hotel dentro de [start, end).
+
+        ``start`` y ``end`` son fechas ISO; sin ellas se cuentan todas
+        las noches.
+        """
+        low = date.fromisoformat(start).toordinal() if start else 0
+        high = date.fromisoformat(end).toordinal() if end else 2 ** 31 - 1
+        if numpy is not None and self.ids:
+            nights = numpy.clip(
+                numpy.minimum(_buffer(self.check_out), high)
+                - numpy.maximum(_buffer(self.check_in), low),
+                0, None
+            )
+            totals = numpy.bincount(_buffer(self.hotel), weights=nights,
+                                    minlength=len(self.hotels.values))
+            totals = [int(total) for total in totals]
+        else:
+            totals = [0] * len(self.hotels.values)
+            for hotel, first, last in zip(self.hotel, self.check_in,
+                                          self.check_out):
+                nights = min(last, high) - max(first, low)
+                if nights > 0:
+                    totals[hotel] += nights
+        return {hotel_id: total
+                for hotel_id, total in zip(self.hotels.values, totals)
+                if total}
+
+    def room_nights_by_month(self, hotel_id=None):
+        """Retorna {hotel_id: {'AAAA-MM': noches}} de las reservaciones."""
+        only = self.hotels.codes.get(hotel_id) if hotel_id else None
+        if hotel_id and only is None:
+            return {}
+        result = {}
+        for hotel, first, last in zip(self.hotel, self.check_in,
+                                      self.check_out):
+            if only is not None and hotel != only:
+                continue
+            months = result.setdefault(self.hotels.values[hotel], {})
+            night = first
+            while night < last:
+                day = date.fromordinal(night)
+                month_end = (date(day.year + day.month // 12,
+                                  day.month % 12 + 1, 1).toordinal())
+                key = f'{day.year:04d}-{day.month:02d}'
+                months[key] = months.get(key, 0) + min(last, month_end) - night
+                night = month_end
+        return result
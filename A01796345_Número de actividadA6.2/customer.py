@@ -1,17 +1,29 @@
 """Modulo de la clase Customer."""
-from base_classes import EntityManager, PersistenceManager
+from base_classes import EntityManager, NotFoundError, PersistenceManager
+from locking import ConflictError
+from metrics import instrumented
+from records import CustomerRecord
 
 
 class Customer(EntityManager, PersistenceManager):
     """Gestiona clientes con persistencia en JSON."""
 
     DATA_FILE = 'data/customers.json'
+    ID_FIELD = 'customer_id'
+    TABLE = 'customers'
+    RECORD = CustomerRecord
+    FIELDS = CustomerRecord.FIELDS
 
     def _get_filepath(self):
         return self.DATA_FILE
 
+    @instrumented('create')
     def create(self, **kwargs):
         """Crea un nuevo cliente."""
+        return self._insert(kwargs)
+
+    def _insert(self, kwargs):
+        """Valida los campos y guarda el cliente si su id es nuevo."""
         customer_id = kwargs.get('customer_id')
         name = kwargs.get('name')
         email = kwargs.get('email')
@@ -21,55 +33,56 @@ class Customer(EntityManager, PersistenceManager):
                 "Campos requeridos: customer_id, name, email"
             )
 
-        customers = self.load_data()
-        for c in customers:
-            if c['customer_id'] == customer_id:
-                raise ValueError(f"Cliente con id {customer_id} ya existe")
-
         customer = {
             'customer_id': customer_id,
             'name': name,
             'email': email
         }
-        customers.append(customer)
-        self.save_data(customers)
-        return customer
-
-    def delete(self, entity_id):
-        """Elimina un cliente por su id."""
-        customers = self.load_data()
-        original_len = len(customers)
-        customers = [c for c in customers if c['customer_id'] != entity_id]
-
-        if len(customers) == original_len:
-            raise ValueError(f"Cliente con id {entity_id} no encontrado")
-
-        self.save_data(customers)
+        try:
+            return self._create(customer)
+        except ConflictError as exc:
+            raise ValueError(
+                f"Cliente con id {customer_id} ya existe"
+            ) from exc
+
+    @instrumented('delete')
+    def delete(self, entity_id, cascade=False):
+        """Elimina un cliente por su id.
+
+        Si tiene reservaciones se rechaza, salvo con ``cascade``, que
+        las cancela en la misma transaccion.
+        """
+        with self._delete_scope():
+            self._delete(entity_id, cascade)
         return True
 
-    def display(self, entity_id=None):
-        """Muestra informacion de clientes."""
-        customers = self.load_data()
+    def _dependents(self):
+        """Las reservaciones referencian al cliente por ``customer_id``."""
+        # pylint: disable-next=import-outside-toplevel,cyclic-import
+        from reservation import Reservation
+        return ((Reservation(), 'customer_id'),)
+
+    def _get(self, entity_id):
+        """Retorna una copia del cliente o lanza NotFoundError."""
+        customer = self._lookup(entity_id)
+        if customer is None:
+            raise NotFoundError(f"Cliente con id {entity_id} no encontrado")
+        return customer
 
+    @instrumented('display')
+    def display(self, entity_id=None):
+        """Muestra un cliente o todos; ver ``page`` y ``scan`` para paginar."""
         if entity_id is not None:
-            for c in customers:
-                if c['customer_id'] == entity_id:
-                    return c
-            raise ValueError(f"Cliente con id {entity_id} no encontrado")
-
-        return customers
+            return self._get(entity_id)
+        return self.load_data()
 
+    @instrumented('modify')
     def modify(self, entity_id, **kwargs):
         """Modifica un cliente existente."""
-        customers = self.load_data()
-
-        for i, c in enumerate(customers):
-            if c['customer_id'] == entity_id:
-                if 'name' in kwargs:
-                    customers[i]['name'] = kwargs['name']
-                if 'email' in kwargs:
-                    customers[i]['email'] = kwargs['email']
-                self.save_data(customers)
-                return customers[i]
+        def apply(customer):
+            if 'name' in kwargs:
+                customer['name'] = kwargs['name']
+            if 'email' in kwargs:
+                customer['email'] = kwargs['email']
 
-        raise ValueError(f"Cliente con id {entity_id} no encontrado")
+        return self._update(entity_id, apply)
@@ -0,0 +1,49 @@
+"""Archivos de datos de los managers en un directorio propio.
+
+Lo usan el benchmark y las pruebas para no tocar ``data/``: todos los
+artefactos de cada almacenamiento (bitacoras, base SQLite con su WAL,
+indices, directorios de shards) quedan dentro del directorio.
+"""
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from base_classes import PersistenceManager
+from customer import Customer
+from hotel import Hotel
+from reservation import Reservation
+
+
+@contextmanager
+def data_dir(directory, storage=None):
+    """Dirige los managers a archivos dentro de directory."""
+    saved = {}
+    targets = [(Hotel, 'DATA_FILE', 'hotels.json'),
+               (Customer, 'DATA_FILE', 'customers.json'),
+               (Reservation, 'DATA_FILE', 'reservations.json'),
+               (PersistenceManager, 'DB_FILE', 'reservation_system.db')]
+    if PersistenceManager.FEED_FILE:
+        targets.append((PersistenceManager, 'FEED_FILE', 'changes.jsonl'))
+    if storage is not None:
+        targets.append((PersistenceManager, 'STORAGE', None))
+    for manager, attribute, name in targets:
+        saved[manager, attribute] = manager.__dict__[attribute]
+        value = os.path.join(directory, name) if name else storage
+        setattr(manager, attribute, value)
+    try:
+        yield directory
+    finally:
+        for (manager, attribute), value in saved.items():
+            setattr(manager, attribute, value)
+
+
+def temp_data_dir(test, storage=None):
+    """Dirige los managers a un directorio temporal durante un test.
+
+    ``test`` es un ``unittest.TestCase``; al terminar se restauran las
+    rutas y se borra el directorio. Retorna la ruta del directorio.
+    """
+    directory = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+    return test.enterContext(data_dir(directory, storage))
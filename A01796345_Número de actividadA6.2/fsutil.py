@@ -0,0 +1,84 @@
+"""Utilidades de archivos compartidas por los almacenes."""
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+def file_signature(filepath):
+    """Retorna (inodo, mtime, tamano) del archivo o None si no existe."""
+    try:
+        stat = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def fsync_directory(filepath):
+    """Sincroniza el directorio que contiene filepath (solo POSIX)."""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(os.path.dirname(filepath) or '.', os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _temp_file(filepath):
+    """Crea un temporal en el directorio de filepath; retorna (fd, ruta)."""
+    directory = os.path.dirname(filepath) or '.'
+    os.makedirs(directory, exist_ok=True)
+    return tempfile.mkstemp(
+        dir=directory, prefix=f'.{os.path.basename(filepath)}.',
+        suffix='.tmp'
+    )
+
+
+def stage_file(filepath, data):
+    """Escribe data en un temporal durable junto a filepath.
+
+    Retorna la ruta del temporal; se publica despues con ``os.replace``
+    sobre filepath y ``fsync_directory``, o se borra si se descarta.
+    """
+    fd, tmp_path = _temp_file(filepath)
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path
+
+
+@contextmanager
+def atomic_file(filepath, mode='wb', durable=True):
+    """Abre un temporal que al cerrar el bloque reemplaza a filepath.
+
+    El temporal se crea en el mismo directorio y se renombra sobre el
+    destino con ``os.replace``, asi que nunca queda un archivo a medias;
+    si el bloque falla se descarta. Con ``durable`` se sincronizan el
+    temporal y el directorio para que el reemplazo sobreviva a una
+    caida del sistema.
+    """
+    fd, tmp_path = _temp_file(filepath)
+    encoding = None if 'b' in mode else 'utf-8'
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as file:
+            yield file
+            if durable:
+                file.flush()
+                os.fsync(file.fileno())
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    if durable:
+        fsync_directory(filepath)
+
+
+def atomic_write_bytes(filepath, data, durable=True):
+    """Reemplaza filepath por data de forma atomica."""
+    with atomic_file(filepath, 'wb', durable) as file:
+        file.write(data)
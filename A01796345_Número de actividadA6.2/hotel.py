@@ -1,17 +1,30 @@
 """Modulo de la clase Hotel."""
-from base_classes import EntityManager, PersistenceManager
+from base_classes import EntityManager, NotFoundError, PersistenceManager
+from locking import ConflictError
+from metrics import instrumented
+from records import HotelRecord
 
 
 class Hotel(EntityManager, PersistenceManager):
     """Gestiona hoteles con persistencia en JSON."""
 
     DATA_FILE = 'data/hotels.json'
+    ID_FIELD = 'hotel_id'
+    TABLE = 'hotels'
+    RECORD = HotelRecord
+    FIELDS = HotelRecord.FIELDS
+    SHARD_FIELD = 'hotel_id'
 
     def _get_filepath(self):
         return self.DATA_FILE
 
+    @instrumented('create')
     def create(self, **kwargs):
         """Crea un nuevo hotel."""
+        return self._insert(kwargs)
+
+    def _insert(self, kwargs):
+        """Valida los campos y guarda el hotel si su id es nuevo."""
         hotel_id = kwargs.get('hotel_id')
         name = kwargs.get('name')
         location = kwargs.get('location')
@@ -25,95 +38,120 @@ class Hotel(EntityManager, PersistenceManager):
         if not isinstance(rooms, int) or rooms <= 0:
             raise ValueError("rooms debe ser un entero positivo")
 
-        hotels = self.load_data()
-        for h in hotels:
-            if h['hotel_id'] == hotel_id:
-                raise ValueError(f"Hotel con id {hotel_id} ya existe")
-
         hotel = {
             'hotel_id': hotel_id,
             'name': name,
             'location': location,
             'rooms': rooms,
-            'reserved_rooms': 0
+            'reserved_rooms': 0,
+            'cancellations': 0
         }
-        hotels.append(hotel)
-        self.save_data(hotels)
-        return hotel
+        try:
+            return self._create(hotel)
+        except ConflictError as exc:
+            raise ValueError(f"Hotel con id {hotel_id} ya existe") from exc
+
+    @instrumented('delete')
+    def delete(self, entity_id, cascade=False):
+        """Elimina un hotel por su id.
+
+        Si tiene reservaciones se rechaza, salvo con ``cascade``, que
+        las cancela en la misma transaccion.
+        """
+        with self._delete_scope(entity_id):
+            self._delete(entity_id, cascade)
+        return True
 
-    def delete(self, entity_id):
-        """Elimina un hotel por su id."""
-        hotels = self.load_data()
-        original_len = len(hotels)
-        hotels = [h for h in hotels if h['hotel_id'] != entity_id]
+    def _dependents(self):
+        """Las reservaciones referencian al hotel por ``hotel_id``."""
+        return ((_reservations(), 'hotel_id'),)
+
+    @staticmethod
+    def _occupancy(hotel):
+        """Habitaciones ocupadas en la noche mas llena desde hoy.
+
+        ``reserved_rooms`` cuenta todas las reservaciones activas sin
+        importar sus fechas, asi que no es la ocupacion; ver
+        ``Reservation.busiest_night``.
+        """
+        return _reservations().busiest_night(hotel['hotel_id'], hotel)
+
+    def _get(self, entity_id):
+        """Retorna una copia del hotel o lanza NotFoundError."""
+        hotel = self._lookup(entity_id)
+        if hotel is None:
+            raise NotFoundError(f"Hotel con id {entity_id} no encontrado")
+        return hotel
 
-        if len(hotels) == original_len:
-            raise ValueError(f"Hotel con id {entity_id} no encontrado")
+    @instrumented('ids_by_location')
+    def ids_by_location(self, location, after=None, limit=None):
+        """Retorna los ids de hoteles en la ubicacion, ordenados.
 
-        self.save_data(hotels)
-        return True
+        Usa un indice secundario sobre ``location``; ``after`` es el
+        ultimo id de la pagina anterior.
+        """
+        return self._field_ids('location', location, after, limit)
 
+    @instrumented('display')
     def display(self, entity_id=None):
-        """Muestra informacion de hoteles."""
-        hotels = self.load_data()
-
+        """Muestra un hotel o todos; ver ``page`` y ``scan`` para paginar."""
         if entity_id is not None:
-            for h in hotels:
-                if h['hotel_id'] == entity_id:
-                    return h
-            raise ValueError(f"Hotel con id {entity_id} no encontrado")
-
-        return hotels
+            return self._get(entity_id)
+        return self.load_data()
 
+    @instrumented('modify')
     def modify(self, entity_id, **kwargs):
         """Modifica un hotel existente."""
-        hotels = self.load_data()
-
-        for i, h in enumerate(hotels):
-            if h['hotel_id'] == entity_id:
-                if 'name' in kwargs:
-                    hotels[i]['name'] = kwargs['name']
-                if 'location' in kwargs:
-                    hotels[i]['location'] = kwargs['location']
-                if 'rooms' in kwargs:
-                    new_rooms = kwargs['rooms']
-                    if not isinstance(new_rooms, int) or new_rooms <= 0:
-                        raise ValueError("rooms debe ser un entero positivo")
-                    if new_rooms < hotels[i]['reserved_rooms']:
-                        raise ValueError(
-                            "No se puede reducir rooms "
-                            "por debajo de las reservadas"
-                        )
-                    hotels[i]['rooms'] = new_rooms
-                self.save_data(hotels)
-                return hotels[i]
-
-        raise ValueError(f"Hotel con id {entity_id} no encontrado")
-
-    def reserve_room(self, hotel_id):
-        """Reserva una habitacion en el hotel."""
-        hotels = self.load_data()
-
-        for i, h in enumerate(hotels):
-            if h['hotel_id'] == hotel_id:
-                if h['reserved_rooms'] >= h['rooms']:
-                    raise ValueError("No hay habitaciones disponibles")
-                hotels[i]['reserved_rooms'] = h['reserved_rooms'] + 1
-                self.save_data(hotels)
-                return hotels[i]
-
-        raise ValueError(f"Hotel con id {hotel_id} no encontrado")
-
+        if 'rooms' in kwargs:
+            new_rooms = kwargs['rooms']
+            if not isinstance(new_rooms, int) or new_rooms <= 0:
+                raise ValueError("rooms debe ser un entero positivo")
+
+        def apply(hotel):
+            if 'name' in kwargs:
+                hotel['name'] = kwargs['name']
+            if 'location' in kwargs:
+                hotel['location'] = kwargs['location']
+            if 'rooms' in kwargs:
+                if kwargs['rooms'] < self._occupancy(hotel):
+                    raise ValueError(
+                        "No se puede reducir rooms "
+                        "por debajo de las reservadas"
+                    )
+                hotel['rooms'] = kwargs['rooms']
+
+        return self._update(entity_id, apply)
+
+    @instrumented('reserve_room')
+    def reserve_room(self, hotel_id, check_capacity=True):
+        """Reserva una habitacion en el hotel.
+
+        La reserva no tiene fechas, asi que ocupa todas las noches: se
+        rechaza si la noche mas llena ya no tiene lugar. Con
+        ``check_capacity`` en False solo se cuenta la reservacion
+        activa; lo usa Reservation, que valida la capacidad por noche.
+        """
+        def reserve(hotel):
+            if check_capacity and self._occupancy(hotel) >= hotel['rooms']:
+                raise ValueError("No hay habitaciones disponibles")
+            hotel['reserved_rooms'] += 1
+
+        return self._update(hotel_id, reserve, 'reserve')
+
+    @instrumented('cancel_reservation')
     def cancel_reservation(self, hotel_id):
-        """Cancela una reservacion en el hotel."""
-        hotels = self.load_data()
-
-        for i, h in enumerate(hotels):
-            if h['hotel_id'] == hotel_id:
-                if h['reserved_rooms'] <= 0:
-                    raise ValueError("No hay reservaciones que cancelar")
-                hotels[i]['reserved_rooms'] = h['reserved_rooms'] - 1
-                self.save_data(hotels)
-                return hotels[i]
-
-        raise ValueError(f"Hotel con id {hotel_id} no encontrado")
+        """Cancela una reservacion en el hotel y la cuenta."""
+        def release(hotel):
+            if hotel['reserved_rooms'] <= 0:
+                raise ValueError("No hay reservaciones que cancelar")
+            hotel['reserved_rooms'] -= 1
+            hotel['cancellations'] = (hotel.get('cancellations') or 0) + 1
+
+        return self._update(hotel_id, release, 'cancel')
+
+
+def _reservations():
+    """Manager de reservaciones, importado tarde por la dependencia ciclica."""
+    # pylint: disable-next=import-outside-toplevel,cyclic-import
+    from reservation import Reservation
+    return Reservation()
@@ -0,0 +1,114 @@
+"""Indice de llaves de idempotencia para reintentos de clientes."""
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class IdempotencyIndex:
+    """Resultados recientes por llave de idempotencia, acotados y con TTL.
+
+    ``run(key, request, func)`` ejecuta func solo la primera vez; los
+    reintentos con la misma llave reciben una copia del resultado
+    original en O(1), sin tocar los almacenes. Si la llave ya se uso con
+    otra ``request`` se lanza ValueError. Un reintento que llega
+    mientras el original sigue en curso espera a que termine.
+
+    Las entradas expiran a los ``ttl`` segundos y se conservan como
+    maximo ``max_entries``; se descartan primero las mas antiguas.
+    Solo se recuerdan resultados exitosos. Dentro de ``unit()`` el
+    resultado se recuerda al terminar el bloque sin errores, asi que
+    una transaccion revertida no deja una llave que apunte a nada.
+    """
+
+    TTL = 24 * 60 * 60
+    MAX_ENTRIES = 100000
+
+    def __init__(self, ttl=None, max_entries=None, clock=time.monotonic):
+        self.ttl = ttl or self.TTL
+        self.max_entries = max_entries or self.MAX_ENTRIES
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._running = {}
+        self._local = threading.local()
+
+    def __len__(self):
+        with self._lock:
+            self._expire()
+            return len(self._entries)
+
+    @contextmanager
+    def unit(self):
+        """Recuerda los resultados del bloque solo si termina sin errores."""
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0:
+            self._local.pending = {}
+        self._local.depth = depth + 1
+        committed = False
+        try:
+            yield self
+            committed = True
+        finally:
+            self._local.depth = depth
+            if depth == 0:
+                self._finish(self._local.pending, remember=committed)
+
+    def run(self, key, request, func):
+        """Retorna el resultado de ``func()`` recordado bajo key."""
+        pending = getattr(self._local, 'pending', {})
+        if getattr(self._local, 'depth', 0) and key in pending:
+            return self._replay(key, request, pending[key])
+        while True:
+            with self._lock:
+                self._expire()
+                entry = self._entries.get(key)
+                if entry is not None:
+                    return self._replay(key, request, entry[1:])
+                running = self._running.get(key)
+                if running is None:
+                    self._running[key] = threading.Event()
+                    break
+            running.wait()
+        try:
+            result = func()
+        except BaseException:
+            self._finish({key: None}, remember=False)
+            raise
+        saved = (request, dict(result))
+        if getattr(self._local, 'depth', 0):
+            self._local.pending[key] = saved
+        else:
+            self._finish({key: saved}, remember=True)
+        return result
+
+    @staticmethod
+    def _replay(key, request, entry):
+        """Copia del resultado guardado si la peticion es la misma."""
+        original, result = entry
+        if original != request:
+            raise ValueError(
+                f"La llave de idempotencia {key} ya se uso con otros datos"
+            )
+        return dict(result)
+
+    def _finish(self, entries, remember):
+        """Guarda (si remember) y libera las llaves en curso."""
+        with self._lock:
+            expires = self._clock() + self.ttl
+            for key, entry in entries.items():
+                if remember:
+                    self._entries[key] = (expires, *entry)
+                    self._entries.move_to_end(key)
+                self._running.pop(key).set()
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _expire(self):
+        """Descarta las entradas vencidas, que estan al inicio."""
+        now = self._clock()
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry[0] > now:
+                break
+            del self._entries[key]
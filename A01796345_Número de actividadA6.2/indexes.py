@@ -0,0 +1,130 @@
+"""Indices secundarios mantenidos por los almacenes."""
+from bisect import bisect_left, bisect_right, insort
+
+
+class IndexSet:
+    """Indices secundarios registrados en un almacen.
+
+    Un indice implementa ``rebuild(registros)`` y ``update(anterior,
+    nuevo)``; en ``update`` cualquiera de los dos puede ser None para
+    una insercion o una eliminacion. Los registros recibidos son del
+    almacen y no deben modificarse.
+    """
+
+    def __init__(self):
+        self._indexes = {}
+
+    def __bool__(self):
+        return bool(self._indexes)
+
+    def get(self, name, factory, load_records):
+        """Retorna el indice; si no existe lo crea y lo construye."""
+        index = self._indexes.get(name)
+        if index is None:
+            index = factory()
+            index.rebuild(load_records())
+            self._indexes[name] = index
+        return index
+
+    def rebuild(self, records):
+        """Reconstruye todos los indices desde los registros."""
+        records = list(records)
+        for index in self._indexes.values():
+            index.rebuild(records)
+
+    def update(self, old, new):
+        """Propaga un cambio de registro a todos los indices."""
+        for index in self._indexes.values():
+            index.update(old, new)
+
+
+class FieldIndex:
+    """Indice de un campo hacia los ids de los registros, ordenados.
+
+    Permite listar los registros con un valor sin recorrer el almacen y
+    paginar con el ultimo id visto como cursor.
+    """
+
+    def __init__(self, field, key):
+        self.field = field
+        self.key = key
+        self._ids = {}
+
+    def rebuild(self, records):
+        """Reconstruye el indice desde todos los registros."""
+        groups = {}
+        for record in records:
+            groups.setdefault(record.get(self.field), []).append(
+                record[self.key]
+            )
+        self._ids = {value: sorted(ids) for value, ids in groups.items()}
+
+    def update(self, old, new):
+        """Mueve el id del registro si cambio el valor del campo."""
+        if (old is not None and new is not None
+                and old.get(self.field) == new.get(self.field)):
+            return
+        if old is not None:
+            ids = self._ids[old.get(self.field)]
+            del ids[bisect_left(ids, old[self.key])]
+            if not ids:
+                del self._ids[old.get(self.field)]
+        if new is not None:
+            insort(self._ids.setdefault(new.get(self.field), []),
+                   new[self.key])
+
+    def ids(self, value, after=None, limit=None):
+        """Retorna los ids con ese valor, posteriores a ``after``."""
+        ids = self._ids.get(value, [])
+        start = bisect_right(ids, after) if after is not None else 0
+        end = start + limit if limit is not None else len(ids)
+        return ids[start:end]
+
+    def count(self, value):
+        """Retorna cuantos registros tienen ese valor."""
+        return len(self._ids.get(value, ()))
+
+
+class SortedIndex:
+    """Registros ordenados por un campo y luego por id.
+
+    Cada registro es una entrada ``((no_nulo, valor), id)``, o ``(id,)``
+    si ``field`` es None; los valores None quedan al principio. La
+    ultima entrada vista sirve de cursor para pedir la siguiente pagina.
+    """
+
+    def __init__(self, field, key):
+        self.field = field
+        self.key = key
+        self._entries = []
+
+    def entry(self, record):
+        """Retorna la entrada ordenable del registro."""
+        if self.field is None:
+            return (record[self.key],)
+        value = record.get(self.field)
+        return ((value is not None, value), record[self.key])
+
+    def rebuild(self, records):
+        """Reconstruye el indice desde todos los registros."""
+        self._entries = sorted(map(self.entry, records))
+
+    def update(self, old, new):
+        """Reubica la entrada del registro si cambio su posicion."""
+        old_entry = self.entry(old) if old is not None else None
+        new_entry = self.entry(new) if new is not None else None
+        if old_entry == new_entry:
+            return
+        if old_entry is not None:
+            del self._entries[bisect_left(self._entries, old_entry)]
+        if new_entry is not None:
+            insort(self._entries, new_entry)
+
+    def after(self, entry=None, limit=None):
+        """Retorna hasta ``limit`` entradas posteriores a ``entry``."""
+        start = bisect_right(self._entries, entry) if entry else 0
+        end = start + limit if limit is not None else len(self._entries)
+        return self._entries[start:end]
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,135 @@
+"""Inventario de habitaciones por noche para las reservaciones."""
+from datetime import date
+
+
+def parse_stay(check_in, check_out):
+    """Convierte fechas ISO a ordinales (entrada, salida).
+
+    La estancia ocupa las noches desde la entrada hasta el dia previo a
+    la salida. Lanza ValueError si el formato es invalido o la salida no
+    es posterior a la entrada.
+    """
+    try:
+        start = date.fromisoformat(check_in).toordinal()
+        end = date.fromisoformat(check_out).toordinal()
+    except (TypeError, ValueError) as exc:
+        raise ValueError(
+            "check_in y check_out deben tener formato AAAA-MM-DD"
+        ) from exc
+    if end <= start:
+        raise ValueError("check_out debe ser posterior a check_in")
+    return start, end
+
+
+def reservation_stay(reservation):
+    """Retorna (entrada, salida) de una reservacion o None si es invalida."""
+    try:
+        return parse_stay(reservation['check_in'], reservation['check_out'])
+    except ValueError:
+        return None
+
+
+class OccupancyCalendar:
+    """Indice de habitaciones ocupadas por hotel y por noche.
+
+    Mantiene un contador por noche (ordinal de la fecha) para cada
+    hotel, de modo que verificar o consultar una estancia cuesta
+    O(noches) sin recorrer las reservaciones.
+    """
+
+    def __init__(self):
+        self._nights = {}
+
+    def rebuild(self, reservations):
+        """Reconstruye los contadores desde todas las reservaciones."""
+        self._nights = {}
+        for reservation in reservations:
+            self._add(reservation, 1)
+
+    def update(self, old, new):
+        """Aplica la insercion, cambio o eliminacion de una reservacion."""
+        if old is not None:
+            self._add(old, -1)
+        if new is not None:
+            self._add(new, 1)
+
+    def _add(self, reservation, delta):
+        stay = reservation_stay(reservation)
+        if stay is None:
+            return
+        start, end = stay
+        nights = self._nights.setdefault(reservation['hotel_id'], {})
+        for night in range(start, end):
+            count = nights.get(night, 0) + delta
+            if count:
+                nights[night] = count
+            else:
+                del nights[night]
+
+    def booked(self, hotel_id, check_in, check_out):
+        """Retorna las habitaciones ocupadas por noche de la estancia."""
+        start, end = parse_stay(check_in, check_out)
+        nights = self._nights.get(hotel_id, {})
+        return {
+            date.fromordinal(night).isoformat(): nights.get(night, 0)
+            for night in range(start, end)
+        }
+
+    def peak(self, hotel_id, check_in, check_out):
+        """Retorna la mayor ocupacion de una noche en la estancia."""
+        start, end = parse_stay(check_in, check_out)
+        nights = self._nights.get(hotel_id, {})
+        return max(nights.get(night, 0) for night in range(start, end))
+
+    def busiest(self, hotel_id, since=None):
+        """Retorna la mayor ocupacion de una noche del hotel desde since.
+
+        ``since`` es una fecha ISO, por omision hoy; las noches pasadas
+        ya no limitan la capacidad.
+        """
+        start = (date.fromisoformat(since) if since
+                 else date.today()).toordinal()
+        return max((count for night, count
+                    in self._nights.get(hotel_id, {}).items()
+                    if night >= start), default=0)
+
+
+class StayStats:
+    """Agregados por hotel: reservaciones activas y noches reservadas.
+
+    Es un indice del almacen de reservaciones: se construye en una sola
+    pasada y luego se actualiza con cada alta y cancelacion.
+    """
+
+    def __init__(self):
+        self._totals = {}
+
+    def rebuild(self, reservations):
+        """Reconstruye los agregados desde todas las reservaciones."""
+        self._totals = {}
+        for reservation in reservations:
+            self._add(reservation, 1)
+
+    def update(self, old, new):
+        """Aplica la insercion, cambio o eliminacion de una reservacion."""
+        if old is not None:
+            self._add(old, -1)
+        if new is not None:
+            self._add(new, 1)
+
+    def _add(self, reservation, sign):
+        stay = reservation_stay(reservation)
+        if stay is None:
+            return
+        totals = self._totals.setdefault(reservation['hotel_id'], [0, 0])
+        totals[0] += sign
+        totals[1] += sign * (stay[1] - stay[0])
+        if not totals[0]:
+            del self._totals[reservation['hotel_id']]
+
+    def totals(self, hotel_id=None):
+        """Retorna (reservaciones, noches) de un hotel o de todos."""
+        if hotel_id is not None:
+            return tuple(self._totals.get(hotel_id, (0, 0)))
+        return (sum(t[0] for t in self._totals.values()),
+                sum(t[1] for t in self._totals.values()))
@@ -0,0 +1,359 @@
+"""Almacen JSONL con lectura perezosa por mmap para archivos grandes."""
+import json
+import mmap
+import os
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+from fsutil import atomic_file, file_signature
+from indexes import IndexSet
+from locking import VERSION_FIELD, FileLock, check_version
+from metrics import IOStats
+from savepoints import Savepoints
+
+
+class LazyStore:  # pylint: disable=too-many-instance-attributes
+    """Registros en un archivo JSONL que se decodifican bajo demanda.
+
+    ``<ruta>l`` es una bitacora de entradas ``put``/``del``; en memoria
+    solo se guarda, por id, el offset y la longitud de su ultima entrada
+    ``put``. ``get`` decodifica solo esa linea a traves de ``mmap``, asi
+    que una consulta puntual cuesta O(registro) y no O(archivo).
+
+    El indice de offsets se guarda cada ``INDEX_EVERY`` entradas en
+    ``<ruta>l.idx``; al arrancar se carga y solo se recorre la cola
+    escrita despues. Cuando las entradas muertas superan a las vivas el
+    archivo se compacta. Las opciones de los almacenes JSON
+    (``group_commit``, ``record_type``, ``snapshot``) no aplican.
+    """
+
+    INDEX_EVERY = 1000
+    COMPACT_MIN = 1000
+
+    def __init__(self, filepath, key, **_options):
+        self.filepath = filepath
+        self.key = key
+        self.data_path = filepath + 'l'
+        self.index_path = self.data_path + '.idx'
+        self._offsets = {}
+        self.io = IOStats()
+        self._inode = None
+        self._size = 0
+        self._entries = 0
+        self._saved_entries = 0
+        self._view = None
+        self._dirty = False
+        self._depth = 0
+        self._undo = None
+        self._savepoints = Savepoints()
+        self._indexes = IndexSet()
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(filepath, self._lock)
+
+    # Indice de offsets
+
+    def refresh(self):
+        """Indexa lo que otro proceso haya escrito en el archivo.
+
+        Mientras este proceso tiene el candado nadie mas puede escribir,
+        asi que no se consulta el disco.
+        """
+        with self._lock:
+            if not self._file_lock.held:
+                self._reload()
+
+    def _reload(self):
+        signature = file_signature(self.data_path)
+        inode, size = (signature[0], signature[2]) if signature else (None, 0)
+        if inode == self._inode and size == self._size:
+            return
+        if inode != self._inode or size < self._size:
+            self._load_offsets(inode)
+        else:
+            self._scan(self._size)
+        self.rebuild_indexes()
+
+    def rebuild_indexes(self):
+        """Reconstruye los indices secundarios (decodifica todo)."""
+        if self._indexes:
+            self._indexes.rebuild(self.all())
+
+    def _load_offsets(self, inode):
+        """Carga el indice guardado si es de este archivo y sigue la cola."""
+        self._close_view()
+        self._offsets, self._size, self._entries = {}, 0, 0
+        self._inode = inode
+        if inode is None:
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as file:
+                saved = json.load(file)
+            if (saved['inode'] == inode
+                    and saved['check'] == self._checksum(saved['size'])):
+                self._offsets = {k: tuple(v)
+                                 for k, v in saved['offsets'].items()}
+                self._size = saved['size']
+                self._entries = saved['entries']
+        except (OSError, ValueError, KeyError):
+            pass
+        self._saved_entries = self._entries
+        self._scan(self._size)
+
+    def _scan(self, offset):
+        """Indexa las entradas completas a partir de offset."""
+        start, first = time.perf_counter(), offset
+        try:
+            with open(self.data_path, 'rb') as file:
+                file.seek(offset)
+                for line in file:
+                    if not line.endswith(b'\n'):
+                        break
+                    self._index_entry(json.loads(line), offset, len(line))
+                    offset += len(line)
+        except FileNotFoundError:
+            offset = 0
+        self._size = offset
+        if offset > first:
+            self.io.add_load(offset - first, time.perf_counter() - start)
+
+    def _index_entry(self, entry, offset, length):
+        if entry['op'] == 'put':
+            self._offsets[entry['record'][self.key]] = (offset, length)
+        else:
+            self._offsets.pop(entry['id'], None)
+        self._entries += 1
+
+    def _save_offsets(self):
+        """Guarda el indice de offsets para el siguiente arranque."""
+        with atomic_file(self.index_path, 'w', durable=False) as file:
+            json.dump({'inode': self._inode, 'size': self._size,
+                       'check': self._checksum(self._size),
+                       'entries': self._entries, 'offsets': self._offsets},
+                      file)
+        self._saved_entries = self._entries
+
+    def _checksum(self, size):
+        """CRC32 de los ultimos bytes antes de size, para validar el indice.
+
+        Distingue un archivo nuevo que reutilizo el inodo de uno borrado.
+        """
+        with open(self.data_path, 'rb') as file:
+            start = max(0, size - 4096)
+            file.seek(start)
+            return zlib.crc32(file.read(size - start))
+
+    # Lectura
+
+    def _close_view(self):
+        if self._view is not None:
+            self._view.close()
+            self._view = None
+
+    def _decode(self, location):
+        """Decodifica el registro de la entrada en (offset, longitud)."""
+        offset, length = location
+        if self._view is None or len(self._view) < offset + length:
+            self._close_view()
+            with open(self.data_path, 'rb') as file:
+                self._view = mmap.mmap(file.fileno(), 0,
+                                       access=mmap.ACCESS_READ)
+        self.io.read_bytes += length
+        return json.loads(self._view[offset:offset + length])['record']
+
+    def index(self, name, factory):
+        """Retorna el indice secundario registrado con ese nombre."""
+        with self._lock:
+            self.refresh()
+            return self._indexes.get(name, factory, self.all)
+
+    def __contains__(self, entity_id):
+        with self._lock:
+            self.refresh()
+            return entity_id in self._offsets
+
+    def __len__(self):
+        with self._lock:
+            self.refresh()
+            return len(self._offsets)
+
+    def get(self, entity_id):
+        """Retorna el registro o None si no existe."""
+        with self._lock:
+            self.refresh()
+            location = self._offsets.get(entity_id)
+            return self._decode(location) if location else None
+
+    def all(self):
+        """Retorna todos los registros en orden de insercion."""
+        with self._lock:
+            self.refresh()
+            return [self._decode(loc) for loc in self._offsets.values()]
+
+    # Escritura
+
+    @contextmanager
+    def locked(self):
+        """Bloquea el archivo entre procesos e indexa lo nuevo."""
+        if self._file_lock.acquire():
+            try:
+                self._reload()
+            except BaseException:
+                self._file_lock.release()
+                raise
+        try:
+            yield self
+        finally:
+            self._file_lock.release()
+
+    @contextmanager
+    def batch(self):
+        """Agrupa las mutaciones del bloque en un solo fsync."""
+        with self.locked():
+            self._depth += 1
+            try:
+                yield self
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.flush()
+
+    @contextmanager
+    def begin(self):
+        """Participa en una transaccion de varios almacenes.
+
+        Si la transaccion falla el archivo se trunca al tamano previo y
+        se restauran los offsets de los registros tocados.
+        """
+        with self.locked():
+            outermost = self._undo is None
+            if outermost:
+                self._undo = ({}, self._size, self._entries)
+            self._depth += 1
+            completed = False
+            try:
+                yield self
+                completed = True
+            finally:
+                self._depth -= 1
+                if outermost:
+                    if not completed:
+                        self._rollback(self._undo)
+                    self._undo = None
+
+    @contextmanager
+    def savepoint(self):
+        """Revierte solo las entradas anexadas en el bloque si este falla."""
+        with self.batch(), self._savepoints.open(
+                self._rollback, self._size, self._entries):
+            yield self
+
+    def _rollback(self, mark):
+        """Trunca el archivo a la marca y restaura sus offsets."""
+        previous, size, entries = mark
+        if self._size != size:
+            with open(self.data_path, 'ab') as file:
+                file.truncate(size)
+            self._close_view()
+        for entity_id, location in previous.items():
+            if location is None:
+                self._offsets.pop(entity_id, None)
+            else:
+                self._offsets[entity_id] = location
+        self._size, self._entries = size, entries
+        self.rebuild_indexes()
+
+    def _append(self, entry):
+        """Anexa una entrada; se sincroniza al salir del lote."""
+        start = time.perf_counter()
+        line = (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+        os.makedirs(os.path.dirname(self.data_path) or '.', exist_ok=True)
+        with open(self.data_path, 'ab') as file:
+            if file.tell() > self._size:
+                file.truncate(self._size)
+            file.write(line)
+        self.io.add_save(len(line), time.perf_counter() - start)
+        if self._inode is None:
+            self._inode = file_signature(self.data_path)[0]
+        self._index_entry(entry, self._size, len(line))
+        self._size += len(line)
+        self._dirty = True
+        if self._depth == 0:
+            self.flush()
+
+    def flush(self):
+        """Sincroniza lo anexado y guarda o compacta si corresponde."""
+        with self._file_lock:
+            if self._dirty:
+                with open(self.data_path, 'ab') as file:
+                    os.fsync(file.fileno())
+                self._dirty = False
+            if self._undo is not None or self._depth:
+                return
+            if (self._entries >= self.COMPACT_MIN
+                    and self._entries > 2 * len(self._offsets)):
+                self.compact()
+            elif self._entries - self._saved_entries >= self.INDEX_EVERY:
+                self._save_offsets()
+
+    def _remember(self, entity_id):
+        location = self._offsets.get(entity_id)
+        if self._undo is not None:
+            self._undo[0].setdefault(entity_id, location)
+        self._savepoints.remember(entity_id, location)
+
+    def put(self, record, expected_version=None):
+        """Inserta o reemplaza un registro y retorna lo guardado."""
+        with self.locked():
+            entity_id = record[self.key]
+            current = self.get(entity_id)
+            version = (current.get(VERSION_FIELD) or 0) if current else 0
+            check_version(entity_id, version, expected_version)
+            self._remember(entity_id)
+            record = dict(record)
+            record[VERSION_FIELD] = version + 1
+            self._append({'op': 'put', 'record': record})
+            self._indexes.update(current, record)
+            return dict(record)
+
+    def remove(self, entity_id):
+        """Elimina un registro; retorna False si no existia."""
+        with self.locked():
+            current = self.get(entity_id)
+            if current is None:
+                return False
+            self._remember(entity_id)
+            self._append({'op': 'del', 'id': entity_id})
+            self._indexes.update(current, None)
+            return True
+
+    def replace(self, records):
+        """Reemplaza todos los registros por los recibidos."""
+        with self.locked():
+            self._rewrite([dict(r) for r in records])
+            self.rebuild_indexes()
+
+    def compact(self):
+        """Reescribe el archivo solo con las entradas vivas."""
+        with self.locked():
+            self._rewrite(self.all())
+
+    def _rewrite(self, records):
+        """Reemplaza el archivo por una entrada put por registro."""
+        offsets, size = {}, 0
+        start = time.perf_counter()
+        with atomic_file(self.data_path) as file:
+            for record in records:
+                line = json.dumps({'op': 'put', 'record': record},
+                                  ensure_ascii=False) + '\n'
+                data = line.encode('utf-8')
+                file.write(data)
+                offsets[record[self.key]] = (size, len(data))
+                size += len(data)
+        self.io.add_save(size, time.perf_counter() - start)
+        self._close_view()
+        self._offsets, self._size, self._entries = offsets, size, len(offsets)
+        self._inode = file_signature(self.data_path)[0]
+        self._dirty = False
+        self._save_offsets()
@@ -0,0 +1,91 @@
+"""Bloqueo entre procesos y control optimista de versiones."""
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # pylint: disable=invalid-name
+
+VERSION_FIELD = 'version'
+
+
+class ConflictError(ValueError):
+    """El registro cambio desde que se leyo."""
+
+
+def check_version(entity_id, current, expected):
+    """Lanza ConflictError si la version actual no es la esperada.
+
+    Un registro inexistente tiene version 0; con ``expected`` None no
+    se verifica nada.
+    """
+    if expected is not None and current != expected:
+        raise ConflictError(
+            f"Conflicto de version en {entity_id}: "
+            f"se esperaba {expected} y hay {current}"
+        )
+
+
+class FileLock:
+    """Candado exclusivo y reentrante sobre ``<ruta>.lock``.
+
+    Combina un candado de hilos con ``fcntl.flock`` para excluir a otros
+    procesos que compartan el directorio de datos. En plataformas sin
+    ``fcntl`` solo excluye hilos del mismo proceso.
+    """
+
+    def __init__(self, filepath, thread_lock=None):
+        self.path = filepath + '.lock'
+        self._thread_lock = thread_lock or threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    @property
+    def held(self):
+        """Indica si el hilo que consulta tiene el candado."""
+        if not self._thread_lock.acquire(blocking=False):
+            return False
+        try:
+            return self._depth > 0
+        finally:
+            self._thread_lock.release()
+
+    def acquire(self):
+        """Adquiere el candado; retorna True si es la primera entrada."""
+        self._thread_lock.acquire()  # pylint: disable=consider-using-with
+        self._depth += 1
+        if self._depth > 1:
+            return False
+        try:
+            if fcntl is not None:
+                os.makedirs(os.path.dirname(self.path) or '.',
+                            exist_ok=True)
+                # pylint: disable-next=consider-using-with
+                self._file = open(self.path, 'a', encoding='utf-8')
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        except BaseException:
+            self._close()
+            self._depth -= 1
+            self._thread_lock.release()
+            raise
+        return True
+
+    def release(self):
+        """Libera una entrada del candado."""
+        self._depth -= 1
+        if self._depth == 0:
+            self._close()
+        self._thread_lock.release()
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
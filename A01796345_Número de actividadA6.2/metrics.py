@@ -0,0 +1,199 @@
+"""Metricas de operaciones y de E/S en formato de texto de Prometheus."""
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, fields
+from functools import wraps
+
+from fsutil import atomic_write_bytes
+
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+           0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+PREFIX = 'reservation'
+_ESCAPES = str.maketrans({'\\': '\\\\', '"': '\\"', '\n': '\\n'})
+
+
+@dataclass(slots=True)
+class IOStats:
+    """Contadores de lectura y escritura de un almacen."""
+
+    loads: int = 0
+    load_seconds: float = 0.0
+    read_bytes: int = 0
+    saves: int = 0
+    save_seconds: float = 0.0
+    written_bytes: int = 0
+
+    def add_load(self, size, seconds):
+        """Cuenta una carga de size bytes."""
+        self.loads += 1
+        self.load_seconds += seconds
+        self.read_bytes += size
+
+    def add_save(self, size, seconds):
+        """Cuenta una escritura de size bytes."""
+        self.saves += 1
+        self.save_seconds += seconds
+        self.written_bytes += size
+
+
+class Histogram:
+    """Conteos por cubeta, suma y total de una serie de latencias."""
+
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self, size):
+        self.counts = [0] * (size + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def add(self, bucket, seconds):
+        """Cuenta una observacion en la cubeta indicada."""
+        self.counts[bucket] += 1
+        self.total += seconds
+        self.count += 1
+
+    def cumulative(self):
+        """Retorna los conteos acumulados por cubeta."""
+        total, result = 0, []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+class Metrics:
+    """Registro de latencias y errores por (entidad, operacion).
+
+    ``observe`` cuesta una busqueda binaria y unas sumas bajo un
+    candado, asi que puede quedar activo en produccion. Los listeners
+    de ``add_listener`` reciben cada observacion ``(entidad, operacion,
+    segundos, error)`` y sirven para enviar trazas a otro sistema.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._errors = {}
+        self._listeners = []
+
+    def add_listener(self, listener):
+        """Registra una funcion que recibe cada observacion."""
+        self._listeners.append(listener)
+
+    def observe(self, entity, operation, seconds, error=False):
+        """Registra la duracion de una operacion."""
+        series = (entity, operation)
+        with self._lock:
+            histogram = self._histograms.get(series)
+            if histogram is None:
+                histogram = Histogram(len(self.buckets))
+                self._histograms[series] = histogram
+            histogram.add(bisect_left(self.buckets, seconds), seconds)
+            if error:
+                self._errors[series] = self._errors.get(series, 0) + 1
+        for listener in self._listeners:
+            listener(entity, operation, seconds, error)
+
+    def snapshot(self):
+        """Retorna {(entidad, operacion): {count, sum, errors}}."""
+        with self._lock:
+            return {series: {'count': h.count, 'sum': h.total,
+                             'errors': self._errors.get(series, 0)}
+                    for series, h in self._histograms.items()}
+
+    def reset(self):
+        """Descarta todas las observaciones."""
+        with self._lock:
+            self._histograms = {}
+            self._errors = {}
+
+    def render(self, stores=()):
+        """Retorna las metricas en formato de texto de Prometheus.
+
+        ``stores`` son almacenes con ``io`` (``IOStats``) cuyos
+        contadores de E/S se exportan por archivo.
+        """
+        with self._lock:
+            series = sorted(self._histograms.items())
+            errors = sorted(self._errors.items())
+        name = f'{PREFIX}_operation_seconds'
+        lines = [f'# HELP {name} Duracion de las operaciones.',
+                 f'# TYPE {name} histogram']
+        for (entity, operation), histogram in series:
+            labels = _labels(entity=entity, operation=operation)
+            bounds = [repr(b) for b in self.buckets] + ['+Inf']
+            for bound, count in zip(bounds, histogram.cumulative()):
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} '
+                             f'{count}')
+            lines.append(f'{name}_sum{{{labels}}} {histogram.total!r}')
+            lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+        name = f'{PREFIX}_operation_errors_total'
+        lines += [f'# HELP {name} Operaciones que lanzaron una excepcion.',
+                  f'# TYPE {name} counter']
+        lines += [f'{name}{{{_labels(entity=entity, operation=operation)}}} '
+                  f'{count}' for (entity, operation), count in errors]
+        lines += _render_io(stores)
+        return '\n'.join(lines) + '\n'
+
+    def write(self, filepath, stores=()):
+        """Escribe ``render()`` en filepath de forma atomica.
+
+        Sirve para el textfile collector de node_exporter.
+        """
+        atomic_write_bytes(filepath, self.render(stores).encode('utf-8'),
+                           durable=False)
+
+
+def _labels(**values):
+    """Etiquetas ``nombre="valor"`` con los valores escapados.
+
+    Prometheus exige escapar la diagonal invertida, las comillas y el
+    salto de linea dentro de un valor.
+    """
+    return ','.join(f'{name}="{str(value).translate(_ESCAPES)}"'
+                    for name, value in values.items())
+
+
+def _render_io(stores):
+    """Lineas de los contadores de E/S de cada almacen."""
+    lines = []
+    for field in fields(IOStats):
+        name = f'{PREFIX}_store_{field.name}_total'
+        lines += [f'# TYPE {name} counter']
+        for store in stores:
+            table = getattr(store, 'table', None)
+            labels = (_labels(file=store.filepath, table=table) if table
+                      else _labels(file=store.filepath))
+            value = getattr(store.io, field.name)
+            lines.append(f'{name}{{{labels}}} {value!r}')
+    return lines
+
+
+METRICS = Metrics()
+
+
+def instrumented(operation):
+    """Decora un metodo de manager para medirlo en ``self.METRICS``.
+
+    La entidad es ``self.TABLE``; con ``METRICS`` en None no se mide.
+    """
+    def decorate(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            registry = self.METRICS
+            if registry is None:
+                return method(self, *args, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = method(self, *args, **kwargs)
+            except BaseException:
+                registry.observe(self.TABLE, operation,
+                                 time.perf_counter() - start, error=True)
+                raise
+            registry.observe(self.TABLE, operation,
+                             time.perf_counter() - start)
+            return result
+        return wrapper
+    return decorate
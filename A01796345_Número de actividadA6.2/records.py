@@ -0,0 +1,108 @@
+"""Tipos de registro compactos (``__slots__``) de las entidades."""
+from dataclasses import dataclass, fields
+from typing import Optional, get_args
+
+
+class Record:
+    """Base de los registros con ``__slots__``.
+
+    Ocupa una fraccion de la memoria de un dict con las mismas llaves.
+    Ofrece ``get`` y acceso por llave para que los indices secundarios
+    los traten igual que a un dict; ``from_dict`` usa el valor por
+    defecto de los campos ausentes.
+
+    ``FIELDS`` son los campos del registro. Las llaves que no son
+    campos se conservan en ``extra`` y ``to_dict`` las vuelve a
+    incluir, asi que cargar y guardar no pierde datos del JSON.
+    """
+
+    __slots__ = ()
+    FIELDS = ()
+    extra = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.FIELDS = tuple(f for f in cls.__dict__.get('__slots__', ())
+                           if f != 'extra')
+
+    @classmethod
+    def from_dict(cls, data):
+        """Construye el registro desde su forma JSON."""
+        extra = {k: v for k, v in data.items() if k not in cls.FIELDS}
+        return cls(**{f: data[f] for f in cls.FIELDS if f in data},
+                   extra=extra or None)
+
+    @classmethod
+    def parse(cls, field, text):
+        """Convierte texto (por ejemplo de una URL) al tipo del campo.
+
+        Los campos desconocidos o de texto se dejan igual; ValueError si
+        el texto no es del tipo del campo.
+        """
+        types = {f.name: (get_args(f.type) or (f.type,))[0]
+                 for f in fields(cls)}
+        kind = types.get(field, str)
+        if kind is str:
+            return text
+        try:
+            return kind(text)
+        except ValueError as exc:
+            raise ValueError(
+                f"{field} debe ser de tipo {kind.__name__}"
+            ) from exc
+
+    def to_dict(self):
+        """Retorna la forma JSON (un dict nuevo) del registro."""
+        data = {f: getattr(self, f) for f in self.FIELDS}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def get(self, field, default=None):
+        """Retorna el valor del campo o de ``extra``, o default."""
+        if field in self.FIELDS:
+            return getattr(self, field)
+        return (self.extra or {}).get(field, default)
+
+    def __getitem__(self, field):
+        if field in self.FIELDS:
+            return getattr(self, field)
+        return (self.extra or {})[field]
+
+
+@dataclass(slots=True)
+class HotelRecord(Record):  # pylint: disable=too-many-instance-attributes
+    """Registro de un hotel."""
+
+    hotel_id: Optional[str] = None
+    name: Optional[str] = None
+    location: Optional[str] = None
+    rooms: Optional[int] = None
+    reserved_rooms: int = 0
+    cancellations: int = 0
+    version: int = 0
+    extra: Optional[dict] = None
+
+
+@dataclass(slots=True)
+class CustomerRecord(Record):
+    """Registro de un cliente."""
+
+    customer_id: Optional[str] = None
+    name: Optional[str] = None
+    email: Optional[str] = None
+    version: int = 0
+    extra: Optional[dict] = None
+
+
+@dataclass(slots=True)
+class ReservationRecord(Record):
+    """Registro de una reservacion."""
+
+    reservation_id: Optional[str] = None
+    customer_id: Optional[str] = None
+    hotel_id: Optional[str] = None
+    check_in: Optional[str] = None
+    check_out: Optional[str] = None
+    version: int = 0
+    extra: Optional[dict] = None
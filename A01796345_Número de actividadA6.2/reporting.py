@@ -0,0 +1,75 @@
+"""Reportes de ocupacion, estancia y cancelaciones."""
+from datetime import date
+
+from hotel import Hotel
+from inventory import parse_stay
+from reservation import Reservation
+
+PERIODS = ('night', 'week', 'month')
+
+
+def _period_key(night, period):
+    """Retorna la llave del periodo al que pertenece la noche."""
+    if period == 'week':
+        year, week, _ = night.isocalendar()
+        return f'{year:04d}-W{week:02d}'
+    if period == 'month':
+        return f'{night.year:04d}-{night.month:02d}'
+    return night.isoformat()
+
+
+class Reports:
+    """Reportes sobre los agregados mantenidos por los almacenes.
+
+    La ocupacion sale del calendario por noche, la estancia promedio de
+    ``StayStats`` y las cancelaciones del contador de cada hotel, por lo
+    que ningun reporte recorre el historial de reservaciones.
+    """
+
+    def __init__(self, hotel_mgr=None, reservation_mgr=None):
+        self.hotel_mgr = hotel_mgr or Hotel()
+        self.reservation_mgr = reservation_mgr or Reservation()
+
+    def occupancy(self, hotel_id, start, end, period='night'):
+        """Retorna la tasa de ocupacion del hotel por periodo.
+
+        Cubre las noches de [start, end); ``period`` es ``'night'``,
+        ``'week'`` (llave ISO ``AAAA-Wss``) o ``'month'`` (``AAAA-MM``).
+        La tasa es noches reservadas entre noches disponibles del
+        periodo dentro del rango.
+        """
+        if period not in PERIODS:
+            raise ValueError(f"period debe ser uno de {', '.join(PERIODS)}")
+        parse_stay(start, end)
+        rooms = self.hotel_mgr.display(hotel_id)['rooms']
+        free = self.reservation_mgr.availability(hotel_id, start, end)
+        booked = {}
+        for night, available in free.items():
+            key = _period_key(date.fromisoformat(night), period)
+            nights, total = booked.get(key, (0, 0))
+            booked[key] = (nights + 1, total + rooms - available)
+        return {key: round(total / (nights * rooms), 4)
+                for key, (nights, total) in booked.items()}
+
+    def average_stay(self, hotel_id=None):
+        """Retorna las noches promedio por reservacion activa."""
+        count, nights = self.reservation_mgr.stay_totals(hotel_id)
+        return round(nights / count, 2) if count else 0.0
+
+    def cancellations(self, hotel_id=None):
+        """Retorna las cancelaciones de un hotel o de todos."""
+        if hotel_id is not None:
+            return self.hotel_mgr.display(hotel_id).get('cancellations') or 0
+        return sum(h.get('cancellations') or 0
+                   for h in self.hotel_mgr.display())
+
+    def summary(self, hotel_id):
+        """Retorna los indicadores acumulados de un hotel."""
+        count, nights = self.reservation_mgr.stay_totals(hotel_id)
+        return {
+            'hotel_id': hotel_id,
+            'reservations': count,
+            'room_nights': nights,
+            'average_stay': self.average_stay(hotel_id),
+            'cancellations': self.cancellations(hotel_id),
+        }
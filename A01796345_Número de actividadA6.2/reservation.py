@@ -1,86 +1,279 @@
 """Modulo de la clase Reservation."""
-from base_classes import PersistenceManager
+from contextlib import ExitStack, contextmanager
+from functools import partial
+from operator import itemgetter
+
+from base_classes import NotFoundError, PersistenceManager
+from columns import ReservationColumns
 from hotel import Hotel
 from customer import Customer
+from idempotency import IdempotencyIndex
+from inventory import OccupancyCalendar, StayStats, parse_stay
+from metrics import instrumented
+from records import ReservationRecord
 
 
 class Reservation(PersistenceManager):
-    """Gestiona reservaciones con persistencia en JSON."""
+    """Gestiona reservaciones con persistencia en JSON.
+
+    ``IDEMPOTENCY`` recuerda el resultado de cada ``create_reservation``
+    con ``idempotency_key`` (ver ``idempotency``) para que un reintento
+    reciba la reservacion original sin volver a reservar; con None las
+    llaves se ignoran.
+    """
 
     DATA_FILE = 'data/reservations.json'
+    ID_FIELD = 'reservation_id'
+    TABLE = 'reservations'
+    RECORD = ReservationRecord
+    FIELDS = ReservationRecord.FIELDS
+    SHARD_FIELD = 'hotel_id'
+    IDEMPOTENCY = IdempotencyIndex()
 
     def _get_filepath(self):
         """Retorna la ruta del archivo de reservaciones."""
         return self.DATA_FILE
 
     # pylint: disable=too-many-arguments,too-many-positional-arguments
+    @instrumented('create_reservation')
     def create_reservation(self, reservation_id, customer_id,
-                           hotel_id, check_in, check_out):
-        """Crea una nueva reservacion."""
-        if not all([reservation_id, customer_id,
-                    hotel_id, check_in, check_out]):
+                           hotel_id, check_in, check_out,
+                           idempotency_key=None):
+        """Crea una nueva reservacion.
+
+        Con ``idempotency_key`` un reintento con los mismos datos
+        retorna la reservacion ya creada sin leer los almacenes.
+        """
+        fields = {
+            'reservation_id': reservation_id,
+            'customer_id': customer_id,
+            'hotel_id': hotel_id,
+            'check_in': check_in,
+            'check_out': check_out
+        }
+        if idempotency_key is None or self.IDEMPOTENCY is None:
+            return self._book(fields)
+        return self.IDEMPOTENCY.run(idempotency_key, fields,
+                                    partial(self._book, fields))
+
+    def _book(self, fields):
+        """Crea la reservacion en una transaccion sobre su hotel."""
+        with self._bulk(fields['hotel_id'], fields['reservation_id']):
+            return self._insert(fields)
+
+    @contextmanager
+    def _unit(self, stores=()):
+        """Difiere eventos y resultados idempotentes hasta confirmar.
+
+        Los resultados se recuerdan solo despues de escribir stores y
+        publicar los eventos.
+        """
+        with ExitStack() as stack:
+            if self.IDEMPOTENCY is not None:
+                stack.enter_context(self.IDEMPOTENCY.unit())
+            stack.enter_context(super()._unit(stores))
+            yield
+
+    def _related(self):
+        """Las reservaciones se modifican junto con su hotel.
+
+        Al cliente solo se le lee, asi que no se bloquea: eliminar un
+        cliente bloquea todos los shards de reservaciones y no puede
+        cruzarse con una alta.
+        """
+        return (Hotel(),)
+
+    def _bulk(self, hotel_id=None, reservation_id=None):
+        """Transaccion sobre hoteles y reservaciones.
+
+        Con shards y ``hotel_id`` solo se bloquea el shard de ese hotel
+        y, de reservaciones, tambien el que elige ``reservation_id``:
+        asi dos altas con el mismo id en hoteles de shards distintos se
+        serializan en ese shard y la segunda ve a la primera.
+        """
+        also = (reservation_id,) if reservation_id is not None else ()
+        return self.transaction(*self._related(), route=hotel_id,
+                                also=also)
+
+    def _insert(self, kwargs):
+        """Valida la reservacion, reserva la habitacion y la guarda.
+
+        Debe ejecutarse dentro de ``_bulk()`` para que el hotel y la
+        reservacion se confirmen juntos. Con shards, el id repetido en
+        el shard de otro hotel se detecta porque ``_book`` bloquea
+        tambien el shard que elige el id.
+        """
+        reservation = {
+            field: kwargs.get(field)
+            for field in ('reservation_id', 'customer_id', 'hotel_id',
+                          'check_in', 'check_out')
+        }
+        if not all(reservation.values()):
             raise ValueError("Todos los campos son requeridos")
+        parse_stay(reservation['check_in'], reservation['check_out'])
+        hotel_id = reservation['hotel_id']
+        customer_id = reservation['customer_id']
+        reservation_id = reservation['reservation_id']
 
         hotel_mgr = Hotel()
         try:
-            hotel_mgr.display(hotel_id)
+            hotel = hotel_mgr.display(hotel_id)
         except ValueError as exc:
             raise ValueError(
                 f"Hotel con id {hotel_id} no existe"
             ) from exc
 
-        customer_mgr = Customer()
         try:
-            customer_mgr.display(customer_id)
+            Customer().display(customer_id)
         except ValueError as exc:
             raise ValueError(
                 f"Cliente con id {customer_id} no existe"
             ) from exc
 
-        reservations = self.load_data()
-        for res in reservations:
-            if res['reservation_id'] == reservation_id:
-                raise ValueError(
-                    f"Reservacion con id {reservation_id} ya existe"
-                )
+        if self._lookup(reservation_id) is not None:
+            raise ValueError(
+                f"Reservacion con id {reservation_id} ya existe"
+            )
 
-        hotel_mgr.reserve_room(hotel_id)
+        peak = self.peak_occupancy(hotel_id, reservation['check_in'],
+                                   reservation['check_out'], hotel)
+        if peak >= hotel['rooms']:
+            raise ValueError("No hay habitaciones disponibles")
 
-        reservation = {
-            'reservation_id': reservation_id,
-            'customer_id': customer_id,
-            'hotel_id': hotel_id,
-            'check_in': check_in,
-            'check_out': check_out
-        }
-        reservations.append(reservation)
-        self.save_data(reservations)
-        return reservation
+        hotel_mgr.reserve_room(hotel_id, check_capacity=False)
+        return self._create(reservation)
+
+    def _indexes(self, name, factory, hotel_id=None):
+        """Retorna el indice ``name`` de cada shard que cubre hotel_id."""
+        return [store.index(name, factory)
+                for store in self._stores(hotel_id)]
+
+    def _calendar(self, hotel_id):
+        """Retorna el indice de ocupacion por noche del hotel."""
+        return self._indexes('occupancy', OccupancyCalendar, hotel_id)[0]
+
+    def undated_rooms(self, hotel):
+        """Habitaciones de ``Hotel.reserve_room``, que no tienen fechas.
+
+        Son las reservaciones activas del hotel que no estan en el
+        calendario; ocupan todas las noches.
+        """
+        dated, _ = self.stay_totals(hotel['hotel_id'])
+        return max(0, hotel['reserved_rooms'] - dated)
+
+    @instrumented('peak_occupancy')
+    def peak_occupancy(self, hotel_id, check_in, check_out, hotel=None):
+        """Retorna las habitaciones ocupadas en la noche mas llena.
+
+        Cuenta las reservaciones de la estancia y las reservas sin
+        fechas; ``hotel`` evita volver a leer el hotel.
+        """
+        hotel = hotel or Hotel().display(hotel_id)
+        peak = self._calendar(hotel_id).peak(hotel_id, check_in, check_out)
+        return peak + self.undated_rooms(hotel)
+
+    def busiest_night(self, hotel_id, hotel=None):
+        """Retorna la ocupacion de la noche mas llena desde hoy."""
+        hotel = hotel or Hotel().display(hotel_id)
+        return (self._calendar(hotel_id).busiest(hotel_id)
+                + self.undated_rooms(hotel))
+
+    def columns(self, hotel_id=None):
+        """Retorna la representacion columnar de cada shard.
+
+        Sin shards es una lista de un solo elemento; con ``hotel_id``
+        solo se incluye el shard de ese hotel.
+        """
+        return self._indexes('columns', ReservationColumns, hotel_id)
+
+    @instrumented('room_nights')
+    def room_nights(self, start=None, end=None):
+        """Retorna las noches reservadas por hotel en [start, end)."""
+        totals = {}
+        for columns in self.columns():
+            totals.update(columns.room_nights(start, end))
+        return totals
+
+    @instrumented('room_nights_by_month')
+    def room_nights_by_month(self, hotel_id=None):
+        """Retorna las noches reservadas por hotel y por mes."""
+        totals = {}
+        for columns in self.columns(hotel_id):
+            totals.update(columns.room_nights_by_month(hotel_id))
+        return totals
+
+    @instrumented('stay_totals')
+    def stay_totals(self, hotel_id=None):
+        """Retorna (reservaciones activas, noches) de un hotel o de todos."""
+        totals = [stats.totals(hotel_id)
+                  for stats in self._indexes('stays', StayStats, hotel_id)]
+        return (sum(t[0] for t in totals), sum(t[1] for t in totals))
+
+    @instrumented('availability')
+    def availability(self, hotel_id, check_in, check_out):
+        """Retorna las habitaciones libres de cada noche de la estancia."""
+        hotel = Hotel().display(hotel_id)
+        undated = self.undated_rooms(hotel)
+        booked = self._calendar(hotel_id).booked(hotel_id, check_in,
+                                                 check_out)
+        return {night: hotel['rooms'] - count - undated
+                for night, count in booked.items()}
+
+    @instrumented('by_customer')
+    def by_customer(self, customer_id):
+        """Retorna las reservaciones de un cliente, ordenadas por id."""
+        return self._by_field('customer_id', customer_id)
 
+    @instrumented('by_hotel')
+    def by_hotel(self, hotel_id):
+        """Retorna las reservaciones de un hotel, ordenadas por id."""
+        return self._by_field('hotel_id', hotel_id)
+
+    def _by_field(self, field, value):
+        """Lee las reservaciones con ese valor desde su indice."""
+        records = []
+        for store, index in self._field_indexes(field, value):
+            records.extend(store.get(reservation_id)
+                           for reservation_id in index.ids(value))
+        return sorted((record for record in records if record is not None),
+                      key=itemgetter(self.ID_FIELD))
+
+    @instrumented('cancel_reservation')
     def cancel_reservation(self, reservation_id):
         """Cancela una reservacion existente."""
-        reservations = self.load_data()
-        reservation = None
-
-        for res in reservations:
-            if res['reservation_id'] == reservation_id:
-                reservation = res
-                break
+        hotel_id = self._get(reservation_id)['hotel_id']
+        with self.transaction(Hotel(), route=hotel_id):
+            self._remove(self._get(reservation_id))
+        return True
 
+    def _get(self, entity_id):
+        """Retorna una copia de la reservacion o lanza NotFoundError."""
+        reservation = self._lookup(entity_id)
         if reservation is None:
-            raise ValueError(
-                f"Reservacion con id {reservation_id} no encontrada"
+            raise NotFoundError(
+                f"Reservacion con id {entity_id} no encontrada"
             )
+        return reservation
 
-        hotel_mgr = Hotel()
-        try:
-            hotel_mgr.cancel_reservation(reservation['hotel_id'])
-        except ValueError:
-            pass
-
-        reservations = [
-            res for res in reservations
-            if res['reservation_id'] != reservation_id
-        ]
-        self.save_data(reservations)
-        return True
+    def _remove(self, record, parent=None):
+        """Quita la reservacion y libera su habitacion en el hotel.
+
+        Si la elimina en cascada el borrado de su hotel no se tocan los
+        contadores de ese hotel, que tambien se elimina.
+        """
+        if not isinstance(parent, Hotel):
+            try:
+                Hotel().cancel_reservation(record['hotel_id'])
+            except ValueError:
+                pass
+        with self._publishing(self._store_of(record)) as store:
+            store.remove(record[self.ID_FIELD])
+            self._emit('cancel', record[self.ID_FIELD], record)
+
+
+if __name__ == '__main__':
+    import sys
+
+    from server import main  # pylint: disable=cyclic-import
+
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,36 @@
+"""Savepoints anidados para los almacenes de archivo."""
+from contextlib import contextmanager
+
+
+class Savepoints:
+    """Pila de imagenes previas de los savepoints abiertos.
+
+    Cada savepoint guarda la imagen previa de cada registro que se toca
+    por primera vez dentro de el. Si el bloque falla se llama a
+    ``rollback((imagenes, *marca))``; si termina bien sus imagenes pasan
+    al savepoint que lo contiene, que podria revertirlas despues.
+    """
+
+    def __init__(self):
+        self._stack = []
+
+    def remember(self, entity_id, image):
+        """Guarda la imagen previa en el savepoint mas interno."""
+        if self._stack:
+            self._stack[-1].setdefault(entity_id, image)
+
+    @contextmanager
+    def open(self, rollback, *mark):
+        """Abre un savepoint con la marca del estado actual del almacen."""
+        images = {}
+        self._stack.append(images)
+        try:
+            yield
+        except BaseException:
+            rollback((images, *mark))
+            raise
+        finally:
+            self._stack.pop()
+        if self._stack:
+            for entity_id, image in images.items():
+                self._stack[-1].setdefault(entity_id, image)
@@ -0,0 +1,56 @@
+"""Busqueda de disponibilidad de hoteles por ubicacion y fechas."""
+from hotel import Hotel
+from inventory import parse_stay
+from reservation import Reservation
+
+
+class HotelSearch:  # pylint: disable=too-few-public-methods
+    """Busca hoteles con habitaciones libres en un rango de fechas.
+
+    Los candidatos salen del indice por ubicacion de Hotel y la
+    ocupacion de cada uno del calendario por noche de Reservation, de
+    modo que el costo depende de los hoteles de esa ubicacion y de las
+    noches pedidas, no del total de hoteles ni de reservaciones.
+    """
+
+    def __init__(self, hotel_mgr=None, reservation_mgr=None):
+        self.hotel_mgr = hotel_mgr or Hotel()
+        self.reservation_mgr = reservation_mgr or Reservation()
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def search(self, location, check_in, check_out, min_rooms=1,
+               limit=20, cursor=None):
+        """Retorna una pagina de hoteles con al menos min_rooms libres.
+
+        El resultado es un dict con ``results`` (hoteles con el campo
+        ``free_rooms``) y ``next_cursor``, que se pasa como ``cursor``
+        para pedir la pagina siguiente; es None en la ultima pagina.
+        """
+        parse_stay(check_in, check_out)
+        if not isinstance(limit, int) or limit <= 0:
+            raise ValueError("limit debe ser un entero positivo")
+        results = []
+        while len(results) < limit:
+            ids = self.hotel_mgr.ids_by_location(location, cursor, limit)
+            if not ids:
+                return {'results': results, 'next_cursor': None}
+            for hotel_id in ids:
+                cursor = hotel_id
+                hotel = self._with_free_rooms(hotel_id, check_in, check_out)
+                if hotel is not None and hotel['free_rooms'] >= min_rooms:
+                    results.append(hotel)
+                    if len(results) == limit:
+                        break
+        more = self.hotel_mgr.ids_by_location(location, cursor, 1)
+        return {'results': results, 'next_cursor': cursor if more else None}
+
+    def _with_free_rooms(self, hotel_id, check_in, check_out):
+        """Retorna el hotel con sus habitaciones libres en la estancia."""
+        try:
+            hotel = self.hotel_mgr.display(hotel_id)
+        except ValueError:
+            return None
+        peak = self.reservation_mgr.peak_occupancy(hotel_id, check_in,
+                                                   check_out, hotel)
+        hotel['free_rooms'] = hotel['rooms'] - peak
+        return hotel
@@ -0,0 +1,247 @@
+"""Servidor HTTP local del sistema de reservaciones (solo stdlib).
+
+Uso::
+
+    python -m reservation serve --host 127.0.0.1 --port 8000
+
+Rutas (cuerpos y respuestas en JSON)::
+
+    GET    /hotels                  GET    /customers
+    GET    /hotels?limit=<n>[&cursor=<c>][&order_by=<campo>][&<campo>=<v>]
+    GET    /customers?...           (paginas como en /hotels)
+    POST   /hotels                  POST   /customers
+    GET    /hotels/<id>             GET    /customers/<id>
+    PATCH  /hotels/<id>             PATCH  /customers/<id>
+    DELETE /hotels/<id>[?cascade=1] DELETE /customers/<id>[?cascade=1]
+    GET    /reservations?customer_id=<id> | ?hotel_id=<id>
+    POST   /reservations            (cabecera opcional Idempotency-Key)
+    DELETE /reservations/<id>
+    GET    /changes?after=<seq>[&limit=<n>]
+    GET    /metrics                 (texto de Prometheus)
+"""
+import argparse
+import asyncio
+import json
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from async_service import AsyncCustomer, AsyncHotel, AsyncReservation
+from base_classes import NotFoundError, PersistenceManager
+from locking import ConflictError
+
+METRICS_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class RouteNotFoundError(LookupError):
+    """La ruta o el metodo de la peticion no existen."""
+
+
+class BookingService:
+    """Fachadas asincronas atendidas por un event loop en su propio hilo.
+
+    Los hilos del servidor HTTP envian cada operacion al loop, donde
+    los ``StoreWriter`` agrupan las escrituras concurrentes en una sola
+    confirmacion; los almacenes quedan residentes entre peticiones.
+    """
+
+    def __init__(self):
+        self.hotels = AsyncHotel()
+        self.customers = AsyncCustomer()
+        self.reservations = AsyncReservation()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever,
+                                        daemon=True)
+        self._thread.start()
+
+    def call(self, coroutine):
+        """Ejecuta la corrutina en el loop y retorna su resultado."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def close(self):
+        """Detiene el loop y espera a su hilo."""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+class BookingHandler(BaseHTTPRequestHandler):
+    """Traduce las rutas HTTP a operaciones de ``BookingService``."""
+
+    ENTITIES = ('hotels', 'customers')
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Atiende GET."""
+        self._dispatch('GET')
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Atiende POST."""
+        self._dispatch('POST')
+
+    def do_PATCH(self):  # pylint: disable=invalid-name
+        """Atiende PATCH."""
+        self._dispatch('PATCH')
+
+    def do_DELETE(self):  # pylint: disable=invalid-name
+        """Atiende DELETE."""
+        self._dispatch('DELETE')
+
+    # pylint: disable-next=redefined-builtin
+    def log_message(self, format, *args):
+        """Registra solo si el servidor se creo con ``verbose``."""
+        if getattr(self.server, 'verbose', False):
+            super().log_message(format, *args)
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        parts = [p for p in url.path.split('/') if p]
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            if parts == ['metrics'] and method == 'GET':
+                text = PersistenceManager.metrics_text()
+                self._send(HTTPStatus.OK, text.encode('utf-8'), METRICS_TYPE)
+                return
+            result = self._route(method, parts, query)
+        except NotFoundError as exc:
+            self._send(HTTPStatus.NOT_FOUND, {'error': str(exc)})
+        except RouteNotFoundError:
+            self._send(HTTPStatus.NOT_FOUND, {'error': 'Ruta no encontrada'})
+        except ConflictError as exc:
+            self._send(HTTPStatus.CONFLICT, {'error': str(exc)})
+        except (ValueError, TypeError) as exc:
+            self._send(HTTPStatus.BAD_REQUEST, {'error': str(exc)})
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            self.log_error('Error interno: %r', exc)
+            self._send(HTTPStatus.INTERNAL_SERVER_ERROR,
+                       {'error': 'Error interno del servidor'})
+        else:
+            status = HTTPStatus.CREATED if method == 'POST' else HTTPStatus.OK
+            self._send(status, result)
+
+    def _route(self, method, parts, query):
+        """Ejecuta la operacion de la ruta o lanza RouteNotFoundError."""
+        service = self.server.service
+        if not parts:
+            raise RouteNotFoundError(method)
+        if parts[0] in self.ENTITIES:
+            facade = getattr(service, parts[0])
+            return service.call(self._entity(facade, method, parts[1:],
+                                             query))
+        if parts[0] == 'reservations':
+            return service.call(self._reservation(service.reservations,
+                                                  method, parts[1:], query))
+        if parts == ['changes'] and method == 'GET':
+            limit = query.get('limit')
+            return PersistenceManager.changes(
+                int(query.get('after', 0)),
+                int(limit) if limit is not None else None
+            )
+        raise RouteNotFoundError(parts[0])
+
+    def _entity(self, facade, method, rest, query):
+        """Corrutina de la operacion sobre un hotel o cliente."""
+        if method == 'GET' and not rest and query:
+            return facade.page(**_page_options(query,
+                                               facade.manager.RECORD))
+        if method == 'GET' and len(rest) <= 1:
+            return facade.display(*rest)
+        if method == 'POST' and not rest:
+            return facade.create(**self._body())
+        if method == 'PATCH' and len(rest) == 1:
+            return facade.modify(rest[0], **self._body())
+        if method == 'DELETE' and len(rest) == 1:
+            return facade.delete(rest[0], _flag(query.get('cascade')))
+        raise RouteNotFoundError(method)
+
+    def _reservation(self, facade, method, rest, query):
+        """Corrutina de la operacion sobre reservaciones."""
+        if method == 'GET' and not rest and 'customer_id' in query:
+            return facade.by_customer(query['customer_id'])
+        if method == 'GET' and not rest and 'hotel_id' in query:
+            return facade.by_hotel(query['hotel_id'])
+        if method == 'POST' and not rest:
+            body = self._body()
+            return facade.create_reservation(
+                body.get('reservation_id'), body.get('customer_id'),
+                body.get('hotel_id'), body.get('check_in'),
+                body.get('check_out'), self.headers.get('Idempotency-Key')
+            )
+        if method == 'DELETE' and len(rest) == 1:
+            return facade.cancel_reservation(rest[0])
+        raise RouteNotFoundError(method)
+
+    def _body(self):
+        """Lee el cuerpo JSON de la peticion; debe ser un objeto."""
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}')
+        if not isinstance(body, dict):
+            raise ValueError("El cuerpo debe ser un objeto JSON")
+        return body
+
+    def _send(self, status, payload, content_type=None):
+        """Responde payload como JSON, o como bytes con content_type."""
+        if content_type is None:
+            data = json.dumps(payload).encode('utf-8')
+            content_type = 'application/json'
+        else:
+            data = payload
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _page_options(query, record_type=None):
+    """Argumentos de ``page`` desde la query; el resto son filtros.
+
+    Cada filtro se convierte al tipo de su campo en ``record_type``
+    (``records.Record``), asi que ``rooms=05`` filtra por el entero 5.
+    """
+    where = dict(query)
+    limit = where.pop('limit', None)
+    options = {
+        'limit': int(limit) if limit is not None else 50,
+        'cursor': where.pop('cursor', None),
+        'order_by': where.pop('order_by', None),
+    }
+    if record_type is not None:
+        where = {field: record_type.parse(field, value)
+                 for field, value in where.items()}
+    options['where'] = where
+    return options
+
+
+def _flag(value):
+    """Interpreta un parametro booleano de la query."""
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
+def make_server(host='127.0.0.1', port=8000, verbose=False):
+    """Crea el servidor HTTP con su ``BookingService``."""
+    httpd = ThreadingHTTPServer((host, port), BookingHandler)
+    httpd.service = BookingService()
+    httpd.verbose = verbose
+    return httpd
+
+
+def main(argv=None):
+    """Punto de entrada de ``python -m reservation serve``."""
+    parser = argparse.ArgumentParser(prog='python -m reservation')
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help='inicia el servidor HTTP')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8000)
+    serve.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+    httpd = make_server(args.host, args.port, args.verbose)
+    print(f"Sirviendo en http://{args.host}:{httpd.server_port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        httpd.service.close()
+    return 0
@@ -0,0 +1,48 @@
+"""Particion de los archivos de datos en shards por hotel."""
+import os
+import zlib
+
+from fsutil import atomic_write_bytes
+
+
+class ShardLayoutError(RuntimeError):
+    """Los datos en disco se repartieron con otro numero de shards."""
+
+
+def shard_of(route, shards):
+    """Retorna el shard (0..shards-1) de una llave de particion.
+
+    Usa CRC32 y no ``hash()``, cuyo valor cambia entre procesos, para
+    que todos los procesos y nodos elijan el mismo shard.
+    """
+    return zlib.crc32(str(route).encode('utf-8')) % shards
+
+
+def shard_path(filepath, shard):
+    """Retorna la ruta del archivo dentro del directorio del shard.
+
+    ``data/hotels.json`` en el shard 3 es ``data/shard03/hotels.json``;
+    cada shard es un directorio para poder montarlo en otro nodo.
+    """
+    directory, name = os.path.split(filepath)
+    return os.path.join(directory, f'shard{shard:02d}', name)
+
+
+def shard_count(filepath):
+    """Retorna con cuantos shards se repartieron los datos de filepath.
+
+    Se guarda en ``<ruta>.shards``; sin ese archivo es 1.
+    """
+    try:
+        with open(filepath + '.shards', 'r', encoding='utf-8') as file:
+            return int(file.read())
+    except FileNotFoundError:
+        return 1
+
+
+def save_shard_count(filepath, shards):
+    """Registra con cuantos shards se reparten los datos de filepath."""
+    if shards > 1:
+        atomic_write_bytes(filepath + '.shards', str(shards).encode())
+    elif os.path.exists(filepath + '.shards'):
+        os.remove(filepath + '.shards')
@@ -0,0 +1,144 @@
+"""Snapshot binario de los registros para un arranque en frio rapido.
+
+El snapshot es un cache del archivo JSON: guarda el tamano y el CRC32
+del JSON del que salio y solo se usa si ambos coinciden. Formato (todo
+little-endian)::
+
+    encabezado  MAGIC, tamano y CRC32 del JSON, CRC32 del cuerpo,
+                numero de campos, de cadenas y de registros
+    cadenas     longitud (uint32) y UTF-8 de las cadenas separadas por
+                NUL; las primeras son los nombres de los campos
+    columnas    por campo, el tipo de cada registro (uint8) y su valor
+                (int64): entero, indice de cadena o 0 para None
+
+Al leer, cada columna se decodifica de una vez sobre el buffer mapeado
+y los registros se arman con ``map``, sin un ciclo Python por celda.
+"""
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+
+from fsutil import atomic_write_bytes
+
+MAGIC = b'RSNAP001'
+HEADER = struct.Struct('<8sQIIIII')
+LENGTH = struct.Struct('<I')
+SEPARATOR = '\x00'
+NONE, INT, STR = 0, 1, 2
+
+
+def source_checksum(data):
+    """Retorna (tamano, CRC32) del contenido del archivo JSON."""
+    return len(data), zlib.crc32(data)
+
+
+def _encode(value, strings):
+    """Retorna (tipo, entero) de un valor; TypeError si no se soporta."""
+    if value is None:
+        return NONE, 0
+    if (isinstance(value, int) and not isinstance(value, bool)
+            and -2 ** 63 <= value < 2 ** 63):
+        return INT, value
+    if isinstance(value, str) and SEPARATOR not in value:
+        code = strings.get(value)
+        if code is None:
+            code = strings[value] = len(strings)
+        return STR, code
+    raise TypeError(f"Tipo no soportado en snapshot: {type(value).__name__}")
+
+
+def write_snapshot(path, source, records, fields):
+    """Escribe de forma atomica el snapshot de los registros.
+
+    ``source`` es ``source_checksum`` del JSON; ``records`` son objetos
+    con los atributos ``fields``. Lanza TypeError si algun valor no es
+    None, entero o cadena.
+    """
+    strings = {field: code for code, field in enumerate(fields)}
+    columns = bytearray()
+    for field in fields:
+        kinds, values = array('B'), array('q')
+        for record in records:
+            kind, value = _encode(getattr(record, field), strings)
+            kinds.append(kind)
+            values.append(value)
+        if sys.byteorder != 'little':
+            values.byteswap()
+        columns += kinds.tobytes() + values.tobytes()
+    body = _pack_strings(strings) + columns
+    atomic_write_bytes(path, HEADER.pack(
+        MAGIC, source[0], source[1], zlib.crc32(body),
+        len(fields), len(strings), len(records)
+    ) + body, durable=False)
+
+
+def _pack_strings(strings):
+    """Serializa la tabla de cadenas en orden de codigo."""
+    table = SEPARATOR.join(strings).encode('utf-8')
+    return LENGTH.pack(len(table)) + table
+
+
+def read_snapshot(path, source, record_type):
+    """Retorna los registros del snapshot o None si no sirve.
+
+    No sirve si no existe, si no corresponde a ``source``, si esta
+    corrupto o si sus campos no son los de ``record_type``.
+    """
+    try:
+        with open(path, 'rb') as file, \
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return _decode(data, source, record_type)
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def _read_strings(data, offset, count):
+    """Lee la tabla de cadenas; retorna (cadenas, offset final)."""
+    (length,) = LENGTH.unpack_from(data, offset)
+    offset += LENGTH.size
+    strings = data[offset:offset + length].decode('utf-8').split(SEPARATOR)
+    if len(strings) != count:
+        raise ValueError("Tabla de cadenas corrupta")
+    return strings, offset + length
+
+
+def _counts(data, source):
+    """Retorna (campos, cadenas, registros) si el encabezado es valido."""
+    magic, size, crc, body_crc, *counts = HEADER.unpack_from(data)
+    if magic != MAGIC or (size, crc) != tuple(source):
+        return None
+    if zlib.crc32(data[HEADER.size:]) != body_crc:
+        return None
+    return counts
+
+
+def _decode(data, source, record_type):
+    counts = _counts(data, source)
+    if counts is None:
+        return None
+    field_count, string_count, record_count = counts
+    strings, offset = _read_strings(data, HEADER.size, string_count)
+    if tuple(strings[:field_count]) != tuple(record_type.__slots__):
+        return None
+    columns = []
+    for _ in range(field_count):
+        kinds = data[offset:offset + record_count]
+        offset += record_count
+        values = array('q', data[offset:offset + 8 * record_count])
+        offset += 8 * record_count
+        if sys.byteorder != 'little':
+            values.byteswap()
+        columns.append(_decode_column(kinds, values, strings))
+    return list(map(record_type, *columns))
+
+
+def _decode_column(kinds, values, strings):
+    """Convierte una columna a valores Python."""
+    if kinds.count(STR) == len(kinds):
+        return list(map(strings.__getitem__, values))
+    if kinds.count(INT) == len(kinds):
+        return values.tolist()
+    return [strings[value] if kind == STR else (value if kind else None)
+            for kind, value in zip(kinds, values)]
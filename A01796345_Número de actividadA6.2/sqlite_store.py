@@ -0,0 +1,235 @@
+"""Almacen respaldado por SQLite para el sistema de reservaciones."""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from indexes import IndexSet
+from locking import VERSION_FIELD, check_version
+from metrics import IOStats
+
+_DATABASES = {}
+_DATABASES_LOCK = threading.Lock()
+
+
+class Database:
+    """Conexion compartida a una base SQLite en modo WAL.
+
+    Las tablas de una misma base comparten la conexion, el candado y
+    la transaccion en curso, por lo que ``transaction()`` anidado en
+    varios almacenes confirma todo junto.
+    """
+
+    def __init__(self, db_path):
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(db_path, isolation_level=None,
+                                    check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.lock = threading.RLock()
+        self.stores = []
+        self._depth = 0
+
+    @contextmanager
+    def transaction(self):
+        """Ejecuta el bloque en una transaccion reentrante."""
+        with self.lock:
+            self._depth += 1
+            if self._depth == 1:
+                self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.conn.execute('ROLLBACK')
+                    for store in self.stores:
+                        store.rebuild_indexes()
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                self.conn.execute('COMMIT')
+
+    @contextmanager
+    def savepoint(self):
+        """Revierte solo el bloque si falla, sin cerrar la transaccion."""
+        with self.transaction():
+            name = f'sp{self._depth}'
+            self.conn.execute(f'SAVEPOINT {name}')
+            try:
+                yield self
+            except BaseException:
+                self.conn.execute(f'ROLLBACK TO {name}')
+                self.conn.execute(f'RELEASE {name}')
+                for store in self.stores:
+                    store.rebuild_indexes()
+                raise
+            self.conn.execute(f'RELEASE {name}')
+
+    def close(self):
+        """Cierra la conexion."""
+        with self.lock:
+            self.conn.close()
+
+
+def connect(db_path):
+    """Retorna la base compartida para la ruta indicada."""
+    with _DATABASES_LOCK:
+        database = _DATABASES.get(db_path)
+        if database is None:
+            database = Database(db_path)
+            _DATABASES[db_path] = database
+        return database
+
+
+class SqliteStore:  # pylint: disable=too-many-instance-attributes
+    """Almacena los registros de una entidad en una tabla SQLite.
+
+    Ofrece la misma interfaz que ``JsonStore``; cada operacion por id
+    es una consulta de una sola fila sobre la llave primaria. Las
+    escrituras usan ``BEGIN IMMEDIATE``, que serializa a los procesos
+    escritores, y la columna ``version`` para detectar conflictos.
+    SQLite no expone la E/S por tabla, asi que ``io`` queda en cero.
+    """
+
+    def __init__(self, filepath, key, table, fields):
+        self.filepath = filepath
+        self.key = key
+        self.table = table
+        self.fields = tuple(fields)
+        self._db = connect(filepath)
+        self._conn = self._db.conn
+        self._lock = self._db.lock
+        self._indexes = IndexSet()
+        self.io = IOStats()
+        self._data_version = None
+        self._db.stores.append(self)
+        columns = ', '.join(
+            f'{f} NOT NULL PRIMARY KEY' if f == key else f
+            for f in self.fields
+        )
+        self._conn.execute(
+            f'CREATE TABLE IF NOT EXISTS {table} ({columns})'
+        )
+        existing = {
+            row[1] for row in
+            self._conn.execute(f'PRAGMA table_info({table})')
+        }
+        for field in self.fields:
+            if field not in existing:
+                self._conn.execute(
+                    f'ALTER TABLE {table} ADD COLUMN {field}'
+                )
+        placeholders = ', '.join('?' for _ in self.fields)
+        updates = ', '.join(
+            f'{f} = excluded.{f}' for f in self.fields if f != key
+        )
+        self._sql = {
+            'select': f"SELECT {', '.join(self.fields)} FROM {table}",
+            'upsert': (
+                f"INSERT INTO {table} ({', '.join(self.fields)}) "
+                f"VALUES ({placeholders}) "
+                f"ON CONFLICT({key}) DO UPDATE SET {updates}"
+            ),
+        }
+
+    def _row(self, record):
+        return tuple(record.get(f) for f in self.fields)
+
+    def refresh(self):
+        """Reconstruye los indices si otra conexion cambio la base."""
+        with self._lock:
+            version = self._conn.execute('PRAGMA data_version').fetchone()[0]
+            if version != self._data_version:
+                self._data_version = version
+                self.rebuild_indexes()
+
+    def index(self, name, factory):
+        """Retorna el indice secundario registrado con ese nombre."""
+        with self._lock:
+            self.refresh()
+            return self._indexes.get(name, factory, self.all)
+
+    def rebuild_indexes(self):
+        """Reconstruye los indices secundarios desde la tabla."""
+        if self._indexes:
+            self._indexes.rebuild(self.all())
+
+    def flush(self):
+        """Cada sentencia se confirma al ejecutarse; no hay pendientes."""
+
+    def batch(self):
+        """Agrupa las mutaciones del bloque en una sola transaccion."""
+        return self._db.transaction()
+
+    def begin(self):
+        """Participa en una transaccion de varios almacenes."""
+        return self._db.transaction()
+
+    def savepoint(self):
+        """Revierte solo las mutaciones del bloque si este falla."""
+        return self._db.savepoint()
+
+    def __contains__(self, entity_id):
+        return self.get(entity_id) is not None
+
+    def __len__(self):
+        with self._lock:
+            cursor = self._conn.execute(f'SELECT COUNT(*) FROM {self.table}')
+            return cursor.fetchone()[0]
+
+    def get(self, entity_id):
+        """Retorna el registro o None si no existe."""
+        with self._lock:
+            row = self._conn.execute(
+                f"{self._sql['select']} WHERE {self.key} = ?", (entity_id,)
+            ).fetchone()
+        return dict(zip(self.fields, row)) if row is not None else None
+
+    def all(self):
+        """Retorna todos los registros en orden de insercion."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"{self._sql['select']} ORDER BY rowid"
+            ).fetchall()
+        return [dict(zip(self.fields, row)) for row in rows]
+
+    def locked(self):
+        """Bloquea la base para escritura durante el bloque."""
+        return self.batch()
+
+    def put(self, record, expected_version=None):
+        """Inserta o actualiza un registro y retorna lo guardado."""
+        entity_id = record[self.key]
+        with self.batch():
+            old = self.get(entity_id)
+            version = (old.get(VERSION_FIELD) or 0) if old else 0
+            check_version(entity_id, version, expected_version)
+            record = dict(record)
+            record[VERSION_FIELD] = version + 1
+            self._conn.execute(self._sql['upsert'], self._row(record))
+            stored = {f: record.get(f) for f in self.fields}
+            self._indexes.update(old, stored)
+        return dict(stored)
+
+    def remove(self, entity_id):
+        """Elimina un registro; retorna False si no existia."""
+        with self.batch():
+            old = self.get(entity_id)
+            if old is None:
+                return False
+            self._conn.execute(
+                f'DELETE FROM {self.table} WHERE {self.key} = ?',
+                (entity_id,)
+            )
+            self._indexes.update(old, None)
+            return True
+
+    def replace(self, records):
+        """Reemplaza todos los registros en una sola transaccion."""
+        with self.batch():
+            self._conn.execute(f'DELETE FROM {self.table}')
+            self._conn.executemany(
+                self._sql['upsert'], [self._row(r) for r in records]
+            )
+            self.rebuild_indexes()
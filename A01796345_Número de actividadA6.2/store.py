@@ -0,0 +1,702 @@
+"""Almacen residente en memoria para los archivos de persistencia."""
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from fsutil import (atomic_file, atomic_write_bytes, file_signature,
+                    fsync_directory, stage_file)
+from indexes import IndexSet
+from lazy_store import LazyStore
+from locking import VERSION_FIELD, FileLock, check_version
+from metrics import IOStats
+from savepoints import Savepoints
+from snapshot import read_snapshot, source_checksum, write_snapshot
+from sqlite_store import SqliteStore
+
+
+class JsonStore:  # pylint: disable=too-many-instance-attributes
+    """Mantiene en memoria los registros de un archivo JSON.
+
+    Los registros se indexan por su id primario. El archivo solo se
+    lee cuando cambia en disco (inodo, mtime o tamano) y solo se
+    escribe cuando hay una mutacion, de forma atomica.
+
+    Con ``group_commit`` mayor a 1 las mutaciones se acumulan y se
+    escriben juntas con un solo fsync; ``batch()`` agrupa de forma
+    explicita todas las mutaciones de un bloque. El group commit
+    supone un solo proceso escritor.
+
+    Las escrituras se hacen bajo un candado de archivo y cada registro
+    lleva un contador ``version`` para detectar escrituras concurrentes.
+
+    ``index()`` registra indices secundarios que se actualizan con cada
+    mutacion y se reconstruyen cuando el archivo cambia en disco.
+
+    Con ``record_type`` (ver ``records.Record``) los registros se
+    guardan en memoria como objetos con ``__slots__`` en lugar de dicts;
+    la interfaz sigue recibiendo y retornando dicts. Si ademas se pide
+    ``snapshot``, cada escritura del JSON escribe tambien el snapshot
+    binario ``<ruta>.snap`` y al cargar se usa si corresponde al JSON;
+    si no, se regenera (ver ``snapshot``).
+
+    ``io`` (``metrics.IOStats``) cuenta las cargas y escrituras del
+    archivo con su duracion y sus bytes.
+    """
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def __init__(self, filepath, key, group_commit=1, record_type=None,
+                 snapshot=False):
+        self.filepath = filepath
+        self.key = key
+        self.group_commit = group_commit
+        self.snapshot_path = filepath + '.snap'
+        self._snapshot_type = record_type if snapshot else None
+        if record_type is None:
+            self._pack = self._unpack = dict
+        else:
+            self._pack = record_type.from_dict
+            self._unpack = record_type.to_dict
+        self._records = {}
+        self._signature = None
+        self._stale = False
+        self._pending = []
+        self._flushes = 0
+        self._batch_depth = 0
+        self._undo = None
+        self._savepoints = Savepoints()
+        self._indexes = IndexSet()
+        self.io = IOStats()
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(filepath, self._lock)
+
+    def _file_signature(self):
+        """Retorna la firma del archivo en disco o None si no existe."""
+        return file_signature(self.filepath)
+
+    def _read(self):
+        """Lee el archivo y retorna los registros indexados por id."""
+        if self._snapshot_type is None:
+            with open(self.filepath, 'r', encoding='utf-8') as file:
+                return {r[self.key]: self._pack(r) for r in json.load(file)}
+        with open(self.filepath, 'rb') as file:
+            data = file.read()
+        source = source_checksum(data)
+        records = read_snapshot(self.snapshot_path, source,
+                                self._snapshot_type)
+        if records is None:
+            records = [self._pack(r) for r in json.loads(data)]
+            self._write_snapshot(data, records)
+        return {getattr(r, self.key): r for r in records}
+
+    def _write_snapshot(self, data, records):
+        """Escribe el snapshot de records, que se escribieron como data.
+
+        Es solo un cache: si falla, la siguiente carga lee el JSON.
+        """
+        if self._snapshot_type is None:
+            return
+        try:
+            write_snapshot(self.snapshot_path, source_checksum(data),
+                           records, self._snapshot_type.__slots__)
+        except (OSError, TypeError):
+            pass
+
+    def _load(self, signature):
+        """Lee el archivo con esa firma y cuenta la carga."""
+        start = time.perf_counter()
+        records = self._read()
+        self.io.add_load(signature[2], time.perf_counter() - start)
+        return records
+
+    def _write(self):
+        """Escribe todos los registros al archivo."""
+        start = time.perf_counter()
+        records = list(self._records.values())
+        data = atomic_write_json(self.filepath,
+                                 [self._unpack(r) for r in records])
+        signature = file_signature(self.filepath)
+        self.io.add_save(signature[2] if signature else 0,
+                         time.perf_counter() - start)
+        self._write_snapshot(data, records)
+
+    def refresh(self):
+        """Recarga los registros si el archivo cambio en disco.
+
+        Mientras este proceso tiene el candado del archivo nadie mas
+        puede escribirlo, asi que no se consulta el disco.
+        """
+        with self._lock:
+            if not self._file_lock.held:
+                self._reload()
+
+    def _reload(self):
+        """Vuelve a leer el archivo si su firma cambio."""
+        with self._lock:
+            signature = self._file_signature()
+            if self._is_current(signature):
+                return
+            self._records = (self._load(signature) if signature is not None
+                             else {})
+            self._signature = signature
+            self._stale = False
+            self.rebuild_indexes()
+
+    def index(self, name, factory):
+        """Retorna el indice secundario registrado con ese nombre.
+
+        Si no existe se crea con ``factory()`` y se construye con los
+        registros actuales (ver ``indexes.IndexSet``).
+        """
+        with self._lock:
+            self.refresh()
+            return self._indexes.get(name, factory, self._records.values)
+
+    def rebuild_indexes(self):
+        """Reconstruye los indices secundarios desde los registros."""
+        self._indexes.rebuild(self._records.values())
+
+    def _set(self, entity_id, record):
+        """Guarda o elimina (record None) un registro y sus indices."""
+        old = self._records.get(entity_id)
+        if record is None:
+            del self._records[entity_id]
+        else:
+            self._records[entity_id] = record
+        self._indexes.update(old, record)
+
+    def _is_current(self, signature):
+        """Indica si la memoria refleja el archivo con esa firma."""
+        if self._stale:
+            return False
+        return signature == self._signature or bool(self._pending)
+
+    def _persist(self):
+        """Escribe los cambios y registra la nueva firma del archivo."""
+        self._write()
+        self._signature = self._file_signature()
+
+    def _commit(self, change):
+        """Registra una mutacion: ('put', registro) o ('del', id)."""
+        self._pending.append(change)
+        if (self._batch_depth == 0
+                and len(self._pending) >= self.group_commit):
+            self.flush()
+
+    def _flush(self, changes):  # pylint: disable=unused-argument
+        """Persiste las mutaciones pendientes."""
+        self._persist()
+
+    def flush(self):
+        """Escribe las mutaciones pendientes de group commit."""
+        with self._file_lock:
+            if self._pending:
+                changes, self._pending = self._pending, []
+                self._flushes += 1
+                try:
+                    self._flush(changes)
+                except BaseException:
+                    self._stale = True
+                    raise
+
+    @contextmanager
+    def locked(self):
+        """Bloquea el archivo entre procesos y recarga su contenido."""
+        first = self._file_lock.acquire()
+        try:
+            if first:
+                self._reload()
+            yield self
+        finally:
+            self._file_lock.release()
+
+    @contextmanager
+    def batch(self):
+        """Agrupa las mutaciones del bloque en una sola escritura."""
+        with self.locked():
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.flush()
+
+    @contextmanager
+    def begin(self):
+        """Participa en una transaccion de varios almacenes.
+
+        Difiere las escrituras como ``batch()`` pero sin escribir al
+        salir, y guarda la imagen previa de cada registro tocado para
+        revertirlo si la transaccion falla. Las mutaciones de group
+        commit pendientes desde antes de la transaccion se conservan.
+        """
+        with self.locked():
+            outermost = self._undo is None
+            if outermost:
+                self._undo = ({}, len(self._pending), self._flushes)
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                if outermost:
+                    self._rollback(self._undo)
+                raise
+            finally:
+                self._batch_depth -= 1
+                if outermost:
+                    self._undo = None
+
+    @contextmanager
+    def savepoint(self):
+        """Revierte solo las mutaciones del bloque si este falla."""
+        with self.locked(), self._savepoints.open(
+                self._rollback, len(self._pending), self._flushes):
+            yield self
+
+    def _remember(self, entity_id):
+        """Guarda la imagen previa del registro para poder revertirlo."""
+        record = self._records.get(entity_id)
+        if self._undo is not None:
+            self._undo[0].setdefault(entity_id, record)
+        self._savepoints.remember(entity_id, record)
+
+    def _rollback(self, mark):
+        """Restaura las imagenes previas; reescribe si ya se escribio.
+
+        ``mark`` es la marca de ``begin()`` o de ``savepoint()``; si nada
+        se escribio desde entonces basta con descartar las mutaciones
+        pendientes que se anexaron despues.
+        """
+        previous, pending, flushes = mark
+        for entity_id, record in previous.items():
+            if record is not None or entity_id in self._records:
+                self._set(entity_id, record)
+        if flushes == self._flushes:
+            del self._pending[pending:]
+        elif previous:
+            self._pending = []
+            self._persist()
+
+    def __contains__(self, entity_id):
+        with self._lock:
+            self.refresh()
+            return entity_id in self._records
+
+    def __len__(self):
+        with self._lock:
+            self.refresh()
+            return len(self._records)
+
+    def get(self, entity_id):
+        """Retorna una copia del registro o None si no existe."""
+        with self._lock:
+            self.refresh()
+            record = self._records.get(entity_id)
+            return self._unpack(record) if record is not None else None
+
+    def all(self):
+        """Retorna copias de todos los registros en orden de insercion."""
+        with self._lock:
+            self.refresh()
+            return [self._unpack(r) for r in self._records.values()]
+
+    def put(self, record, expected_version=None):
+        """Inserta o reemplaza un registro y retorna lo guardado.
+
+        Con ``expected_version`` la escritura solo procede si la version
+        actual coincide (0 si el registro no existe); si no, lanza
+        ConflictError.
+        """
+        with self.locked():
+            entity_id = record[self.key]
+            current = self._records.get(entity_id)
+            version = current.get(VERSION_FIELD, 0) if current else 0
+            check_version(entity_id, version, expected_version)
+            self._remember(entity_id)
+            record = dict(record)
+            record[VERSION_FIELD] = version + 1
+            stored = self._pack(record)
+            self._set(entity_id, stored)
+            self._commit(('put', self._unpack(stored)))
+            return self._unpack(stored)
+
+    def remove(self, entity_id):
+        """Elimina un registro; retorna False si no existia."""
+        with self.locked():
+            if entity_id not in self._records:
+                return False
+            self._remember(entity_id)
+            self._set(entity_id, None)
+            self._commit(('del', entity_id))
+            return True
+
+    def replace(self, records):
+        """Reemplaza todos los registros por los recibidos."""
+        with self._file_lock:
+            self._records = {r[self.key]: self._pack(r) for r in records}
+            self._pending = []
+            self._flushes += 1
+            self._persist()
+            self.rebuild_indexes()
+
+
+class JournalStore(JsonStore):  # pylint: disable=too-many-instance-attributes
+    """Almacen con bitacora de solo anexado y compactacion periodica.
+
+    Cada mutacion se anexa como una linea JSONL en ``<archivo>.log``.
+    Al acumular ``compact_every`` entradas la bitacora se compacta en
+    el archivo JSON, que funciona como snapshot. Al cargar se lee el
+    snapshot y se reproduce la cola de la bitacora.
+    """
+
+    COMPACT_EVERY = 1000
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def __init__(self, filepath, key, group_commit=1, compact_every=None,
+                 record_type=None, snapshot=False):
+        super().__init__(filepath, key, group_commit, record_type, snapshot)
+        self.log_path = filepath + '.log'
+        self.compact_every = compact_every or self.COMPACT_EVERY
+        self._log_entries = 0
+        self._log_offset = 0
+
+    def _file_signature(self):
+        return (file_signature(self.filepath),
+                file_signature(self.log_path))
+
+    def _replay(self, offset):
+        """Aplica las entradas de la bitacora a partir de offset."""
+        start, first = time.perf_counter(), offset
+        try:
+            with open(self.log_path, 'rb') as file:
+                file.seek(offset)
+                for line in file:
+                    if not line.endswith(b'\n'):
+                        break
+                    self._apply(json.loads(line))
+                    self._log_entries += 1
+                    offset += len(line)
+        except FileNotFoundError:
+            offset = 0
+        self._log_offset = offset
+        if offset > first:
+            self.io.add_load(offset - first, time.perf_counter() - start)
+
+    def _apply(self, entry):
+        """Aplica una entrada de la bitacora a los registros."""
+        if entry['op'] == 'put':
+            record = entry['record']
+            self._records[record[self.key]] = self._pack(record)
+        else:
+            self._records.pop(entry['id'], None)
+
+    def _only_log_grew(self, signature):
+        """Indica si solo se anexaron entradas a la bitacora conocida."""
+        if self._signature is None or signature[0] != self._signature[0]:
+            return False
+        log, old_log = signature[1], self._signature[1]
+        return (log is not None and old_log is not None
+                and log[0] == old_log[0] and log[2] >= self._log_offset)
+
+    def _reload(self):
+        with self._lock:
+            signature = self._file_signature()
+            if self._is_current(signature):
+                return
+            if not self._stale and self._only_log_grew(signature):
+                self._replay(self._log_offset)
+            else:
+                self._records = (self._load(signature[0])
+                                 if signature[0] is not None else {})
+                self._log_entries = 0
+                self._replay(0)
+            self._signature = signature
+            self._stale = False
+            self.rebuild_indexes()
+
+    def _flush(self, changes):
+        if self._log_entries + len(changes) >= self.compact_every:
+            self._persist()
+        else:
+            self._append(changes)
+
+    def _append(self, changes):
+        """Anexa las mutaciones a la bitacora con un solo fsync."""
+        start = time.perf_counter()
+        data = ''.join(
+            json.dumps(_log_entry(op, value), ensure_ascii=False) + '\n'
+            for op, value in changes
+        ).encode('utf-8')
+        with open(self.log_path, 'ab') as file:
+            if file.tell() > self._log_offset:
+                file.truncate(self._log_offset)
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        self.io.add_save(len(data), time.perf_counter() - start)
+        self._log_entries += len(changes)
+        self._log_offset += len(data)
+        self._signature = self._file_signature()
+
+    def _persist(self):
+        """Compacta: escribe el snapshot y vacia la bitacora."""
+        self._write()
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+            fsync_directory(self.log_path)
+        self._log_entries = 0
+        self._log_offset = 0
+        self._signature = self._file_signature()
+
+    def compact(self):
+        """Fuerza la compactacion de la bitacora en el snapshot."""
+        with self.locked():
+            self._pending = []
+            self._flushes += 1
+            self._persist()
+
+
+# pylint: disable-next=too-many-instance-attributes
+class WriteBehindStore(JournalStore):
+    """Bitacora durable con compactacion en segundo plano (write-behind).
+
+    Cada mutacion se anexa a la bitacora con fsync, como en
+    ``JournalStore``, pero nunca reescribe el JSON en la ruta de la
+    peticion: ``dirty`` cuenta las mutaciones anexadas y un hilo las
+    consolida en el snapshot cada ``flush_interval`` segundos, o antes
+    si hay ``max_dirty`` mutaciones o la bitacora llega a
+    ``compact_every`` entradas. Asi la latencia de una mutacion no
+    depende del numero de registros. ``checkpoint()`` consolida de
+    inmediato y ``close()`` ademas detiene el hilo.
+    """
+
+    FLUSH_INTERVAL = 1.0
+    MAX_DIRTY = 1000
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def __init__(self, filepath, key, group_commit=1, compact_every=None,
+                 record_type=None, snapshot=False, flush_interval=None,
+                 max_dirty=None):
+        super().__init__(filepath, key, group_commit, compact_every,
+                         record_type, snapshot)
+        self.flush_interval = flush_interval or self.FLUSH_INTERVAL
+        self.max_dirty = max_dirty or self.MAX_DIRTY
+        self.dirty = 0
+        self._checkpointing = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._flusher = None
+
+    def _flush(self, changes):
+        self._append(changes)
+        self.dirty += len(changes)
+        if (self.dirty >= self.max_dirty
+                or self._log_entries >= self.compact_every):
+            self._wake.set()
+        self._start_flusher()
+
+    def _persist(self):
+        super()._persist()
+        self.dirty = 0
+
+    def _start_flusher(self):
+        """Arranca el hilo de compactacion si no esta corriendo."""
+        if self._flusher is None and not self._closed:
+            self._flusher = threading.Thread(
+                target=self._run_flusher, daemon=True,
+                name=f'write-behind {os.path.basename(self.filepath)}'
+            )
+            self._flusher.start()
+
+    def _run_flusher(self):
+        """Compacta periodicamente o cuando se le despierta."""
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.checkpoint()
+            except OSError:
+                pass  # La bitacora conserva los cambios; se reintenta.
+
+    def checkpoint(self):
+        """Consolida la bitacora en el snapshot si hay mutaciones.
+
+        Bajo el candado solo se copian las referencias a los registros y
+        la posicion de la bitacora; el JSON se serializa y sincroniza sin
+        el candado, y al retomarlo se publica y la bitacora conserva solo
+        las entradas anexadas mientras tanto. Si otro proceso compacto la
+        bitacora en ese lapso el snapshot se descarta.
+        """
+        with self._checkpointing:
+            with self.locked():
+                if not self.dirty or self._batch_depth:
+                    return
+                self.flush()
+                records = list(self._records.values())
+                mark = (file_signature(self.log_path), self._log_offset,
+                        self._log_entries, self.dirty)
+            start = time.perf_counter()
+            data = json.dumps([self._unpack(r) for r in records], indent=2,
+                              ensure_ascii=False).encode('utf-8')
+            staged = stage_file(self.filepath, data)
+            try:
+                with self.locked():
+                    published = self._publish(staged, *mark)
+            finally:
+                if os.path.exists(staged):
+                    os.remove(staged)
+            self.io.add_save(len(data), time.perf_counter() - start)
+            if published:
+                self._write_snapshot(data, records)
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def _publish(self, staged, log, offset, entries, count):
+        """Reemplaza el snapshot y recorta la bitacora hasta offset.
+
+        Retorna False si la bitacora ya no es la de la marca.
+        """
+        current = file_signature(self.log_path)
+        if (log is None or current is None or current[0] != log[0]
+                or self._log_offset < offset):
+            return False
+        with open(self.log_path, 'rb') as file:
+            file.seek(offset)
+            tail = file.read(self._log_offset - offset)
+        os.replace(staged, self.filepath)
+        fsync_directory(self.filepath)
+        if tail:
+            with atomic_file(self.log_path) as file:
+                file.write(tail)
+        else:
+            os.remove(self.log_path)
+            fsync_directory(self.log_path)
+        self._log_offset = len(tail)
+        self._log_entries -= entries
+        self.dirty = max(0, self.dirty - count)
+        self._signature = self._file_signature()
+        return True
+
+    def close(self):
+        """Detiene el hilo de compactacion y consolida lo pendiente."""
+        self._closed = True
+        self._wake.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+        self.checkpoint()
+
+
+def _log_entry(op, value):
+    """Construye la entrada de bitacora de una mutacion."""
+    if op == 'put':
+        return {'op': 'put', 'record': value}
+    return {'op': 'del', 'id': value}
+
+
+STORAGES = {
+    'json': JsonStore,
+    'journal': JournalStore,
+    'sqlite': SqliteStore,
+    'lazy': LazyStore,
+    'writebehind': WriteBehindStore,
+}
+
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+_ACTIVE = threading.local()
+
+
+def atomic_write_json(filepath, data):
+    """Escribe data en filepath sin dejar nunca un archivo truncado.
+
+    Se escribe a un temporal en el mismo directorio, se sincroniza con
+    fsync y se renombra sobre el destino con ``os.replace``. Retorna el
+    contenido escrito.
+    """
+    encoded = json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+    atomic_write_bytes(filepath, encoded)
+    return encoded
+
+
+def open_stores():
+    """Retorna los almacenes abiertos con ``open_store``."""
+    with _STORES_LOCK:
+        return list(_STORES.values())
+
+
+def flush_all():
+    """Escribe las mutaciones pendientes de todos los almacenes."""
+    for store in open_stores():
+        store.flush()
+
+
+atexit.register(flush_all)
+
+
+def _lock_order(store):
+    """Orden global de bloqueo para evitar interbloqueos."""
+    return (store.filepath, getattr(store, 'table', None) or '')
+
+
+@contextmanager
+def transaction(*stores):
+    """Unidad de trabajo sobre varios almacenes.
+
+    Bloquea los almacenes en un orden fijo, difiere sus escrituras y al
+    terminar el bloque escribe cada uno. Si el bloque o alguna escritura
+    falla, todos los almacenes vuelven a su estado previo: los que aun
+    no se escribieron descartan sus cambios y los ya escritos se
+    reescriben con las imagenes previas. En SQLite las tablas de una
+    misma base se confirman en una sola transaccion.
+
+    Una transaccion anidada en otra del mismo hilo no escribe los
+    almacenes que la externa ya tiene; se escriben al terminar esta.
+    """
+    ordered = sorted({id(s): s for s in stores}.values(), key=_lock_order)
+    active = _ACTIVE.__dict__.setdefault('stores', set())
+    outer = [s for s in ordered if id(s) not in active]
+    with ExitStack() as stack:
+        for store in ordered:
+            stack.enter_context(store.begin())
+        active.update(id(s) for s in outer)
+        try:
+            yield ordered
+            for store in outer:
+                store.flush()
+        finally:
+            active.difference_update(id(s) for s in outer)
+
+
+@contextmanager
+def savepoint(*stores):
+    """Revierte solo los cambios del bloque en los almacenes si falla.
+
+    Se usa dentro de ``transaction()`` para descartar una operacion sin
+    deshacer las anteriores de la misma transaccion.
+    """
+    with ExitStack() as stack:
+        for store in stores:
+            stack.enter_context(store.savepoint())
+        yield stores
+
+
+def open_store(filepath, key, storage='json', **options):
+    """Retorna el almacen compartido para un archivo de datos.
+
+    ``options`` se pasa al constructor del almacen; ``'sqlite'``
+    requiere ``table`` y ``fields``.
+    """
+    if storage not in STORAGES:
+        raise ValueError(f"Tipo de almacenamiento desconocido: {storage}")
+    path = os.path.abspath(filepath)
+    store_id = (storage, path, options.get('table'))
+    with _STORES_LOCK:
+        store = _STORES.get(store_id)
+        if store is None:
+            store = STORAGES[storage](path, key, **options)
+            _STORES[store_id] = store
+        return store
@@ -0,0 +1,161 @@
+"""Tests para la fachada asincrona de los managers."""
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+import store
+from async_service import AsyncCustomer, AsyncHotel, AsyncReservation
+from datadir import temp_data_dir
+from hotel import Hotel
+
+
+class TestAsyncService(unittest.IsolatedAsyncioTestCase):
+    """Pruebas unitarias para AsyncHotel, AsyncCustomer y AsyncReservation."""
+
+    def setUp(self):
+        """Configuracion inicial para cada test."""
+        temp_data_dir(self)
+        self.hotel = AsyncHotel()
+        self.customer = AsyncCustomer()
+        self.reservation = AsyncReservation()
+
+    async def test_create_and_display(self):
+        """Test crear y consultar un hotel."""
+        await self.hotel.create(hotel_id='H001', name='Hotel Plaza',
+                                location='CDMX', rooms=5)
+        hotel = await self.hotel.display('H001')
+        self.assertEqual(hotel['name'], 'Hotel Plaza')
+        await self.hotel.modify('H001', name='Hotel Sol')
+        self.assertEqual((await self.hotel.display('H001'))['name'],
+                         'Hotel Sol')
+        self.assertTrue(await self.hotel.delete('H001'))
+
+    async def test_concurrent_writes_are_batched(self):
+        """Test que las escrituras concurrentes comparten escrituras."""
+        await self.hotel.create(hotel_id='H001', name='Hotel Plaza',
+                                location='CDMX', rooms=20)
+        with mock.patch('store.atomic_write_json',
+                        wraps=store.atomic_write_json) as write:
+            await asyncio.gather(
+                *(self.hotel.reserve_room('H001') for _ in range(20))
+            )
+        self.assertEqual((await self.hotel.display('H001'))['reserved_rooms'],
+                         20)
+        self.assertLess(write.call_count, 20)
+
+    async def test_concurrent_reservations_are_batched(self):
+        """Test que altas y cancelaciones concurrentes se escriben juntas."""
+        await self.hotel.create(hotel_id='H001', name='Hotel Plaza',
+                                location='CDMX', rooms=20)
+        await self.customer.create(customer_id='C001', name='Juan Perez',
+                                   email='juan@email.com')
+        ids = [f'R{n:03}' for n in range(20)]
+        with mock.patch('store.atomic_write_json',
+                        wraps=store.atomic_write_json) as write:
+            await asyncio.gather(*(
+                self.reservation.create_reservation(
+                    reservation_id, 'C001', 'H001', '2026-03-01',
+                    '2026-03-03'
+                ) for reservation_id in ids
+            ))
+        self.assertEqual(write.call_count, 2)
+        with mock.patch('store.atomic_write_json',
+                        wraps=store.atomic_write_json) as write:
+            await asyncio.gather(*(
+                self.reservation.cancel_reservation(reservation_id)
+                for reservation_id in ids
+            ))
+        self.assertEqual(write.call_count, 2)
+        self.assertEqual(Hotel().display('H001')['reserved_rooms'], 0)
+
+    async def test_failures_do_not_repeat_the_batch(self):
+        """Test que cada operacion de un lote se ejecuta una sola vez."""
+        await self.hotel.create(hotel_id='H001', name='Hotel Plaza',
+                                location='CDMX', rooms=4)
+        manager = self.hotel.manager
+        with mock.patch.object(manager, 'reserve_room',
+                               wraps=manager.reserve_room) as reserve:
+            results = await asyncio.gather(
+                *(self.hotel.reserve_room('H001') for _ in range(8)),
+                return_exceptions=True
+            )
+        self.assertEqual(reserve.call_count, 8)
+        errors = [r for r in results if isinstance(r, ValueError)]
+        self.assertEqual(len(errors), 4)
+        self.assertEqual(Hotel().display('H001')['reserved_rooms'], 4)
+
+    async def test_errors_go_to_their_caller(self):
+        """Test que el error de una operacion no afecta a las demas."""
+        await self.hotel.create(hotel_id='H001', name='Hotel Plaza',
+                                location='CDMX', rooms=2)
+        results = await asyncio.gather(
+            *(self.hotel.reserve_room('H001') for _ in range(3)),
+            return_exceptions=True
+        )
+        errors = [r for r in results if isinstance(r, ValueError)]
+        self.assertEqual(len(errors), 1)
+        self.assertEqual((await self.hotel.display('H001'))['reserved_rooms'],
+                         2)
+
+    async def test_failed_operation_writes_are_discarded(self):
+        """Test que lo escrito por una operacion fallida no se confirma."""
+        await self.hotel.create(hotel_id='H001', name='Hotel Plaza',
+                                location='CDMX', rooms=5)
+        manager = self.hotel.manager
+        writer = self.hotel._writer  # pylint: disable=protected-access
+
+        def partial():
+            manager.reserve_room('H001')
+            raise ValueError('falla despues de escribir')
+
+        results = await asyncio.gather(
+            self.hotel.reserve_room('H001'),
+            writer.submit(partial),
+            self.hotel.reserve_room('H001'),
+            return_exceptions=True
+        )
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual((await self.hotel.display('H001'))['reserved_rooms'],
+                         2)
+        self.assertEqual(Hotel().display('H001')['reserved_rooms'], 2)
+
+    async def test_reads_do_not_block_the_loop(self):
+        """Test que una lectura lenta no detiene el event loop."""
+        started = asyncio.Event()
+        loop = asyncio.get_running_loop()
+
+        def slow_display(entity_id=None):  # pylint: disable=unused-argument
+            loop.call_soon_threadsafe(started.set)
+            time.sleep(0.2)
+            return {}
+
+        with mock.patch.object(self.hotel.manager, 'display', slow_display):
+            read = asyncio.create_task(self.hotel.display())
+            await asyncio.wait_for(started.wait(), 0.1)
+            self.assertFalse(read.done())
+            self.assertEqual(await read, {})
+
+    async def test_reservations(self):
+        """Test crear, consultar y cancelar reservaciones."""
+        await self.hotel.create(hotel_id='H001', name='Hotel Plaza',
+                                location='CDMX', rooms=5)
+        await self.customer.create(customer_id='C001', name='Juan Perez',
+                                   email='juan@email.com')
+        await asyncio.gather(*(
+            self.reservation.create_reservation(
+                f'R{n:03}', 'C001', 'H001', '2026-03-01', '2026-03-03'
+            ) for n in range(3)
+        ))
+        self.assertEqual(len(await self.reservation.by_customer('C001')), 3)
+        free = await self.reservation.availability('H001', '2026-03-01',
+                                                   '2026-03-02')
+        self.assertEqual(free, {'2026-03-01': 2})
+        await self.reservation.cancel_reservation('R000')
+        self.assertEqual(len(await self.reservation.by_hotel('H001')), 2)
+        with self.assertRaises(ValueError):
+            await self.reservation.cancel_reservation('R999')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""Tests para el benchmark del sistema de reservaciones."""
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+import benchmark
+from hotel import Hotel
+
+
+class TestBenchmark(unittest.TestCase):
+    """Pruebas unitarias para el benchmark."""
+
+    def test_percentiles(self):
+        """Test percentiles por rango mas cercano."""
+        values = list(range(1, 101))
+        self.assertEqual(benchmark.percentile(values, 0.5), 50)
+        self.assertEqual(benchmark.percentile(values, 0.99), 99)
+        self.assertIsNone(benchmark.percentile([], 0.5))
+        summary = benchmark.summarize([0.002, 0.001])
+        self.assertEqual(summary['p50_ms'], 1.0)
+        self.assertEqual(summary['ops_per_s'], 666.7)
+
+    def test_run_small_size(self):
+        """Test correr un tamano chico y restaurar las rutas."""
+        data_file = Hotel.DATA_FILE
+        report = benchmark.run([20], operations=5, isolate=False)
+        self.assertEqual(Hotel.DATA_FILE, data_file)
+        result = report['results'][0]
+        self.assertEqual(result['size'], 20)
+        self.assertEqual(set(result['operations']),
+                         set(benchmark.OPERATIONS))
+        for stats in result['operations'].values():
+            self.assertEqual(stats['count'], 5)
+        json.dumps(report)
+
+    def test_compare_reports_regressions(self):
+        """Test detectar operaciones mas lentas que la base."""
+        def report(p50):
+            return {'results': [{'size': 10, 'operations': {
+                'display': {'p50_ms': p50}, 'create': {'p50_ms': 1.0}
+            }}]}
+        self.assertEqual(benchmark.compare(report(1.0), report(1.2)), [])
+        regressions = benchmark.compare(report(1.0), report(2.0))
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('display', regressions[0])
+
+    def test_main_writes_output(self):
+        """Test que la linea de comandos escribe y compara resultados."""
+        with tempfile.TemporaryDirectory() as directory, \
+                redirect_stdout(io.StringIO()):
+            output = os.path.join(directory, 'out', 'bench.json')
+            args = ['--sizes', '10', '--operations', '2',
+                    '--output', output]
+            self.assertEqual(benchmark.main(args), 0)
+            with open(output, 'r', encoding='utf-8') as file:
+                report = json.load(file)
+            self.assertEqual(report['meta']['operations'], 2)
+            result = report['results'][0]
+            self.assertEqual(result['size'], 10)
+            self.assertEqual(set(result['operations']),
+                             set(benchmark.OPERATIONS))
+            for stats in result['operations'].values():
+                self.assertEqual(stats['count'], 2)
+            baseline = os.path.join(directory, 'base.json')
+            for p50, code in ((1e6, 0), (1e-9, 1)):
+                for stats in result['operations'].values():
+                    stats['p50_ms'] = p50
+                with open(baseline, 'w', encoding='utf-8') as file:
+                    json.dump(report, file)
+                self.assertEqual(
+                    benchmark.main(args + ['--compare', baseline]), code
+                )
+
+
+if __name__ == '__main__':
+    unittest.main()
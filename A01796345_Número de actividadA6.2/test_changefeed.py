@@ -0,0 +1,198 @@
+"""Tests para el change feed de mutaciones."""
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from base_classes import PersistenceManager
+from changefeed import ChangeFeed
+from customer import Customer
+from datadir import temp_data_dir
+from hotel import Hotel
+from reservation import Reservation
+
+
+class TestChangeFeed(unittest.TestCase):
+    """Pruebas unitarias para ChangeFeed."""
+
+    def setUp(self):
+        """Configuracion inicial para cada test."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'changes.jsonl')
+        self.feed = ChangeFeed(self.path)
+
+    def tearDown(self):
+        """Limpieza despues de cada test."""
+        shutil.rmtree(self.tmpdir)
+
+    def _emit(self, feed, count):
+        for number in range(count):
+            feed.emit('hotels', 'modify', f'H{number:03d}', {'n': number})
+
+    def test_sequence_and_read(self):
+        """Test numerar eventos y leer desde una secuencia."""
+        self.assertEqual(self.feed.read(), [])
+        self._emit(self.feed, 3)
+        ChangeFeed(self.path).emit('hotels', 'delete', 'H000')
+        self._emit(self.feed, 1)
+        self.assertEqual([e['seq'] for e in self.feed.read()],
+                         [1, 2, 3, 4, 5])
+        self.assertEqual([e['seq'] for e in self.feed.read(after=2,
+                                                           limit=2)],
+                         [3, 4])
+        self.assertEqual(self.feed.read(after=3)[0]['op'], 'delete')
+        self.assertEqual(self.feed.last_seq(), 5)
+
+    def test_read_bisects_large_files(self):
+        """Test que la biseccion encuentra la secuencia pedida."""
+        with mock.patch.object(ChangeFeed, 'SEARCH_BLOCK', 64):
+            self._emit(self.feed, 200)
+            for after in (0, 1, 77, 199, 200):
+                events = self.feed.read(after, limit=1)
+                self.assertEqual([e['seq'] for e in events],
+                                 [after + 1] if after < 200 else [])
+
+    def test_torn_tail_is_overwritten(self):
+        """Test que una linea final incompleta se ignora y se reemplaza."""
+        self._emit(self.feed, 2)
+        with open(self.path, 'ab') as file:
+            file.write(b'{"seq": 3, "ent')
+        feed = ChangeFeed(self.path)
+        self.assertEqual(len(feed.read()), 2)
+        self._emit(feed, 1)
+        self.assertEqual([e['seq'] for e in feed.read()], [1, 2, 3])
+
+    def test_prune(self):
+        """Test descartar eventos procesados sin reiniciar la secuencia."""
+        self._emit(self.feed, 5)
+        self.feed.prune(3)
+        self.assertEqual([e['seq'] for e in self.feed.read()], [4, 5])
+        self.feed.prune(10)
+        self.assertEqual([e['seq'] for e in self.feed.read()], [5])
+        self._emit(ChangeFeed(self.path), 1)
+        self.assertEqual([e['seq'] for e in self.feed.read(after=4)], [5, 6])
+
+    def test_unit_publishes_on_success_only(self):
+        """Test que un bloque fallido no publica sus eventos."""
+        with self.assertRaises(RuntimeError):
+            with self.feed.unit():
+                self._emit(self.feed, 2)
+                raise RuntimeError('falla')
+        self.assertEqual(self.feed.read(), [])
+        with self.feed.unit():
+            with self.feed.unit():
+                self._emit(self.feed, 2)
+            self.assertEqual(self.feed.read(), [])
+        self.assertEqual(len(self.feed.read()), 2)
+
+    def test_failed_inner_unit_discards_its_events(self):
+        """Test que un bloque anidado fallido descarta solo sus eventos."""
+        with self.feed.unit():
+            self._emit(self.feed, 1)
+            with self.assertRaises(RuntimeError):
+                with self.feed.unit():
+                    self._emit(self.feed, 2)
+                    raise RuntimeError('falla')
+        self.assertEqual(len(self.feed.read()), 1)
+
+
+class TestManagerEvents(unittest.TestCase):
+    """Pruebas de los eventos que publican los managers."""
+
+    def setUp(self):
+        """Configuracion inicial para cada test."""
+        self.tmpdir = temp_data_dir(self)
+        self._use_tmp(PersistenceManager, 'FEED_FILE', 'changes.jsonl')
+        Hotel().create(hotel_id='H001', name='Hotel Plaza',
+                       location='CDMX', rooms=1)
+        Customer().create(customer_id='C001', name='Juan Perez',
+                          email='juan@email.com')
+
+    def _use_tmp(self, manager, attribute, name):
+        patch = mock.patch.object(manager, attribute,
+                                  os.path.join(self.tmpdir, name))
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    @staticmethod
+    def _ops(after=0):
+        return [(e['entity'], e['op'], e['id'])
+                for e in PersistenceManager.changes(after)]
+
+    def test_mutations_emit_events(self):
+        """Test el evento de cada alta, cambio, reserva y baja."""
+        Hotel().modify('H001', name='Hotel Sol')
+        Reservation().create_reservation('R001', 'C001', 'H001',
+                                         '2026-03-01', '2026-03-03')
+        Reservation().cancel_reservation('R001')
+        Customer().delete('C001')
+        self.assertEqual(self._ops(), [
+            ('hotels', 'create', 'H001'),
+            ('customers', 'create', 'C001'),
+            ('hotels', 'modify', 'H001'),
+            ('hotels', 'reserve', 'H001'),
+            ('reservations', 'create', 'R001'),
+            ('hotels', 'cancel', 'H001'),
+            ('reservations', 'cancel', 'R001'),
+            ('customers', 'delete', 'C001'),
+        ])
+        events = PersistenceManager.changes(after=2, limit=1)
+        self.assertEqual(events[0]['record']['name'], 'Hotel Sol')
+        self.assertEqual(events[0]['record']['version'], 2)
+
+    def test_cascade_delete_events(self):
+        """Test que el borrado en cascada no cuenta cancelaciones."""
+        Reservation().create_reservation('R001', 'C001', 'H001',
+                                         '2026-03-01', '2026-03-03')
+        start = len(self._ops())
+        Hotel().delete('H001', cascade=True)
+        self.assertEqual(self._ops()[start:], [
+            ('reservations', 'cancel', 'R001'),
+            ('hotels', 'delete', 'H001'),
+        ])
+        record = PersistenceManager.changes()[-1]['record']
+        self.assertEqual(record['version'], 2)
+        self.assertEqual(record['cancellations'], 0)
+
+    def test_events_follow_the_commit(self):
+        """Test que el evento se anexa ya escrito y con el almacen tomado."""
+        store = Hotel()._store()  # pylint: disable=protected-access
+        seen = []
+        append = ChangeFeed.append
+
+        def try_lock():
+            lock = store._lock  # pylint: disable=protected-access
+            seen.append(lock.acquire(blocking=False))
+
+        def check(feed, events):
+            with open(Hotel.DATA_FILE, 'r', encoding='utf-8') as file:
+                seen.append('Hotel Sol' in file.read())
+            thread = threading.Thread(target=try_lock)
+            thread.start()
+            thread.join()
+            return append(feed, events)
+
+        with mock.patch.object(ChangeFeed, 'append', check):
+            Hotel().modify('H001', name='Hotel Sol')
+        self.assertEqual(seen, [True, False])
+
+    def test_failed_operations_emit_nothing(self):
+        """Test que las operaciones fallidas o revertidas no publican."""
+        start = len(self._ops())
+        Reservation().create_reservation('R001', 'C001', 'H001',
+                                         '2026-03-01', '2026-03-03')
+        with self.assertRaises(ValueError):
+            Reservation().create_reservation('R002', 'C001', 'H001',
+                                             '2026-03-02', '2026-03-04')
+        with self.assertRaises(RuntimeError):
+            with Hotel().transaction():
+                Hotel().modify('H001', name='Hotel Sol')
+                raise RuntimeError('falla')
+        self.assertEqual(len(self._ops()), start + 2)
+        self.assertEqual(Hotel().display('H001')['name'], 'Hotel Plaza')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""Tests para la representacion columnar de reservaciones."""
+import unittest
+from unittest import mock
+
+import columns
+from columns import ReservationColumns
+
+
+def _reservation(reservation_id, hotel_id, check_in, check_out,
+                 customer_id='C001'):
+    return {'reservation_id': reservation_id, 'customer_id': customer_id,
+            'hotel_id': hotel_id, 'check_in': check_in,
+            'check_out': check_out}
+
+
+class TestReservationColumns(unittest.TestCase):
+    """Pruebas unitarias para ReservationColumns."""
+
+    def setUp(self):
+        """Configuracion inicial para cada test."""
+        self.columns = ReservationColumns()
+        self.columns.rebuild([
+            _reservation('R001', 'H001', '2026-01-30', '2026-02-02'),
+            _reservation('R002', 'H002', '2026-02-10', '2026-02-12'),
+            _reservation('R003', 'H001', '2026-02-01', '2026-02-03'),
+            _reservation('R004', 'H001', 'invalida', '2026-02-03'),
+        ])
+
+    def test_rows_and_interned_ids(self):
+        """Test que cada reservacion valida es una fila."""
+        self.assertEqual(len(self.columns), 3)
+        self.assertEqual(self.columns.hotels.values, ['H001', 'H002'])
+        self.assertEqual(list(self.columns.hotel), [0, 1, 0])
+
+    def test_room_nights(self):
+        """Test noches por hotel, con y sin rango de fechas."""
+        self.assertEqual(self.columns.room_nights(),
+                         {'H001': 5, 'H002': 2})
+        self.assertEqual(self.columns.room_nights('2026-02-01',
+                                                  '2026-02-11'),
+                         {'H001': 3, 'H002': 1})
+
+    def test_room_nights_without_numpy(self):
+        """Test el recorrido en Python puro cuando no hay NumPy."""
+        with mock.patch.object(columns, 'numpy', None):
+            self.assertEqual(self.columns.room_nights('2026-02-01'),
+                             {'H001': 3, 'H002': 2})
+
+    @unittest.skipIf(columns.numpy is None, "NumPy no esta instalado")
+    def test_room_nights_with_numpy(self):
+        """Test que el calculo con NumPy coincide con el de Python."""
+        ranges = [(None, None), ('2026-02-01', None),
+                  ('2026-02-01', '2026-02-11'), ('2026-03-01', None)]
+        for start, end in ranges:
+            vectorized = self.columns.room_nights(start, end)
+            with mock.patch.object(columns, 'numpy', None):
+                self.assertEqual(vectorized,
+                                 self.columns.room_nights(start, end))
+            self.assertTrue(all(isinstance(total, int)
+                                for total in vectorized.values()))
+
+    def test_room_nights_by_month(self):
+        """Test que una estancia se reparte entre los meses que cruza."""
+        self.assertEqual(self.columns.room_nights_by_month(), {
+            'H001': {'2026-01': 2, '2026-02': 3},
+            'H002': {'2026-02': 2},
+        })
+        self.assertEqual(self.columns.room_nights_by_month('H002'),
+                         {'H002': {'2026-02': 2}})
+        self.assertEqual(self.columns.room_nights_by_month('H999'), {})
+
+    def test_update_moves_last_row(self):
+        """Test que eliminar una fila mueve la ultima a su lugar."""
+        self.columns.update(
+            _reservation('R001', 'H001', '2026-01-30', '2026-02-02'), None
+        )
+        self.assertEqual(self.columns.ids, ['R003', 'R002'])
+        self.columns.update(
+            None, _reservation('R005', 'H003', '2026-12-31', '2027-01-01')
+        )
+        self.columns.update(
+            _reservation('R002', 'H002', '2026-02-10', '2026-02-12'), None
+        )
+        self.assertEqual(self.columns.room_nights(),
+                         {'H001': 2, 'H003': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,9 @@
 """Tests para la clase Customer."""
-import os
 import json
+import os
 import unittest
 from customer import Customer
+from datadir import temp_data_dir
 
 
 class TestCustomer(unittest.TestCase):
@@ -10,15 +11,9 @@ class TestCustomer(unittest.TestCase):
 
     def setUp(self):
         """Configuracion inicial para cada test."""
+        temp_data_dir(self)
         self.customer = Customer()
         self.test_file = self.customer.DATA_FILE
-        if os.path.exists(self.test_file):
-            os.remove(self.test_file)
-
-    def tearDown(self):
-        """Limpieza despues de cada test."""
-        if os.path.exists(self.test_file):
-            os.remove(self.test_file)
 
     def test_create_customer(self):
         """Test crear un cliente exitosamente."""
@@ -126,6 +121,17 @@ class TestCustomer(unittest.TestCase):
         with self.assertRaises(json.JSONDecodeError):
             self.customer.load_data()
 
+    def test_create_many(self):
+        """Test crear varios clientes reportando errores por fila."""
+        result = self.customer.create_many([
+            {'customer_id': 'C001', 'name': 'Juan', 'email': 'j@email.com'},
+            {'customer_id': 'C002', 'name': 'Maria'},
+            {'customer_id': 'C001', 'name': 'Otro', 'email': 'o@email.com'},
+        ])
+        self.assertEqual(len(result['created']), 1)
+        self.assertEqual([e['row'] for e in result['errors']], [2, 3])
+        self.assertEqual(len(self.customer.load_data()), 1)
+
     def test_modify_multiple_fields(self):
         """Test modificar varios campos a la vez."""
         self.customer.create(
@@ -1,7 +1,12 @@
 """Tests para la clase Hotel."""
 import os
 import json
+import tempfile
 import unittest
+from unittest import mock
+
+import store
+from datadir import temp_data_dir
 from hotel import Hotel
 
 
@@ -10,15 +15,9 @@ class TestHotel(unittest.TestCase):  # pylint: disable=too-many-public-methods
 
     def setUp(self):
         """Configuracion inicial para cada test."""
+        temp_data_dir(self)
         self.hotel = Hotel()
         self.test_file = self.hotel.DATA_FILE
-        if os.path.exists(self.test_file):
-            os.remove(self.test_file)
-
-    def tearDown(self):
-        """Limpieza despues de cada test."""
-        if os.path.exists(self.test_file):
-            os.remove(self.test_file)
 
     def test_create_hotel(self):
         """Test crear un hotel exitosamente."""
@@ -209,6 +208,48 @@ class TestHotel(unittest.TestCase):  # pylint: disable=too-many-public-methods
         with self.assertRaises(ValueError):
             self.hotel.modify('H001', rooms=1)
 
+    def test_create_many(self):
+        """Test crear varios hoteles con una sola escritura."""
+        self.hotel.create(
+            hotel_id='H001', name='Hotel Plaza',
+            location='CDMX', rooms=50
+        )
+        rows = [
+            {'hotel_id': 'H002', 'name': 'Hotel Sol',
+             'location': 'CUN', 'rooms': 100},
+            {'hotel_id': 'H001', 'name': 'Duplicado',
+             'location': 'GDL', 'rooms': 10},
+            {'hotel_id': 'H003', 'name': 'Hotel Mar', 'location': 'VER'},
+            {'hotel_id': 'H002', 'name': 'Repetido',
+             'location': 'CUN', 'rooms': 5},
+            {'hotel_id': 'H004', 'name': 'Hotel Luna',
+             'location': 'MTY', 'rooms': 20},
+        ]
+        with mock.patch('store.atomic_write_json',
+                        wraps=store.atomic_write_json) as write:
+            result = self.hotel.create_many(rows)
+        write.assert_called_once()
+        self.assertEqual([h['hotel_id'] for h in result['created']],
+                         ['H002', 'H004'])
+        self.assertEqual([e['row'] for e in result['errors']], [2, 3, 4])
+        self.assertEqual(len(self.hotel.display()), 3)
+
+    def test_import_jsonl(self):
+        """Test importar hoteles desde un archivo JSONL."""
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl',
+                                         delete=False) as f:
+            f.write('{"hotel_id": "H001", "name": "Hotel Plaza", '
+                    '"location": "CDMX", "rooms": 50}\n')
+            f.write('no es json\n')
+            f.write('\n')
+            f.write('["H002"]\n')
+        try:
+            result = self.hotel.import_jsonl(f.name)
+        finally:
+            os.remove(f.name)
+        self.assertEqual(len(result['created']), 1)
+        self.assertEqual([e['row'] for e in result['errors']], [2, 4])
+
     def test_load_corrupted_file(self):
         """Test cargar archivo JSON corrupto."""
         os.makedirs('data', exist_ok=True)
@@ -0,0 +1,88 @@
+"""Tests para el indice de llaves de idempotencia."""
+import threading
+import unittest
+
+from idempotency import IdempotencyIndex
+
+
+class TestIdempotencyIndex(unittest.TestCase):
+    """Pruebas unitarias para IdempotencyIndex."""
+
+    def setUp(self):
+        """Configuracion inicial para cada test."""
+        self.now = 0.0
+        self.index = IdempotencyIndex(ttl=10, max_entries=2,
+                                      clock=lambda: self.now)
+        self.calls = 0
+
+    def _create(self, value=1):
+        self.calls += 1
+        return {'value': value}
+
+    def test_replays_original_result(self):
+        """Test ejecutar una sola vez y retornar copias del resultado."""
+        first = self.index.run('K1', {'a': 1}, self._create)
+        first['value'] = 99
+        self.assertEqual(self.index.run('K1', {'a': 1}, self._create),
+                         {'value': 1})
+        self.assertEqual(self.calls, 1)
+        with self.assertRaises(ValueError):
+            self.index.run('K1', {'a': 2}, self._create)
+
+    def test_expires_and_bounded(self):
+        """Test que las llaves vencen y se descartan las mas antiguas."""
+        for key in ('K1', 'K2', 'K3'):
+            self.index.run(key, {}, self._create)
+        self.assertEqual(len(self.index), 2)
+        self.index.run('K1', {}, self._create)
+        self.assertEqual(self.calls, 4)
+        self.now = 10.0
+        self.assertEqual(len(self.index), 0)
+
+    def test_errors_and_rollback_not_remembered(self):
+        """Test que solo se recuerdan resultados confirmados."""
+        def fail():
+            raise ValueError("falla")
+
+        with self.assertRaises(ValueError):
+            self.index.run('K1', {}, fail)
+        with self.assertRaises(RuntimeError):
+            with self.index.unit():
+                self.index.run('K2', {}, self._create)
+                self.assertEqual(self.index.run('K2', {}, self._create),
+                                 {'value': 1})
+                raise RuntimeError("falla")
+        self.assertEqual(len(self.index), 0)
+        with self.index.unit():
+            self.index.run('K2', {}, self._create)
+        self.assertEqual(len(self.index), 1)
+        self.assertEqual(self.calls, 2)
+
+    def test_concurrent_retry_waits(self):
+        """Test que un reintento en curso espera al original."""
+        started, release = threading.Event(), threading.Event()
+        results = []
+
+        def slow():
+            started.set()
+            release.wait()
+            return self._create()
+
+        thread = threading.Thread(
+            target=lambda: results.append(self.index.run('K1', {}, slow))
+        )
+        thread.start()
+        started.wait()
+        retry = threading.Thread(
+            target=lambda: results.append(self.index.run('K1', {}, slow))
+        )
+        retry.start()
+        release.set()
+        thread.join()
+        retry.join()
+        self.assertEqual(results, [{'value': 1}, {'value': 1}])
+        self.assertEqual(self.calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
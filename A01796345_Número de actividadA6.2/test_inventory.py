@@ -0,0 +1,66 @@
+"""Tests para el inventario de habitaciones por noche."""
+import unittest
+
+from inventory import OccupancyCalendar, parse_stay
+
+
+def _reservation(reservation_id, hotel_id, check_in, check_out):
+    return {'reservation_id': reservation_id, 'hotel_id': hotel_id,
+            'check_in': check_in, 'check_out': check_out}
+
+
+class TestOccupancyCalendar(unittest.TestCase):
+    """Pruebas unitarias para OccupancyCalendar."""
+
+    def setUp(self):
+        """Configuracion inicial para cada test."""
+        self.calendar = OccupancyCalendar()
+        self.calendar.rebuild([
+            _reservation('R001', 'H001', '2026-03-01', '2026-03-04'),
+            _reservation('R002', 'H001', '2026-03-03', '2026-03-05'),
+            _reservation('R003', 'H002', '2026-03-01', '2026-03-02'),
+        ])
+
+    def test_parse_stay(self):
+        """Test convertir fechas y rechazar estancias invalidas."""
+        start, end = parse_stay('2026-03-01', '2026-03-04')
+        self.assertEqual(end - start, 3)
+        with self.assertRaises(ValueError):
+            parse_stay('2026-03-04', '2026-03-01')
+        with self.assertRaises(ValueError):
+            parse_stay('mañana', '2026-03-01')
+
+    def test_booked_per_night(self):
+        """Test contar habitaciones ocupadas por noche."""
+        self.assertEqual(
+            self.calendar.booked('H001', '2026-03-02', '2026-03-06'),
+            {'2026-03-02': 1, '2026-03-03': 2,
+             '2026-03-04': 1, '2026-03-05': 0}
+        )
+        self.assertEqual(self.calendar.peak('H001', '2026-03-01',
+                                            '2026-03-05'), 2)
+        self.assertEqual(self.calendar.peak('H003', '2026-03-01',
+                                            '2026-03-05'), 0)
+
+    def test_update(self):
+        """Test actualizar al crear, mover y eliminar reservaciones."""
+        old = _reservation('R002', 'H001', '2026-03-03', '2026-03-05')
+        new = _reservation('R002', 'H001', '2026-03-10', '2026-03-11')
+        self.calendar.update(old, new)
+        self.assertEqual(self.calendar.peak('H001', '2026-03-03',
+                                            '2026-03-04'), 1)
+        self.assertEqual(self.calendar.peak('H001', '2026-03-10',
+                                            '2026-03-11'), 1)
+        self.calendar.update(new, None)
+        self.assertEqual(self.calendar.peak('H001', '2026-03-10',
+                                            '2026-03-11'), 0)
+
+    def test_ignores_invalid_dates(self):
+        """Test ignorar reservaciones con fechas invalidas."""
+        self.calendar.update(None, _reservation('R9', 'H001', 'x', 'y'))
+        self.assertEqual(self.calendar.peak('H001', '2026-03-01',
+                                            '2026-03-02'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+"""Tests para el almacen JSONL de lectura perezosa."""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from customer import Customer
+from lazy_store import LazyStore
+from store import open_store, savepoint, transaction
+
+
+class TestLazyStore(unittest.TestCase):
+    """Pruebas unitarias para LazyStore."""
+
+    def setUp(self):
+        """Configuracion inicial para cada test."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'customers.json')
+        self.store = LazyStore(self.path, 'customer_id')
+
+    def tearDown(self):
+        """Limpieza despues de cada test."""
+        shutil.rmtree(self.tmpdir)
+
+    def _fill(self, store, count):
+        with store.batch():
+            for number in range(count):
+                store.put({'customer_id': f'C{number:03d}',
+                           'name': f'Cliente {number}'})
+
+    def test_put_get_remove(self):
+        """Test guardar, leer, reemplazar y eliminar registros."""
+        saved = self.store.put({'customer_id': 'C001', 'name': 'Ana'})
+        self.assertEqual(saved['version'], 1)
+        self.store.put({'customer_id': 'C001', 'name': 'Ana Ruiz'})
+        self.assertEqual(self.store.get('C001')['name'], 'Ana Ruiz')
+        self.assertTrue(self.store.remove('C001'))
+        self.assertFalse(self.store.remove('C001'))
+        self.assertIsNone(self.store.get('C001'))
+        self.assertEqual(len(LazyStore(self.path, 'customer_id')), 0)
+
+    def test_get_decodes_only_the_record(self):
+        """Test que una consulta puntual decodifica una sola linea."""
+        self._fill(self.store, 50)
+        store = LazyStore(self.path, 'customer_id')
+        self.assertEqual(len(store), 50)
+        with mock.patch('lazy_store.json.loads',
+                        wraps=json.loads) as loads:
+            self.assertEqual(store.get('C025')['name'], 'Cliente 25')
+        self.assertEqual(loads.call_count, 1)
+
+    def test_offsets_index_is_reused(self):
+        """Test que el arranque usa el indice guardado y sigue la cola."""
+        with mock.patch.object(LazyStore, 'INDEX_EVERY', 10):
+            self._fill(self.store, 20)
+        self.store.put({'customer_id': 'C100', 'name': 'Nuevo'})
+        self.assertTrue(os.path.exists(self.store.index_path))
+        store = LazyStore(self.path, 'customer_id')
+        with mock.patch('lazy_store.json.loads',
+                        wraps=json.loads) as loads:
+            self.assertEqual(len(store), 21)
+        entries = [call for call in loads.call_args_list
+                   if isinstance(call.args[0], bytes)]
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(store.get('C100')['name'], 'Nuevo')
+
+    def test_stale_offsets_index_is_ignored(self):
+        """Test que un indice de otro archivo no se usa."""
+        with mock.patch.object(LazyStore, 'INDEX_EVERY', 1):
+            self.store.put({'customer_id': 'C001', 'name': 'Ana'})
+        os.remove(self.store.data_path)
+        LazyStore(self.path, 'customer_id').put(
+            {'customer_id': 'C002', 'name': 'Beto'})
+        store = LazyStore(self.path, 'customer_id')
+        self.assertIsNone(store.get('C001'))
+        self.assertEqual(store.get('C002')['name'], 'Beto')
+
+    def test_sees_other_writers(self):
+        """Test que se indexa lo anexado por otra instancia."""
+        self.store.put({'customer_id': 'C001', 'name': 'Ana'})
+        other = LazyStore(self.path, 'customer_id')
+        other.put({'customer_id': 'C002', 'name': 'Beto'})
+        other.remove('C001')
+        self.assertNotIn('C001', self.store)
+        self.assertEqual(self.store.get('C002')['name'], 'Beto')
+
+    def test_transaction_rollback_truncates(self):
+        """Test que una transaccion fallida deja el archivo igual."""
+        self.store.put({'customer_id': 'C001', 'name': 'Ana'})
+        size = os.path.getsize(self.store.data_path)
+        with self.assertRaises(RuntimeError):
+            with transaction(self.store):
+                self.store.put({'customer_id': 'C001', 'name': 'Otra'})
+                self.store.put({'customer_id': 'C002', 'name': 'Beto'})
+                raise RuntimeError('falla')
+        self.assertEqual(os.path.getsize(self.store.data_path), size)
+        self.assertEqual(self.store.get('C001')['name'], 'Ana')
+        self.assertNotIn('C002', self.store)
+
+    def test_savepoint_truncates_only_its_block(self):
+        """Test que un savepoint fallido conserva lo previo del bloque."""
+        with transaction(self.store):
+            self.store.put({'customer_id': 'C001', 'name': 'Ana'})
+            with self.assertRaises(RuntimeError):
+                with savepoint(self.store):
+                    self.store.put({'customer_id': 'C001', 'name': 'Otra'})
+                    self.store.put({'customer_id': 'C002', 'name': 'Beto'})
+                    raise RuntimeError('falla')
+        store = LazyStore(self.path, 'customer_id')
+        self.assertEqual(store.get('C001')['name'], 'Ana')
+        self.assertNotIn('C002', store)
+
+    def test_compaction(self):
+        """Test compactar cuando dominan las entradas muertas."""
+        with mock.patch.object(LazyStore, 'COMPACT_MIN', 10):
+            for _ in range(3):
+                self._fill(self.store, 4)
+        with open(self.store.data_path, 'rb') as file:
+            self.assertEqual(len(file.readlines()), 4)
+        store = LazyStore(self.path, 'customer_id')
+        self.assertEqual(store.get('C003')['version'], 3)
+        self.assertEqual(len(store), 4)
+
+    def test_registered_storage(self):
+        """Test que open_store y los managers usan el almacen."""
+        self.assertIsInstance(open_store(self.path, 'customer_id', 'lazy'),
+                              LazyStore)
+        with mock.patch.object(Customer, 'STORAGE', 'lazy'), \
+                mock.patch.object(Customer, 'DATA_FILE', self.path):
+            customers = Customer()
+            customers.create(customer_id='C001', name='Ana',
+                             email='ana@example.com')
+            customers.modify('C001', name='Ana Ruiz')
+            self.assertEqual(customers.display('C001')['name'], 'Ana Ruiz')
+        self.assertTrue(os.path.exists(self.path + 'l'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+"""Tests para el bloqueo entre procesos y el control de versiones."""
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+from datadir import data_dir
+from hotel import Hotel
+from locking import ConflictError, FileLock, check_version
+from store import JsonStore
+
+
+def _book_rooms(attempts, results):
+    """Intenta reservar habitaciones desde otro proceso."""
+    hotel = Hotel()
+    booked = 0
+    for _ in range(attempts):
+        try:
+            hotel.reserve_room('H001')
+            booked += 1
+        except ValueError:
+            pass
+    results.put(booked)
+
+
+class TestLocking(unittest.TestCase):
+    """Pruebas unitarias para FileLock y versiones."""
+
+    def setUp(self):
+        """Configuracion inicial para cada test."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'hotels.json')
+
+    def tearDown(self):
+        """Limpieza despues de cada test."""
+        shutil.rmtree(self.tmpdir)
+
+    def test_file_lock_is_reentrant(self):
+        """Test adquirir el candado varias veces en el mismo hilo."""
+        lock = FileLock(self.path)
+        self.assertTrue(lock.acquire())
+        self.assertFalse(lock.acquire())
+        lock.release()
+        lock.release()
+        self.assertTrue(os.path.exists(self.path + '.lock'))
+
+    def test_check_version(self):
+        """Test detectar una version distinta a la esperada."""
+        check_version('A', 3, None)
+        check_version('A', 3, 3)
+        with self.assertRaises(ConflictError):
+            check_version('A', 3, 2)
+
+    def test_put_detects_stale_version(self):
+        """Test que una escritura con version vieja es rechazada."""
+        store = JsonStore(self.path, 'hotel_id')
+        first = store.put({'hotel_id': 'H001', 'rooms': 1})
+        store.put(dict(first, rooms=2), expected_version=1)
+        with self.assertRaises(ConflictError):
+            store.put(dict(first, rooms=3), expected_version=1)
+        self.assertEqual(store.get('H001')['rooms'], 2)
+        self.assertEqual(store.get('H001')['version'], 2)
+
+    def test_put_sees_writes_from_other_store(self):
+        """Test que el candado recarga cambios de otro escritor."""
+        store = JsonStore(self.path, 'hotel_id')
+        other = JsonStore(self.path, 'hotel_id')
+        store.put({'hotel_id': 'H001', 'rooms': 1})
+        other.put({'hotel_id': 'H002', 'rooms': 1})
+        store.put({'hotel_id': 'H003', 'rooms': 1})
+        self.assertEqual(len(JsonStore(self.path, 'hotel_id')), 3)
+
+    @unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(),
+                         'requiere fork')
+    def test_concurrent_reservations_do_not_overbook(self):
+        """Test que varios procesos no sobrevenden habitaciones."""
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        with data_dir(self.tmpdir):
+            hotel = Hotel()
+            hotel.create(hotel_id='H001', name='Hotel Plaza',
+                         location='CDMX', rooms=20)
+            workers = [
+                context.Process(target=_book_rooms, args=(10, results))
+                for _ in range(4)
+            ]
+            for worker in workers:
+                worker.start()
+            booked = sum(results.get(timeout=30) for _ in workers)
+            for worker in workers:
+                worker.join()
+            self.assertEqual(booked, 20)
+            self.assertEqual(hotel.display('H001')['reserved_rooms'], 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
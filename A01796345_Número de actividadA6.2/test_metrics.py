@@ -0,0 +1,109 @@
+"""Tests para las metricas de operaciones y de E/S."""
+import os
+import unittest
+from unittest import mock
+
+from base_classes import PersistenceManager
+from datadir import temp_data_dir
+from hotel import Hotel
+from lazy_store import LazyStore
+from metrics import IOStats, Metrics
+from store import JournalStore, JsonStore
+
+
+class TestMetrics(unittest.TestCase):
+    """Pruebas unitarias para Metrics e IOStats."""
+
+    def setUp(self):
+        """Configuracion inicial para cada test."""
+        self.tmpdir = temp_data_dir(self)
+        self.metrics = Metrics(buckets=(0.1, 1.0))
+        patch = mock.patch.object(PersistenceManager, 'METRICS',
+                                  self.metrics)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def _path(self, name):
+        return os.path.join(self.tmpdir, name)
+
+    def test_histogram_render(self):
+        """Test las cubetas acumuladas, la suma y los errores."""
+        self.metrics.observe('hotels', 'create', 0.05)
+        self.metrics.observe('hotels', 'create', 0.5)
+        self.metrics.observe('hotels', 'create', 3.0, error=True)
+        text = self.metrics.render()
+        labels = 'entity="hotels",operation="create"'
+        name = 'reservation_operation_seconds'
+        self.assertIn(f'{name}_bucket{{{labels},le="0.1"}} 1\n', text)
+        self.assertIn(f'{name}_bucket{{{labels},le="1.0"}} 2\n', text)
+        self.assertIn(f'{name}_bucket{{{labels},le="+Inf"}} 3\n', text)
+        self.assertIn(f'{name}_sum{{{labels}}} 3.55\n', text)
+        self.assertIn(f'{name}_count{{{labels}}} 3\n', text)
+        self.assertIn(
+            f'reservation_operation_errors_total{{{labels}}} 1\n', text
+        )
+
+    def test_label_values_are_escaped(self):
+        """Test escapar diagonales, comillas y saltos de linea."""
+        self.metrics.observe('hotels', 'say "hola"\nC:\\x', 0.05)
+        text = self.metrics.render()
+        self.assertIn('operation="say \\"hola\\"\\nC:\\\\x"', text)
+        for line in text.splitlines():
+            self.assertTrue(line.startswith(('#', 'reservation_')), line)
+
+    def test_manager_operations(self):
+        """Test que las operaciones del manager se miden y se trazan."""
+        traces = []
+        self.metrics.add_listener(
+            lambda *observation: traces.append(observation[:2])
+        )
+        hotel = Hotel()
+        hotel.create(hotel_id='H001', name='Hotel Plaza', location='CDMX',
+                     rooms=1)
+        hotel.reserve_room('H001')
+        with self.assertRaises(ValueError):
+            hotel.reserve_room('H001')
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot['hotels', 'create']['count'], 1)
+        self.assertEqual(snapshot['hotels', 'reserve_room']['count'], 2)
+        self.assertEqual(snapshot['hotels', 'reserve_room']['errors'], 1)
+        self.assertEqual(traces[0], ('hotels', 'create'))
+        self.metrics.reset()
+        self.assertEqual(self.metrics.snapshot(), {})
+
+    def test_disabled(self):
+        """Test que con METRICS en None no se mide nada."""
+        with mock.patch.object(PersistenceManager, 'METRICS', None):
+            Hotel().create(hotel_id='H001', name='Hotel Plaza',
+                           location='CDMX', rooms=1)
+            self.assertEqual(PersistenceManager.metrics_text(), '')
+        self.assertEqual(self.metrics.snapshot(), {})
+
+    def test_store_io(self):
+        """Test los bytes leidos y escritos por cada tipo de almacen."""
+        for store_type in (JsonStore, JournalStore, LazyStore):
+            filepath = self._path(f'{store_type.__name__}.json')
+            store = store_type(filepath, 'hotel_id')
+            store.put({'hotel_id': 'H001', 'name': 'Hotel Plaza'})
+            self.assertEqual(store.io.saves, 1)
+            self.assertGreater(store.io.written_bytes, 0)
+            reader = store_type(filepath, 'hotel_id')
+            self.assertEqual(reader.get('H001')['name'], 'Hotel Plaza')
+            self.assertEqual(reader.io.loads, 1)
+            self.assertGreater(reader.io.read_bytes, 0)
+
+    def test_write_file(self):
+        """Test exportar las metricas de E/S a un archivo de texto."""
+        store = JsonStore(self._path('hotels.json'), 'hotel_id')
+        store.io = IOStats(saves=2, written_bytes=128)
+        filepath = self._path('metrics.prom')
+        self.metrics.write(filepath, [store])
+        with open(filepath, 'r', encoding='utf-8') as file:
+            text = file.read()
+        self.assertIn('reservation_store_written_bytes_total'
+                      f'{{file="{store.filepath}"}} 128\n', text)
+        self.assertIn('# TYPE reservation_store_saves_total counter', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+"""Tests para la paginacion y el recorrido por streaming."""
+import os
+import unittest
+from unittest import mock
+
+import base_classes
+from base_classes import PersistenceManager
+from datadir import temp_data_dir
+from hotel import Hotel
+from indexes import SortedIndex
+
+
+class TestSortedIndex(unittest.TestCase):
+    """Pruebas unitarias para SortedIndex."""
+
+    def test_order_and_updates(self):
+        """Test ordenar por campo e id y reubicar al cambiar."""
+        index = SortedIndex('city', 'id')
+        index.rebuild([{'id': 'B', 'city': 'X'}, {'id': 'A', 'city': 'Y'},
+                       {'id': 'C', 'city': None}])
+        self.assertEqual([e[1] for e in index.after()], ['C', 'B', 'A'])
+        index.update({'id': 'A', 'city': 'Y'}, {'id': 'A', 'city': 'W'})
+        index.update({'id': 'C', 'city': None}, None)
+        self.assertEqual([e[1] for e in index.after()], ['A', 'B'])
+        first = index.after(limit=1)[0]
+        self.assertEqual([e[1] for e in index.after(first)], ['B'])
+        self.assertEqual(len(index), 2)
+
+
+class TestPagination(unittest.TestCase):
+    """Pruebas unitarias para page y scan de los managers."""
+
+    def setUp(self):
+        """Configuracion inicial para cada test."""
+        self.tmpdir = temp_data_dir(self)
+        patch = mock.patch.object(PersistenceManager, 'FEED_FILE',
+                                  os.path.join(self.tmpdir, 'changes.jsonl'))
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.hotel = Hotel()
+        self.hotel.create_many([
+            {'hotel_id': f'H{number:03d}', 'name': f'Hotel {number}',
+             'location': ('CDMX', 'GDL', 'MTY')[number % 3],
+             'rooms': 10 - number % 4}
+            for number in range(30)
+        ])
+
+    def _walk_pages(self, limit, **options):
+        ids, cursor = [], None
+        while True:
+            page = self.hotel.page(limit, cursor, **options)
+            ids.extend(h['hotel_id'] for h in page['results'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                return ids
+
+    def test_pages_by_id(self):
+        """Test recorrer todas las paginas en orden de id."""
+        first = self.hotel.page(7)
+        self.assertEqual(len(first['results']), 7)
+        self.assertIsNotNone(first['next_cursor'])
+        self.assertEqual(self._walk_pages(7),
+                         [f'H{number:03d}' for number in range(30)])
+        self.assertIsNone(self.hotel.page(30)['next_cursor'])
+
+    def test_filter_and_order(self):
+        """Test filtrar por igualdad y ordenar por otro campo."""
+        cdmx = self._walk_pages(4, where={'location': 'CDMX'})
+        self.assertEqual(cdmx, [f'H{number:03d}'
+                                for number in range(0, 30, 3)])
+        by_rooms = self._walk_pages(4, where={'location': 'GDL'},
+                                    order_by='rooms')
+        expected = sorted(
+            (h for h in self.hotel.display() if h['location'] == 'GDL'),
+            key=lambda h: (h['rooms'], h['hotel_id'])
+        )
+        self.assertEqual(by_rooms, [h['hotel_id'] for h in expected])
+
+    def test_scan_is_lazy_and_sees_changes(self):
+        """Test que scan entrega por tramos y ve los cambios."""
+        with mock.patch.object(base_classes, 'SCAN_CHUNK', 4):
+            records = self.hotel.scan(order_by='name')
+            first = next(records)
+            self.hotel.delete('H029')
+            self.hotel.create(hotel_id='H100', name='Hotel 99',
+                              location='CDMX', rooms=1)
+            names = [first['name']] + [h['name'] for h in records]
+        self.assertEqual(len(names), 30)
+        self.assertEqual(names, sorted(names))
+        self.assertIn('Hotel 99', names)
+        self.assertNotIn('Hotel 29', names)
+
+    def test_invalid_arguments(self):
+        """Test rechazar limite, cursor o campos invalidos."""
+        for options in ({'limit': 0}, {'cursor': 'x'},
+                        {'order_by': 'price'}, {'where': {'price': 1}}):
+            with self.assertRaises(ValueError):
+                self.hotel.page(**options)
+
+
+if __name__ == '__main__':
+    unittest.main()
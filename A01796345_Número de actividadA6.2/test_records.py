@@ -0,0 +1,69 @@
+"""Tests para los tipos de registro compactos."""
+import os
+import shutil
+import tempfile
+import unittest
+
+from records import HotelRecord, ReservationRecord
+from store import JournalStore, JsonStore
+
+
+class TestRecords(unittest.TestCase):
+    """Pruebas unitarias para Record y su uso en los almacenes."""
+
+    def setUp(self):
+        """Configuracion inicial para cada test."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'hotels.json')
+
+    def tearDown(self):
+        """Limpieza despues de cada test."""
+        shutil.rmtree(self.tmpdir)
+
+    def test_round_trip(self):
+        """Test convertir un registro a dict y de regreso."""
+        data = {'hotel_id': 'H001', 'name': 'Hotel Plaza',
+                'location': 'CDMX', 'rooms': 5, 'reserved_rooms': 1,
+                'cancellations': 0, 'version': 3}
+        record = HotelRecord.from_dict(data)
+        self.assertEqual(record.to_dict(), data)
+        self.assertFalse(hasattr(record, '__dict__'))
+
+    def test_missing_and_unknown_fields(self):
+        """Test valores por defecto y llaves que no son campos."""
+        record = HotelRecord.from_dict({'hotel_id': 'H001', 'stars': 4})
+        self.assertEqual(record.version, 0)
+        self.assertEqual(record.reserved_rooms, 0)
+        self.assertEqual(record.to_dict()['stars'], 4)
+        self.assertEqual(record.get('stars'), 4)
+        self.assertEqual(record['stars'], 4)
+        self.assertNotIn('stars', HotelRecord.FIELDS)
+        self.assertNotIn('extra', HotelRecord.FIELDS)
+
+    def test_mapping_access(self):
+        """Test leer campos como en un dict."""
+        record = ReservationRecord(reservation_id='R001', hotel_id='H001')
+        self.assertEqual(record['hotel_id'], 'H001')
+        self.assertEqual(record.get('check_in', 'x'), None)
+        self.assertEqual(record.get('to_dict', 'x'), 'x')
+        with self.assertRaises(KeyError):
+            _ = record['to_dict']
+
+    def test_store_keeps_records_compact(self):
+        """Test que el almacen guarda registros y entrega dicts."""
+        for store_type in (JsonStore, JournalStore):
+            store = store_type(self.path, 'hotel_id',
+                               record_type=HotelRecord)
+            saved = store.put({'hotel_id': 'H001', 'rooms': 5,
+                               'stars': 4})
+            self.assertEqual(saved['version'], 1)
+            self.assertIsInstance(store.get('H001'), dict)
+            reloaded = store_type(self.path, 'hotel_id',
+                                  record_type=HotelRecord)
+            self.assertEqual(reloaded.all(), [saved])
+            self.assertEqual(reloaded.get('H001')['stars'], 4)
+            store.remove('H001')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""Tests para los reportes de ocupacion y cancelaciones."""
+import unittest
+
+from customer import Customer
+from datadir import temp_data_dir
+from hotel import Hotel
+from inventory import StayStats
+from reporting import Reports
+from reservation import Reservation
+
+
+class TestReports(unittest.TestCase):
+    """Pruebas unitarias para Reports y StayStats."""
+
+    def setUp(self):
+        """Configuracion inicial para cada test."""
+        temp_data_dir(self)
+        self.hotel = Hotel()
+        self.reservation = Reservation()
+        self.hotel.create(hotel_id='H001', name='Hotel Plaza',
+                          location='CDMX', rooms=2)
+        self.hotel.create(hotel_id='H002', name='Hotel Sol',
+                          location='GDL', rooms=4)
+        Customer().create(customer_id='C001', name='Juan Perez',
+                          email='juan@email.com')
+        for reservation_id, hotel_id, check_in, check_out in [
+                ('R001', 'H001', '2026-03-01', '2026-03-03'),
+                ('R002', 'H001', '2026-03-02', '2026-03-06'),
+                ('R003', 'H002', '2026-03-31', '2026-04-02')]:
+            self.reservation.create_reservation(
+                reservation_id, 'C001', hotel_id, check_in, check_out
+            )
+        self.reports = Reports(self.hotel, self.reservation)
+
+    def test_occupancy_per_night(self):
+        """Test la tasa de ocupacion de cada noche."""
+        self.assertEqual(
+            self.reports.occupancy('H001', '2026-03-01', '2026-03-04'),
+            {'2026-03-01': 0.5, '2026-03-02': 1.0, '2026-03-03': 0.5}
+        )
+
+    def test_occupancy_counts_undated_rooms(self):
+        """Test que una reserva sin fechas ocupa todas las noches."""
+        self.hotel.reserve_room('H002')
+        self.assertEqual(
+            self.reports.occupancy('H002', '2026-03-30', '2026-04-01'),
+            {'2026-03-30': 0.25, '2026-03-31': 0.5}
+        )
+
+    def test_occupancy_per_week_and_month(self):
+        """Test agrupar la ocupacion por semana ISO y por mes."""
+        self.assertEqual(
+            self.reports.occupancy('H001', '2026-03-01', '2026-03-08',
+                                   period='week'),
+            {'2026-W09': 0.5, '2026-W10': 0.4167}
+        )
+        self.assertEqual(
+            self.reports.occupancy('H002', '2026-03-31', '2026-04-02',
+                                   period='month'),
+            {'2026-03': 0.25, '2026-04': 0.25}
+        )
+        with self.assertRaises(ValueError):
+            self.reports.occupancy('H001', '2026-03-01', '2026-03-08',
+                                   period='year')
+
+    def test_average_stay_and_cancellations(self):
+        """Test que los agregados siguen las altas y cancelaciones."""
+        self.assertEqual(self.reports.average_stay('H001'), 3.0)
+        self.assertEqual(self.reports.average_stay(), 2.67)
+        self.reservation.cancel_reservation('R002')
+        self.assertEqual(self.reports.average_stay('H001'), 2.0)
+        self.assertEqual(self.reports.cancellations('H001'), 1)
+        self.assertEqual(self.reports.cancellations(), 1)
+        self.assertEqual(self.reports.summary('H001'), {
+            'hotel_id': 'H001', 'reservations': 1, 'room_nights': 2,
+            'average_stay': 2.0, 'cancellations': 1,
+        })
+        self.assertEqual(self.reports.average_stay('H999'), 0.0)
+
+    def test_stay_stats_rebuild(self):
+        """Test construir los agregados en una sola pasada."""
+        stats = StayStats()
+        stats.rebuild(self.reservation.load_data())
+        self.assertEqual(stats.totals('H001'), (2, 6))
+        self.assertEqual(stats.totals(), (3, 8))
+
+
+if __name__ == '__main__':
+    unittest.main()
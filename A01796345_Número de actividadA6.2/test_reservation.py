@@ -1,28 +1,30 @@
 """Tests para la clase Reservation."""
-import os
 import json
+import os
 import unittest
+from unittest import mock
+
+import sqlite_store
+import store
+from base_classes import PersistenceManager
 from reservation import Reservation
 from hotel import Hotel
 from customer import Customer
+from datadir import temp_data_dir
+from idempotency import IdempotencyIndex
 
 
 class TestReservation(unittest.TestCase):
     """Pruebas unitarias para Reservation."""
 
+    # pylint: disable=too-many-public-methods
+
     def setUp(self):
         """Configuracion inicial para cada test."""
+        temp_data_dir(self)
         self.reservation = Reservation()
         self.hotel = Hotel()
         self.customer = Customer()
-        self.files = [
-            self.reservation.DATA_FILE,
-            self.hotel.DATA_FILE,
-            self.customer.DATA_FILE
-        ]
-        for f in self.files:
-            if os.path.exists(f):
-                os.remove(f)
         self.hotel.create(
             hotel_id='H001', name='Hotel Plaza',
             location='CDMX', rooms=5
@@ -32,12 +34,6 @@ class TestReservation(unittest.TestCase):
             email='juan@email.com'
         )
 
-    def tearDown(self):
-        """Limpieza despues de cada test."""
-        for f in self.files:
-            if os.path.exists(f):
-                os.remove(f)
-
     def test_create_reservation(self):
         """Test crear una reservacion exitosamente."""
         result = self.reservation.create_reservation(
@@ -136,8 +132,201 @@ class TestReservation(unittest.TestCase):
         )
         with self.assertRaises(ValueError):
             self.reservation.create_reservation(
-                'R002', 'C001', 'H002', '2026-04-01', '2026-04-05'
+                'R002', 'C001', 'H002', '2026-03-04', '2026-03-07'
+            )
+
+    def test_create_reservation_full_hotel_other_dates(self):
+        """Test reservar fechas libres en un hotel lleno en otras."""
+        self.hotel.create(
+            hotel_id='H002', name='Hotel Chico',
+            location='GDL', rooms=1
+        )
+        self.reservation.create_reservation(
+            'R001', 'C001', 'H002', '2026-03-01', '2026-03-05'
+        )
+        self.reservation.create_reservation(
+            'R002', 'C001', 'H002', '2026-03-05', '2026-03-07'
+        )
+        self.reservation.cancel_reservation('R001')
+        self.reservation.create_reservation(
+            'R003', 'C001', 'H002', '2026-03-02', '2026-03-04'
+        )
+
+    def test_create_reservation_invalid_dates(self):
+        """Test crear reservacion con fechas invalidas."""
+        with self.assertRaises(ValueError):
+            self.reservation.create_reservation(
+                'R001', 'C001', 'H001', '01/03/2026', '2026-03-05'
+            )
+        with self.assertRaises(ValueError):
+            self.reservation.create_reservation(
+                'R001', 'C001', 'H001', '2026-03-05', '2026-03-05'
+            )
+
+    def test_availability(self):
+        """Test consultar habitaciones libres por noche."""
+        self.reservation.create_reservation(
+            'R001', 'C001', 'H001', '2026-03-01', '2026-03-03'
+        )
+        result = self.reservation.availability(
+            'H001', '2026-03-02', '2026-03-04'
+        )
+        self.assertEqual(result, {'2026-03-02': 4, '2026-03-03': 5})
+
+    def test_create_reservation_single_load_and_write(self):
+        """Test que crear reservacion no recarga y escribe dos archivos."""
+        with mock.patch('store.json.load') as load, \
+                mock.patch('store.atomic_write_json',
+                           wraps=store.atomic_write_json) as write:
+            self.reservation.create_reservation(
+                'R001', 'C001', 'H001', '2026-03-01', '2026-03-05'
+            )
+        load.assert_not_called()
+        self.assertEqual(
+            sorted(os.path.basename(c.args[0]) for c in write.call_args_list),
+            ['hotels.json', 'reservations.json']
+        )
+
+    def test_create_reservation_rolls_back_hotel(self):
+        """Test que si falla guardar la reservacion se revierte el hotel."""
+        original_write = store.atomic_write_json
+
+        def failing_write(filepath, data):
+            if filepath.endswith('reservations.json'):
+                raise OSError('disco lleno')
+            original_write(filepath, data)
+
+        with mock.patch('store.atomic_write_json', side_effect=failing_write):
+            with self.assertRaises(OSError):
+                self.reservation.create_reservation(
+                    'R001', 'C001', 'H001', '2026-03-01', '2026-03-05'
+                )
+        self.assertEqual(self.hotel.display('H001')['reserved_rooms'], 0)
+        with open(self.hotel.DATA_FILE, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)[0]['reserved_rooms'], 0)
+        self.assertEqual(self.reservation.load_data(), [])
+
+    def test_create_reservation_error_leaves_no_changes(self):
+        """Test que un error de validacion no modifica los almacenes."""
+        self.reservation.create_reservation(
+            'R001', 'C001', 'H001', '2026-03-01', '2026-03-05'
+        )
+        with self.assertRaises(ValueError):
+            self.reservation.create_reservation(
+                'R001', 'C001', 'H001', '2026-03-01', '2026-03-05'
             )
+        self.assertEqual(self.hotel.display('H001')['reserved_rooms'], 1)
+
+    def test_create_many(self):
+        """Test crear varias reservaciones en una sola transaccion."""
+        result = self.reservation.create_many([
+            {'reservation_id': 'R001', 'customer_id': 'C001',
+             'hotel_id': 'H001', 'check_in': '2026-03-01',
+             'check_out': '2026-03-05'},
+            {'reservation_id': 'R002', 'customer_id': 'C999',
+             'hotel_id': 'H001', 'check_in': '2026-03-01',
+             'check_out': '2026-03-05'},
+            {'reservation_id': 'R001', 'customer_id': 'C001',
+             'hotel_id': 'H001', 'check_in': '2026-04-01',
+             'check_out': '2026-04-05'},
+            {'reservation_id': 'R003', 'customer_id': 'C001',
+             'hotel_id': 'H001', 'check_in': '2026-05-01',
+             'check_out': '2026-05-05'},
+        ])
+        self.assertEqual([r['reservation_id'] for r in result['created']],
+                         ['R001', 'R003'])
+        self.assertEqual([e['row'] for e in result['errors']], [2, 3])
+        self.assertEqual(self.hotel.display('H001')['reserved_rooms'], 2)
+
+    def test_by_customer_and_by_hotel(self):
+        """Test consultar reservaciones por cliente y por hotel."""
+        self.hotel.create(hotel_id='H002', name='Hotel Sol',
+                          location='GDL', rooms=5)
+        self.customer.create(customer_id='C002', name='Ana Lopez',
+                             email='ana@email.com')
+        self.reservation.create_reservation(
+            'R002', 'C001', 'H002', '2026-03-01', '2026-03-05'
+        )
+        self.reservation.create_reservation(
+            'R001', 'C001', 'H001', '2026-03-01', '2026-03-05'
+        )
+        self.reservation.create_reservation(
+            'R003', 'C002', 'H001', '2026-03-01', '2026-03-05'
+        )
+        records = self.reservation.by_customer('C001')
+        self.assertEqual([r['reservation_id'] for r in records],
+                         ['R001', 'R002'])
+        self.assertEqual(
+            [r['reservation_id'] for r in self.reservation.by_hotel('H001')],
+            ['R001', 'R003']
+        )
+        self.reservation.cancel_reservation('R001')
+        self.assertEqual(
+            [r['reservation_id'] for r in self.reservation.by_hotel('H001')],
+            ['R003']
+        )
+        self.assertEqual(self.reservation.by_customer('C999'), [])
+
+    def test_delete_hotel_with_reservations(self):
+        """Test que eliminar un hotel con reservaciones se rechaza."""
+        self.reservation.create_reservation(
+            'R001', 'C001', 'H001', '2026-03-01', '2026-03-05'
+        )
+        with self.assertRaises(ValueError):
+            self.hotel.delete('H001')
+        self.assertEqual(len(self.reservation.by_hotel('H001')), 1)
+        self.assertEqual(self.hotel.display('H001')['reserved_rooms'], 1)
+
+    def test_delete_hotel_cascade(self):
+        """Test eliminar un hotel junto con sus reservaciones."""
+        self.reservation.create_reservation(
+            'R001', 'C001', 'H001', '2026-03-01', '2026-03-05'
+        )
+        self.assertTrue(self.hotel.delete('H001', cascade=True))
+        self.assertEqual(self.reservation.load_data(), [])
+        self.assertEqual(self.reservation.by_customer('C001'), [])
+
+    def test_delete_customer_cascade_releases_rooms(self):
+        """Test que eliminar un cliente cancela sus reservaciones."""
+        self.reservation.create_reservation(
+            'R001', 'C001', 'H001', '2026-03-01', '2026-03-05'
+        )
+        with self.assertRaises(ValueError):
+            self.customer.delete('C001')
+        self.customer.delete('C001', cascade=True)
+        self.assertEqual(self.reservation.by_hotel('H001'), [])
+        self.assertEqual(self.hotel.display('H001')['reserved_rooms'], 0)
+
+    def test_delete_many_hotels(self):
+        """Test eliminar varios hoteles en una sola transaccion."""
+        self.hotel.create(hotel_id='H002', name='Hotel Sol',
+                          location='GDL', rooms=5)
+        self.reservation.create_reservation(
+            'R001', 'C001', 'H001', '2026-03-01', '2026-03-05'
+        )
+        self.reservation.create_reservation(
+            'R002', 'C001', 'H002', '2026-03-01', '2026-03-05'
+        )
+        with mock.patch('store.atomic_write_json',
+                        wraps=store.atomic_write_json) as write:
+            result = self.hotel.delete_many(['H001', 'H999', 'H002'],
+                                            cascade=True)
+        self.assertEqual(result['deleted'], ['H001', 'H002'])
+        self.assertEqual([e['row'] for e in result['errors']], [2])
+        self.assertEqual(write.call_count, 2)
+        self.assertEqual(self.hotel.load_data(), [])
+        self.assertEqual(self.reservation.load_data(), [])
+
+    def test_room_nights(self):
+        """Test agregar noches reservadas por hotel y por mes."""
+        self.reservation.create_reservation(
+            'R001', 'C001', 'H001', '2026-03-30', '2026-04-02'
+        )
+        self.assertEqual(self.reservation.room_nights(), {'H001': 3})
+        self.assertEqual(self.reservation.room_nights_by_month(),
+                         {'H001': {'2026-03': 2, '2026-04': 1}})
+        self.reservation.cancel_reservation('R001')
+        self.assertEqual(self.reservation.room_nights(), {})
 
     def test_load_corrupted_file(self):
         """Test cargar archivo JSON corrupto."""
@@ -147,6 +336,156 @@ class TestReservation(unittest.TestCase):
         with self.assertRaises(json.JSONDecodeError):
             self.reservation.load_data()
 
+    def test_capacity_uses_nightly_occupancy(self):
+        """Test que estancias que no se traslapan no llenan el hotel."""
+        self.hotel.create(hotel_id='H002', name='Hotel Sol',
+                          location='GDL', rooms=2)
+        for number, (check_in, check_out) in enumerate(
+                [('2099-03-01', '2099-03-03'), ('2099-03-05', '2099-03-07')]):
+            self.reservation.create_reservation(
+                f'R00{number}', 'C001', 'H002', check_in, check_out
+            )
+        self.assertEqual(self.hotel.display('H002')['reserved_rooms'], 2)
+        self.assertEqual(self.hotel.modify('H002', rooms=1)['rooms'], 1)
+        with self.assertRaises(ValueError):
+            self.hotel.reserve_room('H002')
+        self.hotel.modify('H002', rooms=2)
+        self.hotel.reserve_room('H002')
+        with self.assertRaises(ValueError):
+            self.hotel.modify('H002', rooms=1)
+        with self.assertRaises(ValueError):
+            self.hotel.reserve_room('H002')
+
+    def test_undated_rooms_count_for_every_stay(self):
+        """Test que las reservas sin fechas ocupan todas las noches."""
+        self.hotel.create(hotel_id='H002', name='Hotel Sol',
+                          location='GDL', rooms=1)
+        self.hotel.reserve_room('H002')
+        with self.assertRaises(ValueError):
+            self.reservation.create_reservation(
+                'R001', 'C001', 'H002', '2099-03-01', '2099-03-03'
+            )
+        self.assertEqual(self.hotel.display('H002')['reserved_rooms'], 1)
+        self.assertEqual(
+            self.reservation.availability('H002', '2099-03-01',
+                                          '2099-03-02'),
+            {'2099-03-01': 0}
+        )
+
+    def test_past_nights_do_not_limit_capacity(self):
+        """Test que una noche llena ya pasada no bloquea al hotel."""
+        self.hotel.create(hotel_id='H002', name='Hotel Sol',
+                          location='GDL', rooms=1)
+        self.reservation.create_reservation(
+            'R001', 'C001', 'H002', '2020-03-01', '2020-03-03'
+        )
+        self.hotel.reserve_room('H002')
+        self.assertEqual(self.hotel.display('H002')['reserved_rooms'], 2)
+        with self.assertRaises(ValueError):
+            self.hotel.reserve_room('H002')
+
+    def test_idempotent_retry(self):
+        """Test que un reintento con la misma llave no reserva de nuevo."""
+        args = ('R001', 'C001', 'H001', '2026-03-01', '2026-03-05')
+        with mock.patch.object(Reservation, 'IDEMPOTENCY',
+                               IdempotencyIndex()):
+            first = self.reservation.create_reservation(*args, 'K1')
+            with mock.patch.object(Reservation, '_bulk') as bulk:
+                retry = self.reservation.create_reservation(*args, 'K1')
+            bulk.assert_not_called()
+            self.assertEqual(retry, first)
+            self.assertEqual(self.hotel.display('H001')['reserved_rooms'], 1)
+            with self.assertRaises(ValueError):
+                self.reservation.create_reservation(
+                    'R002', 'C001', 'H001', '2026-03-01', '2026-03-05', 'K1'
+                )
+
+    def test_idempotent_failures_not_remembered(self):
+        """Test que un error o una transaccion revertida no guardan llave."""
+        with mock.patch.object(Reservation, 'IDEMPOTENCY',
+                               IdempotencyIndex()) as index:
+            with self.assertRaises(ValueError):
+                self.reservation.create_reservation(
+                    'R001', 'C001', 'H999', '2026-03-01', '2026-03-05', 'K1'
+                )
+            with self.assertRaises(RuntimeError):
+                with self.reservation.transaction(self.hotel,
+                                                  self.customer):
+                    self.reservation.create_reservation(
+                        'R001', 'C001', 'H001', '2026-03-01', '2026-03-05',
+                        'K2'
+                    )
+                    raise RuntimeError("falla")
+            self.assertEqual(len(index), 0)
+            self.assertEqual(self.reservation.load_data(), [])
+
+
+class TestStorageBackends(unittest.TestCase):
+    """Flujo completo de los managers sobre cada almacenamiento."""
+
+    BACKENDS = {
+        'json': {'STORAGE': 'json'},
+        'journal': {'STORAGE': 'journal'},
+        'sqlite': {'STORAGE': 'sqlite'},
+        'lazy': {'STORAGE': 'lazy'},
+        'writebehind': {'STORAGE': 'json', 'WRITE_BEHIND': True},
+        'shards': {'STORAGE': 'json', 'SHARDS': 4},
+    }
+
+    def test_book_cancel_cascade_reload(self):
+        """Test reservar, cancelar, borrar en cascada y recargar."""
+        for backend, options in self.BACKENDS.items():
+            with self.subTest(backend=backend), \
+                    mock.patch.multiple(PersistenceManager, **options):
+                self.addCleanup(self._close_stores,
+                                temp_data_dir(self))
+                self._book_cancel_cascade()
+                # pylint: disable-next=protected-access
+                stores, databases = store._STORES, sqlite_store._DATABASES
+                with mock.patch.dict(stores, clear=True), \
+                        mock.patch.dict(databases, clear=True):
+                    self._assert_reloaded()
+
+    @staticmethod
+    def _book_cancel_cascade():
+        hotel, reservation = Hotel(), Reservation()
+        hotel.create(hotel_id='H001', name='Hotel Plaza', location='CDMX',
+                     rooms=2)
+        hotel.create(hotel_id='H002', name='Hotel Sol', location='GDL',
+                     rooms=1)
+        Customer().create(customer_id='C001', name='Juan Perez',
+                          email='juan@email.com')
+        for reservation_id, hotel_id in (('R001', 'H001'), ('R002', 'H001'),
+                                         ('R003', 'H002')):
+            reservation.create_reservation(reservation_id, 'C001', hotel_id,
+                                           '2026-03-01', '2026-03-03')
+        reservation.cancel_reservation('R002')
+        hotel.delete('H001', cascade=True)
+
+    def _assert_reloaded(self):
+        self.assertEqual([h['hotel_id'] for h in Hotel().display()],
+                         ['H002'])
+        self.assertEqual(Hotel().display('H002')['reserved_rooms'], 1)
+        self.assertEqual(
+            [r['reservation_id'] for r in Reservation().load_data()],
+            ['R003']
+        )
+        self.assertEqual(len(Reservation().by_customer('C001')), 1)
+        self._close_stores()
+
+    @staticmethod
+    def _close_stores(directory=None):
+        """Detiene los hilos write-behind y cierra las bases SQLite."""
+        for opened in store.open_stores():
+            if isinstance(opened, store.WriteBehindStore) and (
+                    directory is None
+                    or opened.filepath.startswith(directory)):
+                opened.close()
+        # pylint: disable-next=protected-access
+        for db_path, database in list(sqlite_store._DATABASES.items()):
+            if directory is None or db_path.startswith(directory):
+                database.close()
+
 
 if __name__ == '__main__':
     unittest.main()
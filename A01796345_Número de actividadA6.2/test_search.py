@@ -0,0 +1,115 @@
+"""Tests para la busqueda de disponibilidad de hoteles."""
+import unittest
+
+from customer import Customer
+from datadir import temp_data_dir
+from hotel import Hotel
+from indexes import FieldIndex
+from reservation import Reservation
+from search import HotelSearch
+
+
+class TestFieldIndex(unittest.TestCase):
+    """Pruebas unitarias para FieldIndex."""
+
+    def test_ids_are_sorted_and_paged(self):
+        """Test listar ids ordenados a partir de un cursor."""
+        index = FieldIndex('city', 'id')
+        index.rebuild([{'id': 'B', 'city': 'X'}, {'id': 'A', 'city': 'X'},
+                       {'id': 'C', 'city': 'Y'}])
+        self.assertEqual(index.ids('X'), ['A', 'B'])
+        self.assertEqual(index.ids('X', after='A'), ['B'])
+        self.assertEqual(index.ids('X', limit=1), ['A'])
+        self.assertEqual(index.ids('Z'), [])
+
+    def test_update_moves_id(self):
+        """Test que cambiar el campo mueve el id de grupo."""
+        index = FieldIndex('city', 'id')
+        index.rebuild([{'id': 'A', 'city': 'X'}])
+        index.update({'id': 'A', 'city': 'X'}, {'id': 'A', 'city': 'Y'})
+        index.update(None, {'id': 'B', 'city': 'Y'})
+        self.assertEqual(index.count('X'), 0)
+        self.assertEqual(index.ids('Y'), ['A', 'B'])
+        index.update({'id': 'A', 'city': 'Y'}, None)
+        self.assertEqual(index.ids('Y'), ['B'])
+
+
+class TestHotelSearch(unittest.TestCase):
+    """Pruebas unitarias para HotelSearch."""
+
+    def setUp(self):
+        """Configuracion inicial para cada test."""
+        temp_data_dir(self)
+        self.hotel = Hotel()
+        self.reservation = Reservation()
+        for hotel_id, location, rooms in [('H001', 'CDMX', 1),
+                                          ('H002', 'CDMX', 2),
+                                          ('H003', 'GDL', 5),
+                                          ('H004', 'CDMX', 3)]:
+            self.hotel.create(hotel_id=hotel_id, name='Hotel',
+                              location=location, rooms=rooms)
+        Customer().create(customer_id='C001', name='Juan Perez',
+                          email='juan@email.com')
+        self.search = HotelSearch(self.hotel, self.reservation)
+
+    def _ids(self, page):
+        return [h['hotel_id'] for h in page['results']]
+
+    def test_search_by_location(self):
+        """Test buscar hoteles de una ubicacion."""
+        page = self.search.search('CDMX', '2026-03-01', '2026-03-03')
+        self.assertEqual(self._ids(page), ['H001', 'H002', 'H004'])
+        self.assertEqual(page['results'][1]['free_rooms'], 2)
+        self.assertIsNone(page['next_cursor'])
+
+    def test_search_excludes_full_hotels(self):
+        """Test que un hotel lleno en alguna noche no aparece."""
+        self.reservation.create_reservation(
+            'R001', 'C001', 'H001', '2026-03-02', '2026-03-04'
+        )
+        page = self.search.search('CDMX', '2026-03-01', '2026-03-03')
+        self.assertEqual(self._ids(page), ['H002', 'H004'])
+        page = self.search.search('CDMX', '2026-03-04', '2026-03-05')
+        self.assertEqual(self._ids(page), ['H001', 'H002', 'H004'])
+
+    def test_search_counts_undated_rooms(self):
+        """Test que una reserva sin fechas llena todas las noches."""
+        self.hotel.reserve_room('H001')
+        page = self.search.search('CDMX', '2026-03-01', '2026-03-03')
+        self.assertEqual(self._ids(page), ['H002', 'H004'])
+
+    def test_search_min_rooms(self):
+        """Test pedir un minimo de habitaciones libres."""
+        page = self.search.search('CDMX', '2026-03-01', '2026-03-03',
+                                  min_rooms=2)
+        self.assertEqual(self._ids(page), ['H002', 'H004'])
+
+    def test_search_pages_with_cursor(self):
+        """Test recorrer los resultados por paginas."""
+        page = self.search.search('CDMX', '2026-03-01', '2026-03-03',
+                                  limit=2)
+        self.assertEqual(self._ids(page), ['H001', 'H002'])
+        self.assertEqual(page['next_cursor'], 'H002')
+        page = self.search.search('CDMX', '2026-03-01', '2026-03-03',
+                                  limit=2, cursor=page['next_cursor'])
+        self.assertEqual(self._ids(page), ['H004'])
+        self.assertIsNone(page['next_cursor'])
+
+    def test_search_follows_location_changes(self):
+        """Test que el indice sigue las modificaciones y eliminaciones."""
+        self.search.search('GDL', '2026-03-01', '2026-03-03')
+        self.hotel.modify('H001', location='GDL')
+        self.hotel.delete('H003')
+        page = self.search.search('GDL', '2026-03-01', '2026-03-03')
+        self.assertEqual(self._ids(page), ['H001'])
+
+    def test_search_invalid_arguments(self):
+        """Test rechazar fechas o limite invalidos."""
+        with self.assertRaises(ValueError):
+            self.search.search('CDMX', '2026-03-03', '2026-03-01')
+        with self.assertRaises(ValueError):
+            self.search.search('CDMX', '2026-03-01', '2026-03-03', limit=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+"""Tests para el servidor HTTP de reservaciones."""
+import http.client
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from urllib.parse import quote
+
+from base_classes import PersistenceManager
+from datadir import temp_data_dir
+from server import make_server
+
+
+class TestServer(unittest.TestCase):
+    """Pruebas unitarias para el servidor HTTP."""
+
+    def setUp(self):
+        """Configuracion inicial para cada test."""
+        temp_data_dir(self)
+        self.httpd = make_server(port=0)
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        """Limpieza despues de cada test."""
+        self.httpd.shutdown()
+        self.thread.join()
+        self.httpd.server_close()
+        self.httpd.service.close()
+
+    def _request(self, method, path, body=None):
+        conn = http.client.HTTPConnection('127.0.0.1',
+                                          self.httpd.server_port)
+        try:
+            data = json.dumps(body) if body is not None else None
+            conn.request(method, path, body=data)
+            response = conn.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            conn.close()
+
+    def _create_hotel_and_customer(self, rooms=5):
+        self._request('POST', '/hotels', {
+            'hotel_id': 'H001', 'name': 'Hotel Plaza',
+            'location': 'CDMX', 'rooms': rooms
+        })
+        self._request('POST', '/customers', {
+            'customer_id': 'C001', 'name': 'Juan Perez',
+            'email': 'juan@email.com'
+        })
+
+    def test_hotel_crud(self):
+        """Test crear, consultar, modificar y eliminar un hotel."""
+        self._create_hotel_and_customer()
+        status, hotel = self._request('GET', '/hotels/H001')
+        self.assertEqual(status, 200)
+        self.assertEqual(hotel['name'], 'Hotel Plaza')
+        status, hotel = self._request('PATCH', '/hotels/H001',
+                                      {'name': 'Hotel Sol'})
+        self.assertEqual(hotel['name'], 'Hotel Sol')
+        self.assertEqual(len(self._request('GET', '/hotels')[1]), 1)
+        self.assertEqual(self._request('DELETE', '/hotels/H001'),
+                         (200, True))
+
+    def test_changes(self):
+        """Test leer el change feed desde una secuencia."""
+        self.assertEqual(self._request('GET', '/changes'), (200, []))
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        patch = mock.patch.object(PersistenceManager, 'FEED_FILE',
+                                  os.path.join(tmpdir, 'changes.jsonl'))
+        patch.start()
+        self.addCleanup(patch.stop)
+        self._create_hotel_and_customer()
+        status, events = self._request('GET', '/changes?after=0')
+        self.assertEqual(status, 200)
+        self.assertEqual([(e['entity'], e['op'], e['id']) for e in events],
+                         [('hotels', 'create', 'H001'),
+                          ('customers', 'create', 'C001')])
+        events = self._request('GET', '/changes?after=1&limit=1')[1]
+        self.assertEqual([e['seq'] for e in events], [2])
+        self.assertEqual(self._request('GET', '/changes?after=x')[0], 400)
+
+    def test_metrics(self):
+        """Test exportar las metricas en texto de Prometheus."""
+        self._create_hotel_and_customer()
+        conn = http.client.HTTPConnection('127.0.0.1',
+                                          self.httpd.server_port)
+        try:
+            conn.request('GET', '/metrics')
+            response = conn.getresponse()
+            text = response.read().decode('utf-8')
+        finally:
+            conn.close()
+        self.assertEqual(response.status, 200)
+        self.assertTrue(response.getheader('Content-Type')
+                        .startswith('text/plain'))
+        self.assertIn('# TYPE reservation_operation_seconds histogram', text)
+        self.assertIn('reservation_store_written_bytes_total', text)
+
+    def test_hotel_pages(self):
+        """Test paginar y filtrar hoteles por la query."""
+        for number in range(3):
+            self._request('POST', '/hotels', {
+                'hotel_id': f'H00{number}', 'name': 'Hotel',
+                'location': 'CDMX' if number else 'GDL', 'rooms': 1
+            })
+        status, page = self._request('GET', '/hotels?location=CDMX&limit=1')
+        self.assertEqual(status, 200)
+        self.assertEqual([h['hotel_id'] for h in page['results']], ['H001'])
+        cursor = page['next_cursor']
+        status, page = self._request(
+            'GET', f'/hotels?location=CDMX&limit=1&cursor={quote(cursor)}'
+        )
+        self.assertEqual([h['hotel_id'] for h in page['results']], ['H002'])
+        self.assertIsNone(page['next_cursor'])
+        self.assertEqual(self._request('GET', '/hotels?limit=x')[0], 400)
+        status, page = self._request('GET', '/hotels?rooms=01')
+        self.assertEqual(len(page['results']), 3)
+        self.assertEqual(self._request('GET', '/hotels?rooms=uno')[0], 400)
+
+    def test_errors(self):
+        """Test codigos de error de rutas y validaciones."""
+        self.assertEqual(self._request('GET', '/rooms')[0], 404)
+        status, body = self._request('GET', '/hotels/H999')
+        self.assertEqual(status, 404)
+        self.assertIn('H999', body['error'])
+        self.assertEqual(self._request('DELETE', '/hotels/H999')[0], 404)
+        self.assertEqual(self._request('POST', '/hotels', [1])[0], 400)
+
+    def test_internal_errors(self):
+        """Test que un error interno responde 500 y no una ruta 404."""
+        manager = self.httpd.service.hotels.manager
+        for error in (OSError('disco'), KeyError('hotel_id')):
+            with mock.patch.object(manager, 'display', side_effect=error):
+                status, body = self._request('GET', '/hotels/H001')
+            self.assertEqual(status, 500)
+            self.assertEqual(body, {'error': 'Error interno del servidor'})
+        with mock.patch.object(PersistenceManager, 'metrics_text',
+                               side_effect=OSError('disco')):
+            self.assertEqual(self._request('GET', '/metrics')[0], 500)
+
+    def test_reservations(self):
+        """Test crear, consultar y cancelar reservaciones."""
+        self._create_hotel_and_customer()
+        status, reservation = self._request('POST', '/reservations', {
+            'reservation_id': 'R001', 'customer_id': 'C001',
+            'hotel_id': 'H001', 'check_in': '2026-03-01',
+            'check_out': '2026-03-05'
+        })
+        self.assertEqual(status, 201)
+        self.assertEqual(reservation['reservation_id'], 'R001')
+        status, found = self._request('GET',
+                                      '/reservations?customer_id=C001')
+        self.assertEqual([r['reservation_id'] for r in found], ['R001'])
+        self.assertEqual(self._request('DELETE', '/hotels/H001')[0], 400)
+        self.assertEqual(self._request('DELETE', '/reservations/R001'),
+                         (200, True))
+        self.assertEqual(self._request('GET', '/reservations?hotel_id=H001'),
+                         (200, []))
+
+    def test_concurrent_bookings_do_not_overbook(self):
+        """Test reservaciones concurrentes contra el servidor."""
+        self._create_hotel_and_customer(rooms=10)
+
+        def book(n):
+            return self._request('POST', '/reservations', {
+                'reservation_id': f'R{n:03}', 'customer_id': 'C001',
+                'hotel_id': 'H001', 'check_in': '2026-03-01',
+                'check_out': '2026-03-02'
+            })[0]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            statuses = list(pool.map(book, range(15)))
+        self.assertEqual(statuses.count(201), 10)
+        self.assertEqual(statuses.count(400), 5)
+        hotel = self._request('GET', '/hotels/H001')[1]
+        self.assertEqual(hotel['reserved_rooms'], 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
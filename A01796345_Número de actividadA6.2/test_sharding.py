@@ -0,0 +1,189 @@
+"""Tests para la particion de los datos en shards por hotel."""
+import os
+import unittest
+from unittest import mock
+
+from base_classes import PersistenceManager
+from customer import Customer
+from datadir import temp_data_dir
+from hotel import Hotel
+from reporting import Reports
+from reservation import Reservation
+from sharding import ShardLayoutError, shard_of, shard_path
+from store import JsonStore, transaction
+
+SHARDS = 4
+
+
+class TestSharding(unittest.TestCase):
+    """Pruebas unitarias para los managers con shards."""
+
+    def setUp(self):
+        """Configuracion inicial para cada test."""
+        self.tmpdir = temp_data_dir(self)
+        patch = mock.patch.object(PersistenceManager, 'SHARDS', SHARDS)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.hotel = Hotel()
+        self.reservation = Reservation()
+        self.hotel_ids = self._hotels_in_distinct_shards(2)
+        self.first, self.second = self.hotel_ids[0], self.hotel_ids[1]
+        for hotel_id in self.hotel_ids:
+            self.hotel.create(hotel_id=hotel_id, name=f'Hotel {hotel_id}',
+                              location='CDMX', rooms=2)
+        Customer().create(customer_id='C001', name='Juan Perez',
+                          email='juan@email.com')
+
+    @staticmethod
+    def _hotels_in_distinct_shards(count):
+        hotel_ids, shards = [], set()
+        number = 0
+        while len(hotel_ids) < count:
+            number += 1
+            hotel_id = f'H{number:03d}'
+            if shard_of(hotel_id, SHARDS) not in shards:
+                shards.add(shard_of(hotel_id, SHARDS))
+                hotel_ids.append(hotel_id)
+        return hotel_ids
+
+    def _path(self, name, hotel_id):
+        return shard_path(os.path.join(self.tmpdir, name),
+                          shard_of(hotel_id, SHARDS))
+
+    def test_shard_of_and_path(self):
+        """Test que el shard es estable y la ruta es su directorio."""
+        self.assertEqual(shard_of('H001', 8), shard_of('H001', 8))
+        self.assertTrue(0 <= shard_of('H001', 8) < 8)
+        self.assertEqual(shard_path(os.path.join('data', 'hotels.json'), 3),
+                         os.path.join('data', 'shard03', 'hotels.json'))
+
+    def test_hotels_are_partitioned(self):
+        """Test que cada hotel vive en el archivo de su shard."""
+        first, second = self.first, self.second
+        self.assertTrue(os.path.exists(self._path('hotels.json', first)))
+        self.assertTrue(os.path.exists(self._path('hotels.json', second)))
+        self.assertFalse(os.path.exists(
+            os.path.join(self.tmpdir, 'hotels.json')
+        ))
+        self.assertEqual(self.hotel.display(second)['name'],
+                         f'Hotel {second}')
+        self.assertEqual(sorted(h['hotel_id'] for h in self.hotel.display()),
+                         sorted(self.hotel_ids))
+        self.assertEqual(self.hotel.ids_by_location('CDMX'),
+                         sorted(self.hotel_ids))
+        self.assertEqual(self.hotel.ids_by_location('CDMX', limit=1),
+                         sorted(self.hotel_ids)[:1])
+
+    def test_pages_merge_shards(self):
+        """Test que las paginas mezclan los shards en orden."""
+        page = self.hotel.page(1)
+        self.assertEqual([h['hotel_id'] for h in page['results']],
+                         sorted(self.hotel_ids)[:1])
+        rest = self.hotel.page(5, page['next_cursor'])
+        self.assertEqual([h['hotel_id'] for h in rest['results']],
+                         sorted(self.hotel_ids)[1:])
+        self.assertIsNone(rest['next_cursor'])
+
+    def test_booking_locks_only_its_shard(self):
+        """Test que una reservacion bloquea el shard de su hotel y su id."""
+        first, second = self.first, self.second
+        with mock.patch('base_classes.transaction',
+                        wraps=transaction) as begin:
+            self.reservation.create_reservation(
+                'R001', 'C001', first, '2026-03-01', '2026-03-03'
+            )
+        paths = {store.filepath for store in begin.call_args.args}
+        self.assertIn(self._path('reservations.json', first), paths)
+        self.assertIn(self._path('reservations.json', 'R001'), paths)
+        self.assertIn(self._path('hotels.json', first), paths)
+        self.assertNotIn(self._path('hotels.json', second), paths)
+
+    def test_bookings_in_distinct_shards_share_no_lock(self):
+        """Test que altas en shards distintos no comparten candados."""
+        paths = []
+        for hotel_id in (self.first, self.second):
+            reservation_id = next(
+                f'R{n:03d}' for n in range(1, 1000)
+                if shard_of(f'R{n:03d}', SHARDS) == shard_of(hotel_id, SHARDS)
+            )
+            with mock.patch('base_classes.transaction',
+                            wraps=transaction) as begin:
+                self.reservation.create_reservation(
+                    reservation_id, 'C001', hotel_id, '2026-03-01',
+                    '2026-03-03'
+                )
+            paths.append({store.filepath for store in begin.call_args.args})
+        self.assertFalse(paths[0] & paths[1])
+
+    def test_changed_shard_count_is_refused(self):
+        """Test que otro SHARDS con datos en disco no arranca sin reshard."""
+        with mock.patch.object(PersistenceManager, 'SHARDS', 2):
+            with self.assertRaises(ShardLayoutError):
+                Hotel().display()
+            self.assertEqual(Hotel().reshard(SHARDS), 2)
+            self.assertEqual(sorted(h['hotel_id'] for h in Hotel().display()),
+                             sorted(self.hotel_ids))
+        with self.assertRaises(ShardLayoutError):
+            Hotel().display()
+        self.assertEqual(Hotel().reshard(2), 2)
+        self.assertEqual(len(Hotel().display()), 2)
+
+    def test_unsharded_data_is_refused(self):
+        """Test que los datos sin particionar no quedan huerfanos."""
+        path = os.path.join(self.tmpdir, 'legacy.json')
+        with mock.patch.object(Hotel, 'DATA_FILE', path):
+            with mock.patch.object(PersistenceManager, 'SHARDS', 1):
+                Hotel().create(hotel_id='H001', name='Hotel Plaza',
+                               location='CDMX', rooms=1)
+            with self.assertRaises(ShardLayoutError):
+                Hotel().display('H001')
+            Hotel().reshard(1)
+            self.assertEqual(Hotel().display('H001')['name'], 'Hotel Plaza')
+            self.assertEqual(JsonStore(path, 'hotel_id').all(), [])
+
+    def test_reservations_across_shards(self):
+        """Test consultas, ids repetidos y cancelaciones entre shards."""
+        first, second = self.first, self.second
+        self.reservation.create_reservation(
+            'R002', 'C001', first, '2026-03-01', '2026-03-03'
+        )
+        self.reservation.create_reservation(
+            'R001', 'C001', second, '2026-03-01', '2026-03-02'
+        )
+        with self.assertRaises(ValueError):
+            self.reservation.create_reservation(
+                'R001', 'C001', first, '2026-03-05', '2026-03-06'
+            )
+        reservations = self.reservation.by_customer('C001')
+        self.assertEqual([r['reservation_id'] for r in reservations],
+                         ['R001', 'R002'])
+        self.assertEqual(self.reservation.room_nights(),
+                         {first: 2, second: 1})
+        self.assertEqual(Reports(self.hotel, self.reservation).summary(
+            first)['room_nights'], 2)
+        self.reservation.cancel_reservation('R001')
+        self.assertEqual(self.hotel.display(second)['reserved_rooms'], 0)
+        self.assertEqual(self.hotel.display(first)['reserved_rooms'], 1)
+
+    def test_delete_hotel_cascade(self):
+        """Test eliminar un hotel y sus reservaciones de su shard."""
+        first, second = self.first, self.second
+        self.reservation.create_reservation(
+            'R001', 'C001', first, '2026-03-01', '2026-03-03'
+        )
+        self.reservation.create_reservation(
+            'R002', 'C001', second, '2026-03-01', '2026-03-03'
+        )
+        with self.assertRaises(ValueError):
+            self.hotel.delete(first)
+        self.hotel.delete(first, cascade=True)
+        self.assertEqual(
+            [r['reservation_id'] for r in self.reservation.load_data()],
+            ['R002']
+        )
+        with self.assertRaises(ValueError):
+            Customer().delete('C001')
+
+
+if __name__ == '__main__':
+    unittest.main()
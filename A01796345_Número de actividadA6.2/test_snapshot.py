@@ -0,0 +1,113 @@
+"""Tests para el snapshot binario de los almacenes."""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from records import HotelRecord
+from snapshot import read_snapshot, source_checksum, write_snapshot
+from store import JournalStore, JsonStore, WriteBehindStore
+
+
+class TestSnapshot(unittest.TestCase):
+    """Pruebas unitarias para el snapshot binario."""
+
+    def setUp(self):
+        """Configuracion inicial para cada test."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'hotels.json')
+        self.snap = self.path + '.snap'
+        self.records = [
+            HotelRecord('H001', 'Hotel Plaza', 'CDMX', 5, 1, 0, 2),
+            HotelRecord('H002', 'Hotel Sol', 'CDMX', 3, None, 0, 1),
+        ]
+        self.source = source_checksum(b'[]')
+
+    def tearDown(self):
+        """Limpieza despues de cada test."""
+        shutil.rmtree(self.tmpdir)
+
+    def _write_json(self, records):
+        with open(self.path, 'w', encoding='utf-8') as file:
+            json.dump(records, file, indent=2)
+
+    def test_round_trip(self):
+        """Test escribir y leer los registros."""
+        write_snapshot(self.snap, self.source, self.records,
+                       HotelRecord.__slots__)
+        self.assertEqual(read_snapshot(self.snap, self.source, HotelRecord),
+                         self.records)
+
+    def test_stale_or_corrupt_snapshot_is_ignored(self):
+        """Test que un snapshot viejo o danado no se usa."""
+        write_snapshot(self.snap, self.source, self.records,
+                       HotelRecord.__slots__)
+        self.assertIsNone(read_snapshot(self.snap, source_checksum(b'[1]'),
+                                        HotelRecord))
+        with open(self.snap, 'r+b') as file:
+            file.seek(-1, os.SEEK_END)
+            file.write(b'\xff')
+        self.assertIsNone(read_snapshot(self.snap, self.source, HotelRecord))
+        self.assertIsNone(read_snapshot(self.snap + 'x', self.source,
+                                        HotelRecord))
+
+    def test_unsupported_values(self):
+        """Test rechazar valores que el formato no representa."""
+        record = HotelRecord('H001', 'Hotel Plaza', 'CDMX', 5.5)
+        with self.assertRaises(TypeError):
+            write_snapshot(self.snap, self.source, [record],
+                           HotelRecord.__slots__)
+
+    def test_store_loads_from_snapshot(self):
+        """Test que el almacen usa el snapshot y se recupera si cambia."""
+        self._write_json([r.to_dict() for r in self.records])
+        first = JsonStore(self.path, 'hotel_id', record_type=HotelRecord,
+                          snapshot=True)
+        self.assertEqual(len(first), 2)
+        self.assertTrue(os.path.exists(self.snap))
+        with mock.patch('store.json.loads') as loads:
+            second = JsonStore(self.path, 'hotel_id',
+                               record_type=HotelRecord, snapshot=True)
+            self.assertEqual(second.get('H002')['reserved_rooms'], None)
+            loads.assert_not_called()
+        first.remove('H001')
+        third = JsonStore(self.path, 'hotel_id', record_type=HotelRecord,
+                          snapshot=True)
+        self.assertEqual([h['hotel_id'] for h in third.all()], ['H002'])
+
+    def _assert_cold_start_uses_snapshot(self, store_type):
+        with mock.patch('store.json.loads') as loads, \
+                mock.patch('store.write_snapshot') as write:
+            store = store_type(self.path, 'hotel_id',
+                               record_type=HotelRecord, snapshot=True)
+            self.assertEqual([h['hotel_id'] for h in store.all()],
+                             ['H001', 'H002'])
+            loads.assert_not_called()
+            write.assert_not_called()
+
+    def test_writes_keep_snapshot_current(self):
+        """Test que cada escritura del JSON deja su snapshot al dia."""
+        store = JsonStore(self.path, 'hotel_id', record_type=HotelRecord,
+                          snapshot=True)
+        for record in self.records:
+            store.put(record.to_dict())
+        self._assert_cold_start_uses_snapshot(JsonStore)
+        journal = JournalStore(self.path, 'hotel_id', compact_every=1,
+                               record_type=HotelRecord, snapshot=True)
+        journal.put(self.records[0].to_dict())
+        self._assert_cold_start_uses_snapshot(JsonStore)
+
+    def test_checkpoint_writes_snapshot(self):
+        """Test que el checkpoint write-behind escribe el snapshot."""
+        store = WriteBehindStore(self.path, 'hotel_id',
+                                 record_type=HotelRecord, snapshot=True)
+        for record in self.records:
+            store.put(record.to_dict())
+        store.close()
+        self._assert_cold_start_uses_snapshot(WriteBehindStore)
+
+
+if __name__ == '__main__':
+    unittest.main()
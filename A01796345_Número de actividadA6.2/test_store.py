@@ -0,0 +1,528 @@
+"""Tests para los almacenes residentes."""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from base_classes import PersistenceManager
+from datadir import data_dir
+from fsutil import stage_file
+from hotel import Hotel
+from reservation import Reservation
+from sqlite_store import SqliteStore
+from store import (JournalStore, JsonStore, WriteBehindStore, open_store,
+                   savepoint, transaction)
+
+
+class _ValueSum:
+    """Indice de prueba que suma el campo value."""
+
+    def __init__(self):
+        self.total = 0
+
+    def rebuild(self, records):
+        """Suma los valores de todos los registros."""
+        self.total = sum(r['value'] for r in records)
+
+    def update(self, old, new):
+        """Ajusta la suma con el cambio de un registro."""
+        self.total += (new['value'] if new else 0) - (
+            old['value'] if old else 0)
+
+
+class TestJsonStore(unittest.TestCase):
+    """Pruebas unitarias para JsonStore."""
+
+    def setUp(self):
+        """Configuracion inicial para cada test."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'items.json')
+        self.store = JsonStore(self.path, 'item_id')
+
+    def tearDown(self):
+        """Limpieza despues de cada test."""
+        shutil.rmtree(self.tmpdir)
+
+    def test_put_and_get(self):
+        """Test insertar y obtener un registro por id."""
+        self.store.put({'item_id': 'A', 'value': 1})
+        self.assertEqual(self.store.get('A'),
+                         {'item_id': 'A', 'value': 1, 'version': 1})
+        self.assertIsNone(self.store.get('B'))
+        self.assertIn('A', self.store)
+        self.assertEqual(len(self.store), 1)
+
+    def test_get_returns_copy(self):
+        """Test que modificar el resultado no altera el almacen."""
+        self.store.put({'item_id': 'A', 'value': 1})
+        self.store.get('A')['value'] = 99
+        self.assertEqual(self.store.get('A')['value'], 1)
+
+    def test_reads_file_once(self):
+        """Test que las lecturas repetidas no vuelven a parsear."""
+        self.store.put({'item_id': 'A', 'value': 1})
+        reader = JsonStore(self.path, 'item_id')
+        with mock.patch('store.json.load', wraps=json.load) as load:
+            for _ in range(5):
+                reader.get('A')
+            self.assertEqual(load.call_count, 1)
+
+    def test_reload_on_external_change(self):
+        """Test recargar cuando otro proceso modifica el archivo."""
+        self.store.put({'item_id': 'A', 'value': 1})
+        with open(self.path, 'w', encoding='utf-8') as file:
+            json.dump([{'item_id': 'B', 'value': 22}], file)
+        self.assertIsNone(self.store.get('A'))
+        self.assertEqual(self.store.get('B')['value'], 22)
+
+    def test_reload_on_file_removed(self):
+        """Test vaciar el almacen cuando se elimina el archivo."""
+        self.store.put({'item_id': 'A', 'value': 1})
+        os.remove(self.path)
+        self.assertEqual(self.store.all(), [])
+
+    def test_remove(self):
+        """Test eliminar un registro."""
+        self.store.put({'item_id': 'A', 'value': 1})
+        self.assertTrue(self.store.remove('A'))
+        self.assertFalse(self.store.remove('A'))
+        with open(self.path, 'r', encoding='utf-8') as file:
+            self.assertEqual(json.load(file), [])
+
+    def test_crash_during_write_keeps_previous_file(self):
+        """Test que un fallo al escribir no trunca el archivo."""
+        self.store.put({'item_id': 'A', 'value': 1})
+
+        with mock.patch('fsutil.os.fsync', side_effect=OSError('disco')):
+            with self.assertRaises(OSError):
+                self.store.put({'item_id': 'B', 'value': 2})
+        with open(self.path, 'r', encoding='utf-8') as file:
+            self.assertEqual(json.load(file),
+                             [{'item_id': 'A', 'value': 1, 'version': 1}])
+        self.assertIsNone(self.store.get('B'))
+        self.assertFalse(
+            [f for f in os.listdir(self.tmpdir) if f.endswith('.tmp')]
+        )
+
+    def test_write_is_fsynced(self):
+        """Test que la escritura sincroniza archivo y directorio."""
+        with mock.patch('store.os.fsync') as fsync:
+            self.store.put({'item_id': 'A', 'value': 1})
+        self.assertEqual(fsync.call_count, 2)
+
+    def test_group_commit(self):
+        """Test agrupar varias mutaciones por escritura."""
+        store = JsonStore(self.path, 'item_id', group_commit=3)
+        store.put({'item_id': 'A', 'value': 1})
+        store.put({'item_id': 'B', 'value': 2})
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(len(store), 2)
+        store.put({'item_id': 'C', 'value': 3})
+        with open(self.path, 'r', encoding='utf-8') as file:
+            self.assertEqual(len(json.load(file)), 3)
+
+    def test_batch_writes_once(self):
+        """Test que batch escribe una sola vez al salir del bloque."""
+        with mock.patch('store.atomic_write_json') as write:
+            with self.store.batch():
+                for i in range(5):
+                    self.store.put({'item_id': f'I{i}', 'value': i})
+                write.assert_not_called()
+        write.assert_called_once()
+
+    def test_flush_pending(self):
+        """Test que flush escribe las mutaciones pendientes."""
+        store = JsonStore(self.path, 'item_id', group_commit=10)
+        store.put({'item_id': 'A', 'value': 1})
+        store.flush()
+        with open(self.path, 'r', encoding='utf-8') as file:
+            self.assertEqual(len(json.load(file)), 1)
+
+    def test_transaction_rolls_back_all_stores(self):
+        """Test que una transaccion fallida revierte ambos almacenes."""
+        other = JsonStore(os.path.join(self.tmpdir, 'other.json'), 'item_id')
+        self.store.put({'item_id': 'A', 'value': 1})
+        with self.assertRaises(RuntimeError):
+            with transaction(self.store, other):
+                self.store.put({'item_id': 'A', 'value': 2})
+                self.store.remove('A')
+                other.put({'item_id': 'B', 'value': 3})
+                raise RuntimeError('fallo')
+        self.assertEqual(self.store.get('A')['value'], 1)
+        self.assertIsNone(other.get('B'))
+        self.assertFalse(os.path.exists(other.filepath))
+
+    def test_transaction_commits_all_stores(self):
+        """Test que una transaccion exitosa escribe ambos almacenes."""
+        other = JsonStore(os.path.join(self.tmpdir, 'other.json'), 'item_id')
+        with transaction(self.store, other):
+            self.store.put({'item_id': 'A', 'value': 1})
+            other.put({'item_id': 'B', 'value': 2})
+        self.assertEqual(len(JsonStore(self.path, 'item_id')), 1)
+        self.assertEqual(len(JsonStore(other.filepath, 'item_id')), 1)
+
+    def test_nested_transaction_writes_once(self):
+        """Test que una transaccion anidada escribe al terminar la externa."""
+        with mock.patch('store.atomic_write_json') as write:
+            with transaction(self.store):
+                for i in range(3):
+                    with transaction(self.store):
+                        self.store.put({'item_id': f'I{i}', 'value': i})
+                write.assert_not_called()
+        write.assert_called_once()
+
+    def test_savepoint_reverts_only_its_block(self):
+        """Test que un savepoint fallido conserva lo previo del bloque."""
+        index = self.store.index('values', _ValueSum)
+        with transaction(self.store):
+            self.store.put({'item_id': 'A', 'value': 1})
+            with self.assertRaises(RuntimeError):
+                with savepoint(self.store):
+                    self.store.put({'item_id': 'A', 'value': 2})
+                    self.store.put({'item_id': 'B', 'value': 3})
+                    raise RuntimeError('fallo')
+            self.store.put({'item_id': 'C', 'value': 4})
+        self.assertEqual(index.total, 5)
+        restarted = JsonStore(self.path, 'item_id')
+        self.assertEqual([(r['item_id'], r['value']) for r in restarted.all()],
+                         [('A', 1), ('C', 4)])
+
+    def test_index_follows_mutations_and_reloads(self):
+        """Test que un indice sigue mutaciones, rollbacks y recargas."""
+        index = self.store.index('values', _ValueSum)
+        self.store.put({'item_id': 'A', 'value': 1})
+        self.store.put({'item_id': 'A', 'value': 5})
+        self.assertEqual(index.total, 5)
+        with self.assertRaises(RuntimeError):
+            with transaction(self.store):
+                self.store.remove('A')
+                raise RuntimeError('fallo')
+        self.assertEqual(index.total, 5)
+        with open(self.path, 'w', encoding='utf-8') as file:
+            json.dump([{'item_id': 'B', 'value': 7}], file)
+        self.assertIs(self.store.index('values', _ValueSum), index)
+        self.assertEqual(index.total, 7)
+
+    def test_open_store_shared(self):
+        """Test que la misma ruta comparte el almacen."""
+        first = open_store(self.path, 'item_id')
+        second = open_store(os.path.join(self.tmpdir, '.', 'items.json'),
+                            'item_id')
+        self.assertIs(first, second)
+
+
+class TestJournalStore(unittest.TestCase):
+    """Pruebas unitarias para JournalStore."""
+
+    def setUp(self):
+        """Configuracion inicial para cada test."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'items.json')
+        self.store = JournalStore(self.path, 'item_id', compact_every=10)
+
+    def tearDown(self):
+        """Limpieza despues de cada test."""
+        shutil.rmtree(self.tmpdir)
+
+    def _log_lines(self):
+        with open(self.store.log_path, 'r', encoding='utf-8') as file:
+            return file.readlines()
+
+    def test_mutations_append_to_log(self):
+        """Test que cada mutacion anexa una linea sin tocar el snapshot."""
+        self.store.put({'item_id': 'A', 'value': 1})
+        self.store.put({'item_id': 'A', 'value': 2})
+        self.store.remove('A')
+        self.assertFalse(os.path.exists(self.path))
+        entries = [json.loads(line) for line in self._log_lines()]
+        self.assertEqual([e['op'] for e in entries], ['put', 'put', 'del'])
+
+    def test_restart_replays_snapshot_and_log(self):
+        """Test que un almacen nuevo reproduce snapshot y bitacora."""
+        self.store.put({'item_id': 'A', 'value': 1})
+        self.store.compact()
+        self.store.put({'item_id': 'B', 'value': 2})
+        self.store.remove('A')
+        restarted = JournalStore(self.path, 'item_id')
+        self.assertEqual(restarted.all(),
+                         [{'item_id': 'B', 'value': 2, 'version': 1}])
+
+    def test_compaction_after_threshold(self):
+        """Test compactar al alcanzar compact_every entradas."""
+        for i in range(10):
+            self.store.put({'item_id': f'I{i}', 'value': i})
+        self.assertFalse(os.path.exists(self.store.log_path))
+        with open(self.path, 'r', encoding='utf-8') as file:
+            self.assertEqual(len(json.load(file)), 10)
+
+    def test_tails_log_written_by_other_process(self):
+        """Test leer solo la cola nueva de la bitacora."""
+        self.store.put({'item_id': 'A', 'value': 1})
+        other = JournalStore(self.path, 'item_id')
+        self.assertEqual(len(other), 1)
+        self.store.put({'item_id': 'B', 'value': 2})
+        with mock.patch.object(other, '_read') as read:
+            self.assertEqual(other.get('B')['value'], 2)
+            read.assert_not_called()
+
+    def test_ignores_torn_last_line(self):
+        """Test ignorar una linea incompleta al final de la bitacora."""
+        self.store.put({'item_id': 'A', 'value': 1})
+        with open(self.store.log_path, 'a', encoding='utf-8') as file:
+            file.write('{"op": "put", "rec')
+        restarted = JournalStore(self.path, 'item_id')
+        self.assertEqual(len(restarted), 1)
+
+    def test_append_after_torn_line(self):
+        """Test que anexar tras una linea incompleta la descarta."""
+        self.store.put({'item_id': 'A', 'value': 1})
+        with open(self.store.log_path, 'a', encoding='utf-8') as file:
+            file.write('{"op": "put", "rec')
+        restarted = JournalStore(self.path, 'item_id')
+        restarted.put({'item_id': 'B', 'value': 2})
+        self.assertEqual(len(JournalStore(self.path, 'item_id')), 2)
+
+    def test_batch_single_append(self):
+        """Test que batch anexa todas las entradas con un fsync."""
+        with mock.patch('store.os.fsync') as fsync:
+            with self.store.batch():
+                for i in range(3):
+                    self.store.put({'item_id': f'I{i}', 'value': i})
+        self.assertEqual(fsync.call_count, 1)
+        self.assertEqual(len(self._log_lines()), 3)
+
+    def test_rollback_keeps_earlier_group_commit(self):
+        """Test que una transaccion fallida no descarta lo ya pendiente."""
+        store = JournalStore(self.path, 'item_id', group_commit=3)
+        store.put({'item_id': 'A', 'value': 1})
+        with self.assertRaises(RuntimeError):
+            with transaction(store):
+                store.put({'item_id': 'B', 'value': 2})
+                raise RuntimeError('fallo')
+        store.put({'item_id': 'C', 'value': 3})
+        store.flush()
+        restarted = JournalStore(self.path, 'item_id')
+        self.assertEqual([r['item_id'] for r in restarted.all()],
+                         ['A', 'C'])
+
+    def test_open_store_journal(self):
+        """Test seleccionar el almacen por configuracion."""
+        store = open_store(self.path, 'item_id', 'journal')
+        self.assertIsInstance(store, JournalStore)
+        with self.assertRaises(ValueError):
+            open_store(self.path, 'item_id', 'desconocido')
+
+
+class TestWriteBehindStore(unittest.TestCase):
+    """Pruebas unitarias para WriteBehindStore."""
+
+    def setUp(self):
+        """Configuracion inicial para cada test."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.path = os.path.join(self.tmpdir, 'items.json')
+        self.store = self._open(flush_interval=60)
+
+    def _open(self, **options):
+        store = WriteBehindStore(self.path, 'item_id', **options)
+        self.addCleanup(store.close)
+        return store
+
+    def _wait_clean(self, store):
+        deadline = time.monotonic() + 5
+        while store.dirty and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(store.dirty, 0)
+
+    def test_mutations_only_append(self):
+        """Test que una mutacion anexa a la bitacora sin reescribir."""
+        with mock.patch.object(self.store, '_write') as write:
+            for value in range(5):
+                self.store.put({'item_id': 'A', 'value': value})
+            self.store.put({'item_id': 'B', 'value': 1})
+            self.store.remove('B')
+        write.assert_not_called()
+        self.assertEqual(self.store.dirty, 7)
+        self.assertFalse(os.path.exists(self.path))
+        restarted = JournalStore(self.path, 'item_id')
+        self.assertEqual(restarted.get('A')['value'], 4)
+        self.assertNotIn('B', restarted)
+
+    def test_checkpoint(self):
+        """Test consolidar la bitacora en el JSON."""
+        self.store.put({'item_id': 'A', 'value': 1})
+        self.store.checkpoint()
+        self.assertEqual(self.store.dirty, 0)
+        self.assertFalse(os.path.exists(self.store.log_path))
+        with open(self.path, 'r', encoding='utf-8') as file:
+            self.assertEqual(json.load(file)[0]['value'], 1)
+
+    def test_checkpoint_writes_outside_the_lock(self):
+        """Test que las escrituras siguen mientras se escribe el snapshot."""
+        self.store.put({'item_id': 'A', 'value': 1})
+
+        def concurrent_put(filepath, data):
+            thread = threading.Thread(target=self.store.put,
+                                      args=({'item_id': 'B', 'value': 2},))
+            thread.start()
+            thread.join(timeout=5)
+            self.assertFalse(thread.is_alive())
+            return stage_file(filepath, data)
+
+        with mock.patch('store.stage_file', concurrent_put):
+            self.store.checkpoint()
+        self.assertEqual(self.store.dirty, 1)
+        with open(self.store.log_path, 'r', encoding='utf-8') as file:
+            self.assertEqual(len(file.readlines()), 1)
+        self.assertEqual(len(JsonStore(self.path, 'item_id')), 1)
+        restarted = JournalStore(self.path, 'item_id')
+        self.assertEqual(restarted.get('B')['value'], 2)
+        self.assertEqual(restarted.get('A')['value'], 1)
+
+    def test_flush_on_dirty_threshold(self):
+        """Test que el hilo compacta al alcanzar max_dirty."""
+        store = self._open(flush_interval=60, max_dirty=2)
+        store.put({'item_id': 'A', 'value': 1})
+        store.put({'item_id': 'B', 'value': 2})
+        self._wait_clean(store)
+        self.assertEqual(len(JsonStore(self.path, 'item_id')), 2)
+
+    def test_flush_on_interval(self):
+        """Test que el hilo compacta cada flush_interval segundos."""
+        store = self._open(flush_interval=0.01)
+        store.put({'item_id': 'A', 'value': 1})
+        self._wait_clean(store)
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_close_checkpoints(self):
+        """Test que close detiene el hilo y consolida lo pendiente."""
+        self.store.put({'item_id': 'A', 'value': 1})
+        self.store.close()
+        self.assertEqual(self.store.dirty, 0)
+        self.assertEqual(len(JsonStore(self.path, 'item_id')), 1)
+
+    def test_hotel_write_behind(self):
+        """Test que reservar con WRITE_BEHIND no reescribe hoteles."""
+        with data_dir(self.tmpdir), \
+                mock.patch.object(PersistenceManager, 'WRITE_BEHIND', True):
+            hotel = Hotel()
+            hotel.create(hotel_id='H001', name='Hotel Plaza',
+                         location='CDMX', rooms=5)
+            store = hotel._store()  # pylint: disable=protected-access
+            self.addCleanup(store.close)
+            self.assertIsInstance(store, WriteBehindStore)
+            with mock.patch('store.atomic_write_json') as write:
+                hotel.reserve_room('H001')
+                hotel.cancel_reservation('H001')
+            write.assert_not_called()
+            store.close()
+            self.assertEqual(hotel.display('H001')['cancellations'], 1)
+
+
+class TestSqliteStore(unittest.TestCase):
+    """Pruebas unitarias para SqliteStore."""
+
+    def setUp(self):
+        """Configuracion inicial para cada test."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'system.db')
+        self.store = SqliteStore(self.db_path, 'item_id', 'items',
+                                 ('item_id', 'name', 'value', 'version'))
+
+    def tearDown(self):
+        """Limpieza despues de cada test."""
+        shutil.rmtree(self.tmpdir)
+
+    def test_put_get_remove(self):
+        """Test operaciones por llave primaria."""
+        self.store.put({'item_id': 'A', 'name': 'uno', 'value': 1})
+        self.assertEqual(self.store.get('A'), {'item_id': 'A', 'name': 'uno',
+                                               'value': 1, 'version': 1})
+        self.assertIn('A', self.store)
+        self.assertTrue(self.store.remove('A'))
+        self.assertFalse(self.store.remove('A'))
+        self.assertIsNone(self.store.get('A'))
+
+    def test_update_keeps_order(self):
+        """Test que actualizar no cambia el orden de insercion."""
+        self.store.put({'item_id': 'A', 'name': 'uno', 'value': 1})
+        self.store.put({'item_id': 'B', 'name': 'dos', 'value': 2})
+        self.store.put({'item_id': 'A', 'name': 'uno', 'value': 10})
+        self.assertEqual([r['value'] for r in self.store.all()], [10, 2])
+        self.assertEqual(len(self.store), 2)
+
+    def test_new_fields_add_columns(self):
+        """Test que un campo nuevo agrega su columna a la tabla."""
+        self.store.put({'item_id': 'A', 'name': 'uno', 'value': 1})
+        store = SqliteStore(self.db_path, 'item_id', 'items',
+                            ('item_id', 'name', 'value', 'extra',
+                             'version'))
+        self.assertIsNone(store.get('A')['extra'])
+        store.put({'item_id': 'A', 'name': 'uno', 'value': 1, 'extra': 2})
+        self.assertEqual(store.get('A')['extra'], 2)
+
+    def test_replace(self):
+        """Test reemplazar todos los registros."""
+        self.store.put({'item_id': 'A', 'name': 'uno', 'value': 1})
+        self.store.replace([{'item_id': 'B', 'name': 'dos', 'value': 2}])
+        self.assertEqual([r['item_id'] for r in self.store.all()], ['B'])
+
+    def test_index_after_rollback(self):
+        """Test que el indice se reconstruye al revertir en SQLite."""
+        index = self.store.index('values', _ValueSum)
+        self.store.put({'item_id': 'A', 'name': 'uno', 'value': 1})
+        with self.assertRaises(RuntimeError):
+            with self.store.batch():
+                self.store.put({'item_id': 'B', 'name': 'dos', 'value': 2})
+                raise RuntimeError('fallo')
+        self.assertEqual(index.total, 1)
+
+    def test_savepoint_rollback(self):
+        """Test que un savepoint fallido no revierte la transaccion."""
+        index = self.store.index('values', _ValueSum)
+        with transaction(self.store):
+            self.store.put({'item_id': 'A', 'name': 'uno', 'value': 1})
+            with self.assertRaises(RuntimeError):
+                with savepoint(self.store):
+                    self.store.put({'item_id': 'B', 'name': 'dos',
+                                    'value': 2})
+                    raise RuntimeError('fallo')
+        self.assertEqual(index.total, 1)
+        self.assertEqual([r['item_id'] for r in self.store.all()], ['A'])
+
+    def test_batch_rollback(self):
+        """Test que un error dentro de batch revierte la transaccion."""
+        with self.assertRaises(RuntimeError):
+            with self.store.batch():
+                self.store.put({'item_id': 'A', 'name': 'uno', 'value': 1})
+                raise RuntimeError('fallo')
+        self.assertIsNone(self.store.get('A'))
+
+    def test_wal_mode(self):
+        """Test que la base usa journal_mode WAL."""
+        mode = self.store._conn.execute(  # pylint: disable=protected-access
+            'PRAGMA journal_mode'
+        ).fetchone()[0]
+        self.assertEqual(mode, 'wal')
+
+    def test_managers_use_sqlite_by_configuration(self):
+        """Test que los managers eligen SQLite por configuracion."""
+        with data_dir(self.tmpdir, 'sqlite'):
+            hotel = Hotel()
+            hotel.create(hotel_id='H001', name='Hotel Plaza',
+                         location='CDMX', rooms=5)
+            hotel.reserve_room('H001')
+            store = hotel._store()  # pylint: disable=protected-access
+            self.assertIsInstance(store, SqliteStore)
+            self.assertEqual(hotel.display('H001')['reserved_rooms'], 1)
+            self.assertFalse(os.path.exists(Hotel.DATA_FILE))
+            with self.assertRaises(ValueError):
+                Reservation().cancel_reservation('R999')
+
+
+if __name__ == '__main__':
+    unittest.main()